@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Trace Summary Utility
+
+Reads the spans the services export (src/shared/tracing.py) from KeyDB or a JSONL
+file and shows where request time goes: per-stage latency percentiles, the
+slowest traces, or a single trace as a timed tree.
+
+Examples:
+    python scripts/trace_summary.py                          # stages, from KeyDB
+    python scripts/trace_summary.py --file logs/traces.jsonl --since 30
+    python scripts/trace_summary.py --slowest 10
+    python scripts/trace_summary.py --trace 4f1c...          # one trace as a tree
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.cache import BotCache
+from src.shared.tracing import TRACING_STREAM
+
+
+def load_spans_from_file(path: str) -> List[Dict[str, Any]]:
+    """Read spans from a JSONL export, skipping partial lines."""
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                spans.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return spans
+
+
+def load_spans_from_keydb(redis_url: str, stream: str, count: int) -> List[Dict[str, Any]]:
+    """Read the newest spans from the KeyDB stream."""
+    cache = BotCache(redis_url=redis_url, prefix="tracing")
+    if not cache.redis_client:
+        print(f"❌ Cannot connect to KeyDB at {redis_url}")
+        sys.exit(1)
+    return cache.stream_read(stream, count)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(int(len(sorted_values) * pct / 100), len(sorted_values) - 1)]
+
+
+def summarize(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Latency percentiles per (service, span name), most total time first."""
+    durations = defaultdict(list)
+    errors = defaultdict(int)
+    for span in spans:
+        key = (span["service"], span["name"])
+        durations[key].append(span["duration_ms"])
+        errors[key] += bool(span.get("error"))
+    
+    rows = []
+    for (service, name), values in durations.items():
+        values.sort()
+        rows.append({
+            "service": service,
+            "name": name,
+            "count": len(values),
+            "errors": errors[(service, name)],
+            "p50": percentile(values, 50),
+            "p95": percentile(values, 95),
+            "p99": percentile(values, 99),
+            "max": values[-1],
+            "total": sum(values)
+        })
+    return sorted(rows, key=lambda row: row["total"], reverse=True)
+
+
+def root_spans(spans: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Spans whose parent is not in the set (trace entry points)."""
+    span_ids = {span["span_id"] for span in spans}
+    return [span for span in spans if span.get("parent_id") not in span_ids]
+
+
+def print_summary(rows: List[Dict[str, Any]], top: int):
+    """Print the per-stage table."""
+    print(f"{'SERVICE':<26} {'SPAN':<44} {'COUNT':>6} {'ERR':>4} {'P50 ms':>9} {'P95 ms':>9} {'P99 ms':>9} {'MAX ms':>9}")
+    for row in rows[:top]:
+        print(f"{row['service'][:26]:<26} {row['name'][:44]:<44} {row['count']:>6} {row['errors']:>4} "
+              f"{row['p50']:>9.1f} {row['p95']:>9.1f} {row['p99']:>9.1f} {row['max']:>9.1f}")
+
+
+def print_slowest(spans: List[Dict[str, Any]], limit: int):
+    """Print the slowest trace entry points."""
+    roots = sorted(root_spans(spans), key=lambda span: span["duration_ms"], reverse=True)
+    print(f"{'TRACE':<34} {'SERVICE':<22} {'SPAN':<36} {'MS':>9}  STARTED")
+    for span in roots[:limit]:
+        started = time.strftime("%H:%M:%S", time.localtime(span["start"]))
+        print(f"{span['trace_id']:<34} {span['service'][:22]:<22} {span['name'][:36]:<36} {span['duration_ms']:>9.1f}  {started}")
+
+
+def print_trace(spans: List[Dict[str, Any]], trace_id: str) -> bool:
+    """Print one trace as a tree with each span's offset from the start of the trace."""
+    trace = [span for span in spans if span["trace_id"].startswith(trace_id)]
+    if not trace:
+        return False
+    
+    children = defaultdict(list)
+    for span in trace:
+        children[span.get("parent_id")].append(span)
+    roots = root_spans(trace)
+    trace_start = min(span["start"] for span in trace)
+    
+    def show(span: Dict[str, Any], depth: int):
+        offset_ms = (span["start"] - trace_start) * 1000
+        error = f"  ❌ {span['error']}" if span.get("error") else ""
+        print(f"{offset_ms:>9.1f} {span['duration_ms']:>9.1f}  {'  ' * depth}{span['service']}: {span['name']}{error}")
+        for child in sorted(children[span["span_id"]], key=lambda s: s["start"]):
+            show(child, depth + 1)
+    
+    print(f"Trace {trace[0]['trace_id']} ({len(trace)} spans)")
+    print(f"{'START ms':>9} {'DUR ms':>9}  SPAN")
+    for root in sorted(roots, key=lambda s: s["start"]):
+        show(root, 0)
+    return True
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description='Summarize request tracing spans')
+    parser.add_argument('--file', help='Read spans from a JSONL export instead of KeyDB')
+    parser.add_argument('--keydb', default=os.getenv('TRACING_REDIS_URL') or os.getenv('REDIS_URL') or 'redis://localhost:6379',
+                        help='KeyDB URL to read the span stream from')
+    parser.add_argument('--stream', default=TRACING_STREAM, help='Span stream name')
+    parser.add_argument('--count', type=int, default=20000, help='Newest spans to read from KeyDB')
+    parser.add_argument('--since', type=float, help='Only spans from the last N minutes')
+    parser.add_argument('--service', help='Only spans recorded by this service')
+    parser.add_argument('--top', type=int, default=40, help='Rows in the stage table')
+    parser.add_argument('--slowest', type=int, help='List the N slowest traces instead')
+    parser.add_argument('--trace', help='Show one trace (ID or prefix) as a tree instead')
+    
+    args = parser.parse_args()
+    
+    spans = load_spans_from_file(args.file) if args.file else load_spans_from_keydb(args.keydb, args.stream, args.count)
+    if args.since:
+        cutoff = time.time() - args.since * 60
+        spans = [span for span in spans if span["start"] >= cutoff]
+    
+    if args.trace:
+        if not print_trace(spans, args.trace):
+            print(f"❌ No spans found for trace {args.trace}")
+            sys.exit(1)
+        return
+    
+    if args.service:
+        spans = [span for span in spans if span["service"] == args.service]
+    if not spans:
+        print("No spans found")
+        return
+    
+    if args.slowest:
+        print_slowest(spans, args.slowest)
+    else:
+        print(f"📊 {len(spans)} spans from {len({span['trace_id'] for span in spans})} traces\n")
+        print_summary(summarize(spans), args.top)
+
+
+if __name__ == '__main__':
+    main()
@@ -28,6 +28,16 @@ import sys
 import os.path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from utils.retry_manager import retry_async, RetryConfig
+from src.shared.messages import MessageFormatError, from_stored_record
+from src.shared.service_client import get_client, get_client_stats
+from src.shared.tracing import init_tracing, span
+
+# Pooled keep-alive clients for the services this handler calls
+message_router_client = get_client(MESSAGE_ROUTER_URL, name="message-router")
+quality_control_client = get_client("http://quality-control:6003", name="quality-control")
+
+# Requests from the router (organic messages) continue its trace
+init_tracing(app, "brian-discord")
 
 # Import Redis for conversation history
 import redis
@@ -276,8 +286,8 @@ class BrianDiscordBot:
             }
             
             # Send to quality control service
-            quality_response = requests.post(
-                "http://quality-control:6003/validate-response",
+            quality_response = quality_control_client.post(
+                "/validate-response",
                 json=quality_data,
                 timeout=10
             )
@@ -309,8 +319,8 @@ class BrianDiscordBot:
             
             async def generate_fallback():
                 try:
-                    response = requests.post(
-                        f"{MESSAGE_ROUTER_URL}/generate-fallback",
+                    response = message_router_client.post(
+                        "/generate-fallback",
                         json=fallback_data,
                         timeout=15
                     )
@@ -346,11 +356,12 @@ class BrianDiscordBot:
             }
             
             # Send asynchronously without blocking
-            response = requests.post(
-                f"{MESSAGE_ROUTER_URL}/organic-notification",
-                json=notification_data,
-                timeout=5  # Short timeout since this is fire-and-forget
-            )
+            with span("discord.organic_notification", character="brian", channel_id=channel_id):
+                response = message_router_client.post(
+                    "/organic-notification",
+                    json=notification_data,
+                    timeout=5  # Short timeout since this is fire-and-forget
+                )
             
             if response.status_code == 200:
                 print(f"✅ Brian Discord: Organic notification sent for channel {channel_id}")
@@ -377,11 +388,13 @@ class BrianDiscordBot:
             
             print(f"📤 Brian Discord: Sending to message router - Channel: {channel_id}")
             
-            response = requests.post(
-                f"{MESSAGE_ROUTER_URL}/process-message",
-                json=data,
-                timeout=30
-            )
+            # Each mention starts a trace here
+            with span("discord.mention", character="brian", channel_id=channel_id):
+                response = message_router_client.post(
+                    "/process-message",
+                    json=data,
+                    timeout=30
+                )
             
             if response.status_code == 200:
                 response_data = response.json()
@@ -534,15 +547,9 @@ class BrianDiscordBot:
                         print(f"   Raw data: {message_data}")
                         continue
                     
-                    # Convert to format expected by message router
-                    formatted_message = {
-                        "role": "assistant" if message_data["message_type"] in ["peter", "brian", "stewie"] else "user",
-                        "content": message_data["content"],
-                        "character": message_data["message_type"] if message_data["message_type"] in ["peter", "brian", "stewie"] else "user",
-                        "timestamp": message_data["timestamp"]
-                    }
-                    messages.append(formatted_message)
-                except (json.JSONDecodeError, KeyError) as e:
+                    # Convert to the shared message schema used by the router and LLM service
+                    messages.append(from_stored_record(message_data))
+                except (json.JSONDecodeError, KeyError, MessageFormatError) as e:
                     print(f"⚠️ Brian Discord: Skipping malformed message in history: {e}")
                     continue
             
@@ -567,7 +574,8 @@ def health_check():
         return jsonify({
             "status": health_status,
             "service": "Brian_Discord_Handler",
-            **status
+            **status,
+            "http_clients": get_client_stats()
         }), 200
     except Exception as e:
         return jsonify({
@@ -645,8 +653,8 @@ def send_organic_message():
                 }
                 
                 # Send notification to message router for continued organic analysis
-                response = requests.post(
-                    f"{MESSAGE_ROUTER_URL}/organic-notification",
+                response = message_router_client.post(
+                    "/organic-notification",
                     json=notification_data,
                     timeout=5
                 )
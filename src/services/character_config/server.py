@@ -1,4 +1,8 @@
 import os
+import json
+import hashlib
+import threading
+import time
 import traceback
 from dotenv import load_dotenv
 from flask import Flask, request, jsonify
@@ -6,6 +10,8 @@ from datetime import datetime
 from typing import Dict, Any
 
 from src.shared.cache import get_cache
+from src.shared.service_client import get_client, get_client_stats
+from src.shared.tracing import init_tracing
 
 # Load environment variables
 load_dotenv()
@@ -13,8 +19,17 @@ load_dotenv()
 # --- Service Configuration ---
 CHARACTER_CONFIG_PORT = int(os.getenv("CHARACTER_CONFIG_PORT", "6006"))
 
+# Cached LLM responses are invalidated through the LLM service when a character's config changes
+LLM_SERVICE_URL = os.getenv("LLM_SERVICE_URL", "http://llm-service:6001")
+LLM_CACHE_NOTIFY_ATTEMPTS = int(os.getenv("LLM_CACHE_NOTIFY_ATTEMPTS", "5"))
+LLM_CACHE_NOTIFY_RETRY_SECONDS = float(os.getenv("LLM_CACHE_NOTIFY_RETRY_SECONDS", "10"))
+
+# Generation stops as soon as the model starts writing another speaker's line
+CHARACTER_STOP_SEQUENCES = ["\nPeter:", "\nBrian:", "\nStewie:", "\nLois:", "\nMeg:", "\nChris:"]
+
 # --- Flask App ---
 app = Flask(__name__)
+init_tracing(app, "character-config")
 
 class CharacterConfigManager:
     """
@@ -35,6 +50,9 @@ class CharacterConfigManager:
         }
         
         print(f"🎭 Character Config Manager initialized with {len(self.characters)} characters")
+        
+        # Drop cached configs and LLM responses built from a previous version of a character
+        self.sync_config_versions()
     
     def _get_peter_config(self) -> Dict[str, Any]:
         """Get Peter Griffin's complete character configuration."""
@@ -77,10 +95,16 @@ Just talk normally. No theater directions.
             # LLM SETTINGS FOR ORCHESTRATOR
             "llm_settings": {
                 "temperature": 0.9,
-                "max_tokens": 200,  # Increased for natural responses - Discord limit handled by quality control
+                "max_tokens": 60,  # ~25 words plus headroom - longer replies are cut off instead of generated and rejected
                 "top_p": 0.9,
                 "frequency_penalty": 0.1,
-                "presence_penalty": 0.1
+                "presence_penalty": 0.1,
+                "stop": CHARACTER_STOP_SEQUENCES,
+                # Per-message-type overrides applied by the LLM service
+                "message_type_budgets": {
+                    "organic_response": {"max_tokens": 50},
+                    "fallback": {"max_tokens": 40}
+                }
             },
             
             "family_relationships": {
@@ -234,10 +258,15 @@ Just talk normally. No theater directions.
             # LLM SETTINGS FOR ORCHESTRATOR
             "llm_settings": {
                 "temperature": 0.9,
-                "max_tokens": 200,  # Increased for natural responses - Discord limit handled by quality control
+                "max_tokens": 70,  # ~30 words plus headroom
                 "top_p": 0.9,
                 "frequency_penalty": 0.1,
-                "presence_penalty": 0.1
+                "presence_penalty": 0.1,
+                "stop": CHARACTER_STOP_SEQUENCES,
+                "message_type_budgets": {
+                    "organic_response": {"max_tokens": 55},
+                    "fallback": {"max_tokens": 45}
+                }
             },
             
             "family_relationships": {
@@ -420,10 +449,15 @@ Just talk normally. No theater directions.
             # LLM SETTINGS FOR ORCHESTRATOR
             "llm_settings": {
                 "temperature": 0.9,
-                "max_tokens": 200,  # Increased for natural responses - Discord limit handled by quality control
+                "max_tokens": 80,  # ~35 words plus headroom
                 "top_p": 0.9,
                 "frequency_penalty": 0.1,
-                "presence_penalty": 0.1
+                "presence_penalty": 0.1,
+                "stop": CHARACTER_STOP_SEQUENCES,
+                "message_type_budgets": {
+                    "organic_response": {"max_tokens": 60},
+                    "fallback": {"max_tokens": 50}
+                }
             },
             
             "family_relationships": {
@@ -644,7 +678,7 @@ Just talk normally. No theater directions.
     
     def invalidate_cache(self, character_name: str = None):
         """
-        Invalidate character configuration cache.
+        Invalidate character configuration cache and the LLM responses generated from it.
         
         Args:
             character_name: Specific character to invalidate, or None for all
@@ -660,6 +694,60 @@ Just talk normally. No theater directions.
                 print(f"🗑️ Character Config: Invalidated all character caches")
         except Exception as e:
             print(f"❌ Character Config: Error invalidating cache: {e}")
+        
+        self.notify_llm_service(character_name)
+    
+    @staticmethod
+    def _config_fingerprint(config: Dict[str, Any]) -> str:
+        """Hash of everything in a character's configuration."""
+        return hashlib.md5(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+    
+    def sync_config_versions(self) -> list:
+        """
+        Invalidate every character whose configuration changed since the last start.
+        
+        Returns:
+            Names of the characters that were invalidated
+        """
+        changed = []
+        for name, config in self.characters.items():
+            fingerprint = self._config_fingerprint(config)
+            if self.config_cache.get(f"fingerprint:{name}") != fingerprint:
+                changed.append(name)
+                self.invalidate_cache(name)
+                self.config_cache.set(f"fingerprint:{name}", fingerprint)
+        
+        if changed:
+            print(f"🔄 Character Config: Configuration changed for {', '.join(changed)}")
+        return changed
+    
+    def notify_llm_service(self, character_name: str = None):
+        """
+        Ask the LLM service to drop cached responses for a character (or all) in the background.
+        Retries while the LLM service is unreachable, e.g. when both services start together.
+        """
+        def notify():
+            for attempt in range(1, LLM_CACHE_NOTIFY_ATTEMPTS + 1):
+                try:
+                    response = get_client(LLM_SERVICE_URL, name="llm-service").post(
+                        "/cache/clear",
+                        json={"character": character_name} if character_name else {},
+                        timeout=5,
+                        retries=0
+                    )
+                    if 400 <= response.status_code < 500:
+                        print(f"❌ Character Config: LLM service rejected cache clear for {character_name}: {response.text}")
+                        return
+                    response.raise_for_status()
+                    print(f"🗑️ Character Config: LLM response cache cleared for {character_name or 'all characters'}")
+                    return
+                except Exception as e:
+                    if attempt == LLM_CACHE_NOTIFY_ATTEMPTS:
+                        print(f"❌ Character Config: Could not clear LLM response cache for {character_name or 'all characters'}: {e}")
+                        return
+                    time.sleep(LLM_CACHE_NOTIFY_RETRY_SECONDS)
+        
+        threading.Thread(target=notify, name="llm-cache-invalidation", daemon=True).start()
 
 # Global character config manager
 character_config_manager = CharacterConfigManager()
@@ -675,7 +763,8 @@ def health_check():
         "total_characters": len(character_config_manager.characters),
         "timestamp": datetime.now().isoformat(),
         "note": "Character responses generated by centralized orchestrator LLM",
-        "cache_available": character_config_manager.config_cache is not None
+        "cache_available": character_config_manager.config_cache is not None,
+        "http_clients": get_client_stats()
     }), 200
 
 # --- Character Configuration Endpoints ---
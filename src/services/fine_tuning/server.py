@@ -12,7 +12,11 @@ import aiohttp
 import os
 import requests
 
+from shared.service_client import get_client, get_client_stats
+from shared.tracing import init_tracing
+
 app = Flask(__name__)
+init_tracing(app, "fine-tuning")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -20,6 +24,10 @@ logger = logging.getLogger(__name__)
 CHARACTER_CONFIG_URL = os.getenv("CHARACTER_CONFIG_API_URL", "http://character-config:6006")
 RAG_RETRIEVER_URL = os.getenv("RAG_RETRIEVER_URL", "http://rag-retriever:6007")
 
+# Pooled keep-alive clients, one per target service
+character_config_client = get_client(CHARACTER_CONFIG_URL, name="character-config")
+rag_client = get_client(RAG_RETRIEVER_URL, name="rag-retriever")
+
 class FineTuningService:
     def __init__(self):
         # A/B Testing Framework
@@ -65,7 +73,7 @@ class FineTuningService:
         
         try:
             # Fetch from character-config service using the correct endpoint
-            response = requests.get(f"{CHARACTER_CONFIG_URL}/llm_prompt/{character}", timeout=10)
+            response = character_config_client.get(f"/llm_prompt/{character}", timeout=10)
             if response.status_code == 200:
                 config_data = response.json()
                 # Cache the result
@@ -139,8 +147,8 @@ class FineTuningService:
             if character in ['peter', 'brian', 'stewie']:
                 rag_payload["character_filter"] = character
             
-            response = requests.post(
-                f"{RAG_RETRIEVER_URL}/retrieve",
+            response = rag_client.post(
+                "/retrieve",
                 json=rag_payload,
                 timeout=6,
                 headers={
@@ -1241,8 +1249,8 @@ class FineTuningService:
             rag_query = " ".join(query_parts[:5])  # Limit to avoid too long queries
             
             # Make request to RAG retriever with enhanced context
-            response = requests.post(
-                f"{RAG_RETRIEVER_URL}/retrieve",
+            response = rag_client.post(
+                "/retrieve",
                 json={
                     "query": rag_query, 
                     "num_results": 3,
@@ -1337,7 +1345,8 @@ def health_check():
         'status': 'healthy',
         'service': 'fine-tuning',
         'timestamp': datetime.now().isoformat(),
-        'version': '1.0.0'
+        'version': '1.0.0',
+        'http_clients': get_client_stats()
     })
 
 @app.route('/optimize-prompt', methods=['POST'])
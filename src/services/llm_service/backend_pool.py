@@ -0,0 +1,211 @@
+"""
+Pool of Ollama backends for the LLM service.
+Each generation is routed to the healthy backend with the fewest in-flight requests;
+failing backends are ejected for a cool-down period and re-admitted once they recover.
+"""
+
+import re
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+import requests
+
+# langchain's Ollama client reports non-200 answers as a ValueError carrying the status code
+_OLLAMA_SERVER_ERROR = re.compile(r"status code 5\d\d")
+
+
+def is_backend_error(error: Exception) -> bool:
+    """Whether an exception says something about the backend: connection failures, timeouts or 5xx answers."""
+    if isinstance(error, (requests.exceptions.RequestException, ConnectionError, TimeoutError)):
+        return True
+    return bool(_OLLAMA_SERVER_ERROR.search(str(error)))
+
+
+class OllamaBackend:
+    """One Ollama instance and its load, health and latency state."""
+    
+    def __init__(self, base_url: str, llm: Any, latency_window: int = 200):
+        self.base_url = base_url
+        self.llm = llm
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejected_until = 0.0
+        self.ejections = 0
+        self.last_error = None
+        self.latencies_ms = deque(maxlen=latency_window)
+        self.max_latency_ms = 0.0
+    
+    def is_ejected(self, now: float) -> bool:
+        """Whether the backend is still in its ejection cool-down."""
+        return now < self.ejected_until
+
+
+class BackendPool:
+    """
+    Least-outstanding-requests routing across Ollama backends.
+    
+    A backend is ejected after failure_threshold consecutive failed generations or a
+    failed health probe. Only backend errors count as failed generations; other
+    exceptions raised while a backend is leased (e.g. prompt validation) do not. Once its ejection period lapses it is eligible again; a
+    successful generation or probe fully re-admits it, while another failure ejects
+    it again straight away.
+    """
+    
+    def __init__(self, base_urls: List[str], client_factory: Callable[[str], Any], failure_threshold: int = 3, ejection_seconds: float = 30.0, is_backend_error: Callable[[Exception], bool] = is_backend_error):
+        """
+        Initialize the pool.
+        
+        Args:
+            base_urls: Ollama base URLs
+            client_factory: Builds the LLM client for a base URL
+            failure_threshold: Consecutive failures before a backend is ejected
+            ejection_seconds: How long an ejected backend receives no traffic
+            is_backend_error: Decides whether an exception raised during a lease counts against the backend
+        """
+        if not base_urls:
+            raise ValueError("BackendPool requires at least one Ollama base URL")
+        
+        self.backends = [OllamaBackend(url, client_factory(url)) for url in base_urls]
+        self.failure_threshold = failure_threshold
+        self.ejection_seconds = ejection_seconds
+        self.is_backend_error = is_backend_error
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> OllamaBackend:
+        """
+        Pick a backend and count the request as in flight.
+        
+        If every backend is ejected the one closest to re-admission is used, so
+        requests are attempted rather than failed outright.
+        """
+        with self._lock:
+            now = time.time()
+            candidates = [b for b in self.backends if not b.is_ejected(now)]
+            if not candidates:
+                candidates = [min(self.backends, key=lambda b: b.ejected_until)]
+            
+            backend = min(candidates, key=lambda b: (b.in_flight, b.requests))
+            backend.in_flight += 1
+            backend.requests += 1
+            return backend
+    
+    def release(self, backend: OllamaBackend, latency_ms: Optional[float] = None, error: Optional[Exception] = None, counted: bool = True):
+        """
+        Finish a request on a backend, recording its latency or failure.
+        
+        With counted=False the request is released without recording any outcome.
+        """
+        with self._lock:
+            backend.in_flight -= 1
+            if not counted:
+                return
+            if error is None:
+                if latency_ms is not None:
+                    backend.latencies_ms.append(latency_ms)
+                    backend.max_latency_ms = max(backend.max_latency_ms, latency_ms)
+                self._readmit(backend)
+            else:
+                backend.failures += 1
+                backend.consecutive_failures += 1
+                backend.last_error = str(error)
+                if backend.consecutive_failures >= self.failure_threshold:
+                    self._eject(backend)
+    
+    @contextmanager
+    def lease(self):
+        """
+        Hold a backend for the duration of the block and record the outcome.
+        
+        Exceptions that are not backend errors release the backend without penalty.
+        """
+        backend = self.acquire()
+        started = time.time()
+        error = None
+        try:
+            yield backend
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            counted = error is None or self.is_backend_error(error)
+            self.release(backend, latency_ms=(time.time() - started) * 1000, error=error, counted=counted)
+    
+    def probe(self, check: Callable[[str], Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Health-check every backend and eject or re-admit each accordingly.
+        
+        Args:
+            check: Called with a base URL; returns a dict with a "healthy" key or raises
+        
+        Returns:
+            Aggregate result: healthy if any backend is, with per-backend results
+        """
+        results = {}
+        for backend in self.backends:
+            started = time.time()
+            try:
+                result = dict(check(backend.base_url))
+            except Exception as e:
+                result = {"healthy": False, "error": str(e)}
+            result["latency_ms"] = round((time.time() - started) * 1000, 2)
+            
+            with self._lock:
+                if result["healthy"]:
+                    self._readmit(backend)
+                else:
+                    backend.last_error = result.get("error")
+                    self._eject(backend)
+            results[backend.base_url] = result
+        
+        healthy = [r for r in results.values() if r["healthy"]]
+        return {
+            "healthy": bool(healthy),
+            "model_available": any(r.get("model_available", False) for r in healthy),
+            "version": next((r.get("version") for r in healthy if r.get("version")), None),
+            "healthy_backends": len(healthy),
+            "total_backends": len(self.backends),
+            "backends": results
+        }
+    
+    def _eject(self, backend: OllamaBackend):
+        """Stop routing to a backend for the ejection period (caller holds the lock)."""
+        if not backend.is_ejected(time.time()):
+            backend.ejections += 1
+        backend.ejected_until = time.time() + self.ejection_seconds
+    
+    def _readmit(self, backend: OllamaBackend):
+        """Return a backend to normal rotation (caller holds the lock)."""
+        backend.consecutive_failures = 0
+        backend.ejected_until = 0.0
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-backend load, health and latency statistics."""
+        with self._lock:
+            now = time.time()
+            backends = {}
+            for backend in self.backends:
+                latencies = sorted(backend.latencies_ms)
+                backends[backend.base_url] = {
+                    "ejected": backend.is_ejected(now),
+                    "ejected_for_seconds": round(max(backend.ejected_until - now, 0.0), 2),
+                    "in_flight": backend.in_flight,
+                    "requests": backend.requests,
+                    "failures": backend.failures,
+                    "consecutive_failures": backend.consecutive_failures,
+                    "ejections": backend.ejections,
+                    "last_error": backend.last_error,
+                    "avg_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+                    "p95_latency_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 2) if latencies else 0.0,
+                    "max_latency_ms": round(backend.max_latency_ms, 2)
+                }
+            
+            return {
+                "total_backends": len(self.backends),
+                "available_backends": sum(1 for b in self.backends if not b.is_ejected(now)),
+                "backends": backends
+            }
@@ -0,0 +1,108 @@
+"""
+Candidate scoring for best-of-N generation.
+A scorer takes the generated candidates plus caller context and returns one
+{"score", "passed", "details"} dict per candidate, in the same order.
+"""
+
+import re
+from typing import Any, Callable, Dict, List
+
+from src.shared.service_client import get_client
+
+Scorer = Callable[[List[str], Dict[str, Any]], List[Dict[str, Any]]]
+
+# Lines that look like the model continuing the transcript as another speaker
+ROLE_MARKER_PATTERN = re.compile(r"^\s*(user|human|assistant|ai|system|peter|brian|stewie|lois|meg|chris)\s*:", re.IGNORECASE | re.MULTILINE)
+STAGE_DIRECTION_PATTERN = re.compile(r"\*[^*]+\*|\([^)]*\)")
+
+
+def heuristic_scorer(candidates: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Score candidates locally without calling another service.
+    
+    Context keys (all optional):
+        context: Previous message, used to penalize parroting it back
+        max_words: Soft length limit for the reply
+        threshold: Minimum score to pass (default 60)
+    """
+    previous_words = set(str(context.get("context", "")).lower().split())
+    max_words = context.get("max_words")
+    threshold = context.get("threshold", 60)
+    
+    results = []
+    for candidate in candidates:
+        text = (candidate or "").strip()
+        words = text.split()
+        issues = []
+        score = 100.0
+        
+        if not words:
+            results.append({"score": 0.0, "passed": False, "details": {"issues": ["empty response"]}})
+            continue
+        
+        if ROLE_MARKER_PATTERN.search(text):
+            score -= 40
+            issues.append("speaks as another participant")
+        if STAGE_DIRECTION_PATTERN.search(text):
+            score -= 20
+            issues.append("stage directions")
+        if len(words) < 3:
+            score -= 20
+            issues.append("too short")
+        if max_words and len(words) > max_words:
+            score -= min(30, (len(words) - max_words) * 2)
+            issues.append("too long")
+        if text.count("\n") >= 2:
+            score -= 10
+            issues.append("multi-paragraph")
+        if previous_words:
+            candidate_words = set(w.lower() for w in words)
+            overlap = len(previous_words & candidate_words) / len(candidate_words)
+            if overlap > 0.6:
+                score -= 30
+                issues.append("repeats previous message")
+        
+        score = max(score, 0.0)
+        results.append({"score": score, "passed": score >= threshold, "details": {"issues": issues}})
+    
+    return results
+
+
+class QualityControlScorer:
+    """Scores candidates with the quality control service's /analyze/batch endpoint."""
+    
+    def __init__(self, base_url: str, timeout: float = 15.0):
+        self.base_url = base_url
+        self.timeout = timeout
+    
+    def __call__(self, candidates: List[str], context: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Context is passed through as the /analyze fields (character, conversation_id,
+        context, last_speaker, message_type); the winning candidate is recorded in
+        the conversation history by the quality control service.
+        """
+        response = get_client(self.base_url, name="quality-control").post(
+            "/analyze/batch",
+            json={**context, "responses": candidates, "record_best": True},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        
+        return [
+            {
+                "score": analysis.get("overall_score", 0.0),
+                "passed": analysis.get("quality_check_passed", False),
+                "details": {
+                    "issues": analysis.get("conversation_flow", {}).get("issues", []),
+                    "violations": analysis.get("character_analysis", {}).get("violations", [])
+                }
+            }
+            for analysis in response.json()["analyses"]
+        ]
+
+
+def select_best(candidates: List[str], scores: List[Dict[str, Any]]) -> int:
+    """Index of the highest-scoring passing candidate, or the highest-scoring one if none passed."""
+    indices = range(len(candidates))
+    passing = [i for i in indices if scores[i]["passed"]]
+    return max(passing or indices, key=lambda i: scores[i]["score"])
@@ -0,0 +1,38 @@
+"""
+Background health probing for the LLM service.
+Dependencies are checked on a timer with lightweight calls and the result is kept as a
+snapshot, so /health and /metrics never trigger a model generation. The probe itself
+lives in src/shared/health_probe.py; this module adds the Ollama check.
+"""
+
+from typing import Any, Dict, Optional
+
+from src.shared.health_probe import HealthProbe, check_cache
+from src.shared.service_client import get_client
+
+
+def check_ollama(base_url: str, model: str, timeout: float = 3.0, tier_models: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """
+    Check Ollama reachability and whether the configured model is pulled.
+    
+    Uses /api/version and /api/tags, neither of which loads the model. When
+    tier_models is given, each tier's model is checked as well.
+    """
+    # Probes report the state as it is, so they are never retried
+    client = get_client(base_url)
+    version_response = client.get("/api/version", timeout=timeout, retries=0)
+    version_response.raise_for_status()
+    
+    tags_response = client.get("/api/tags", timeout=timeout, retries=0)
+    tags_response.raise_for_status()
+    available_models = [m.get("name") for m in tags_response.json().get("models", [])]
+    
+    result = {
+        "healthy": True,
+        "version": version_response.json().get("version"),
+        "model": model,
+        "model_available": model in available_models
+    }
+    if tier_models:
+        result["tiers"] = {tier: tier_model in available_models for tier, tier_model in tier_models.items()}
+    return result
@@ -0,0 +1,150 @@
+"""
+Prompt token budgeting for the LLM service.
+Keeps the system prompt, its CONTEXT ENHANCEMENTS block and the chat history inside a
+token budget, so prompt-eval time stays bounded however busy a channel gets.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+ENHANCEMENTS_HEADER = "\n\nCONTEXT ENHANCEMENTS:\n"
+
+# Rough characters-per-token ratio for Llama-family tokenizers on English chat text
+CHARS_PER_TOKEN = 4
+# Chat template tokens added around every message (role header and end-of-turn)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+# Lower values are kept longer; unlisted enhancements get DEFAULT_ENHANCEMENT_PRIORITY.
+# Retry guidance addresses a reply that was just rejected, so it goes last; bulky
+# retrieved examples and variety hints go first.
+ENHANCEMENT_PRIORITIES = {
+    "RETRY OPTIMIZATION": 0,
+    "RESPONDING TO": 1,
+    "RELEVANT CONTEXT": 3,
+    "CONVERSATION VARIETY": 3,
+    "CONVERSATION FLOW": 3
+}
+DEFAULT_ENHANCEMENT_PRIORITY = 2
+
+
+def estimate_tokens(text: Optional[str]) -> int:
+    """Estimate the token count of a piece of text."""
+    return math.ceil(len(text or "") / CHARS_PER_TOKEN)
+
+
+def _message_tokens(message: Any) -> int:
+    """Estimate the tokens a chat message adds to the prompt, including template overhead."""
+    content = message.content if hasattr(message, "content") else str(message)
+    return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+
+def split_enhancements(prompt: str) -> Tuple[str, List[str]]:
+    """
+    Split a prompt into its base text and CONTEXT ENHANCEMENTS bullets.
+    
+    Returns:
+        Tuple of (base prompt, enhancement texts without the "- " prefix)
+    """
+    base, header, block = prompt.partition(ENHANCEMENTS_HEADER)
+    if not header:
+        return prompt, []
+    
+    enhancements = []
+    for line in block.split("\n"):
+        if line.startswith("- "):
+            enhancements.append(line[2:])
+        elif enhancements:
+            # Continuation of a multi-line enhancement
+            enhancements[-1] += "\n" + line
+    return base, enhancements
+
+
+def join_enhancements(base: str, enhancements: List[str]) -> str:
+    """Rebuild a prompt from its base text and remaining enhancements."""
+    if not enhancements:
+        return base
+    return base + ENHANCEMENTS_HEADER + "\n".join(f"- {enhancement}" for enhancement in enhancements)
+
+
+def enhancement_priority(enhancement: str) -> int:
+    """Priority of an enhancement from its label, e.g. "RETRY OPTIMIZATION: ..."."""
+    label = enhancement.split(":", 1)[0].strip().upper()
+    for prefix, priority in ENHANCEMENT_PRIORITIES.items():
+        if label.startswith(prefix):
+            return priority
+    return DEFAULT_ENHANCEMENT_PRIORITY
+
+
+def _enhancement_label(enhancement: str) -> str:
+    """Short name for an enhancement in trim reports."""
+    label, separator, _ = enhancement.partition(":")
+    return label.strip() if separator and len(label) <= 40 else enhancement[:40]
+
+
+def fit_prompt(prompt: str, user_message: Optional[str], chat_history: Optional[list], budget: int, min_history: int = 4, reserved_tokens: int = 0) -> Tuple[str, list, Dict[str, Any]]:
+    """
+    Trim a prompt and its history to fit a token budget.
+    
+    History is trimmed oldest-first down to min_history messages, then enhancements
+    are dropped lowest-priority first (later ones first among equals), then the
+    remaining history goes. The base prompt and user message are never trimmed, so
+    the result can still exceed the budget; the report says so.
+    
+    Args:
+        prompt: System prompt, optionally ending in a CONTEXT ENHANCEMENTS block
+        user_message: Current user message
+        chat_history: Message objects (anything with .content), oldest first
+        budget: Maximum estimated prompt tokens
+        min_history: Most recent messages kept until enhancements have been cut
+        reserved_tokens: Tokens the caller adds to the prompt afterwards
+    
+    Returns:
+        Tuple of (prompt, history, report)
+    """
+    history = list(chat_history or [])
+    base, enhancements = split_enhancements(prompt)
+    
+    fixed_tokens = estimate_tokens(base) + MESSAGE_OVERHEAD_TOKENS + reserved_tokens
+    if user_message:
+        fixed_tokens += _message_tokens(user_message)
+    enhancement_tokens = [estimate_tokens(f"- {e}\n") for e in enhancements]
+    history_tokens = [_message_tokens(m) for m in history]
+    
+    def total() -> int:
+        header_tokens = estimate_tokens(ENHANCEMENTS_HEADER) if kept else 0
+        return fixed_tokens + header_tokens + sum(enhancement_tokens[i] for i in kept) + sum(history_tokens[len(history_tokens) - len(history):])
+    
+    kept = list(range(len(enhancements)))
+    original_tokens = total()
+    history_dropped = 0
+    
+    while total() > budget and len(history) > min_history:
+        history.pop(0)
+        history_dropped += 1
+    
+    dropped_enhancements = []
+    drop_order = sorted(kept, key=lambda i: (enhancement_priority(enhancements[i]), i), reverse=True)
+    for index in drop_order:
+        if total() <= budget:
+            break
+        kept.remove(index)
+        dropped_enhancements.append(_enhancement_label(enhancements[index]))
+    
+    while total() > budget and history:
+        history.pop(0)
+        history_dropped += 1
+    
+    final_tokens = total()
+    report = {
+        "budget": budget,
+        "original_tokens": original_tokens,
+        "estimated_tokens": final_tokens,
+        "trimmed": bool(history_dropped or dropped_enhancements),
+        "history_messages_dropped": history_dropped,
+        "enhancements_dropped": dropped_enhancements,
+        "over_budget": final_tokens > budget
+    }
+    
+    if not dropped_enhancements:
+        return prompt, history, report
+    return join_enhancements(base, [enhancements[i] for i in kept]), history, report
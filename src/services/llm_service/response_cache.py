@@ -0,0 +1,240 @@
+"""
+Two-tier response cache for the LLM service.
+An in-process LRU (L1) sits in front of KeyDB (L2). L1 entries never outlive the
+L2 entry they were read from, and namespace invalidations are broadcast over
+KeyDB pub/sub so every worker drops its stale L1 entries and namespace versions.
+"""
+
+import re
+import json
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU bounded by entry count and approximate size in bytes, with per-entry expiry."""
+    
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+    
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a key, returning (found, value)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            value, size, expires_at = entry
+            if time.time() >= expires_at:
+                self._remove(key)
+                self.expirations += 1
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+    
+    def put(self, key: str, value: Any, ttl: float):
+        """Store a value for ttl seconds, evicting least recently used entries to fit."""
+        size = len(json.dumps(value).encode("utf-8")) + len(key)
+        if ttl <= 0 or size > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, size, time.time() + ttl)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+    
+    def discard_matching(self, predicate: Callable[[str], bool]) -> int:
+        """Drop every entry whose key matches the predicate."""
+        with self._lock:
+            stale = [key for key in self._entries if predicate(key)]
+            for key in stale:
+                self._remove(key)
+            return len(stale)
+    
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+    
+    def _remove(self, key: str):
+        """Remove an entry (caller holds the lock)."""
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get size and eviction statistics."""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+
+class TieredResponseCache:
+    """
+    L1/L2 response cache over a BotCache with namespace-versioned keys.
+    
+    Namespace versions are kept locally while the pub/sub subscription is up, so
+    an L1 hit costs no KeyDB round trip; without it they are read from L2 on each
+    key build. Without KeyDB (in-memory BotCache) the L2 is per process anyway.
+    """
+    
+    def __init__(self, l2, max_entries: int = 2048, max_bytes: int = 32 * 1024 * 1024, l1_ttl: float = 300.0, channel: str = "invalidations"):
+        """
+        Initialize the cache.
+        
+        Args:
+            l2: BotCache used as L2 and for namespace versions and pub/sub
+            max_entries: L1 entry limit (0 disables L1)
+            max_bytes: L1 size limit in bytes
+            l1_ttl: Maximum seconds an entry stays in L1
+            channel: Pub/sub channel for invalidations
+        """
+        self.l2 = l2
+        self.l1 = LRUCache(max_entries, max_bytes)
+        self.l1_ttl = l1_ttl
+        self.channel = channel
+        
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+        self._coherent = threading.Event()
+        self._stats = {
+            tier: {"hits": 0, "misses": 0, "lookups": 0, "total_ms": 0.0, "max_ms": 0.0}
+            for tier in ("l1", "l2")
+        }
+        self._invalidations = {"published": 0, "received": 0, "l1_entries_dropped": 0}
+        
+        self.pubsub_enabled = self.l2.subscribe(channel, self._on_invalidation, self._on_subscription)
+    
+    def _on_subscription(self, subscribed: bool):
+        """Trust local namespace versions only while subscribed; anything may have been missed before."""
+        with self._lock:
+            self._versions.clear()
+        if subscribed:
+            self._coherent.set()
+        else:
+            self._coherent.clear()
+            self.l1.clear()
+    
+    def _on_invalidation(self, message: Dict[str, Any]):
+        """Apply an invalidation published by any worker (including this one)."""
+        with self._lock:
+            self._invalidations["received"] += 1
+        self._apply(message["namespace"], int(message["version"]))
+    
+    def _apply(self, namespace: str, version: int):
+        """Advance a namespace's local version and drop L1 entries built under older versions."""
+        with self._lock:
+            if self._coherent.is_set():
+                self._versions[namespace] = max(self._versions.get(namespace, 0), version)
+        
+        tag = re.compile(rf"(?:^|:){re.escape(namespace)}\.v(\d+):")
+        
+        def is_stale(key: str) -> bool:
+            match = tag.search(key)
+            return bool(match) and int(match.group(1)) < version
+        
+        dropped = self.l1.discard_matching(is_stale)
+        with self._lock:
+            self._invalidations["l1_entries_dropped"] += dropped
+    
+    def key(self, key: str, *namespaces: str) -> str:
+        """Build the versioned key for a response, from local versions when they are trusted."""
+        if self._coherent.is_set():
+            with self._lock:
+                versions = [self._versions.get(namespace) for namespace in namespaces]
+            if None not in versions:
+                return self.l2.versioned_key(key, *namespaces, versions=versions)
+        
+        versions = self.l2.namespace_versions(*namespaces)
+        if self._coherent.is_set():
+            with self._lock:
+                for namespace, version in zip(namespaces, versions):
+                    self._versions[namespace] = max(self._versions.get(namespace, 0), version)
+        return self.l2.versioned_key(key, *namespaces, versions=versions)
+    
+    def _record(self, tier: str, hit: bool, started: float):
+        """Count a lookup on one tier."""
+        elapsed_ms = (time.time() - started) * 1000
+        with self._lock:
+            stats = self._stats[tier]
+            stats["hits" if hit else "misses"] += 1
+            stats["lookups"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+    
+    def get(self, key: str) -> Optional[Any]:
+        """Read from L1, then L2; L2 hits are copied into L1 for at most their remaining TTL."""
+        started = time.time()
+        found, value = self.l1.get(key)
+        self._record("l1", found, started)
+        if found:
+            return value
+        
+        started = time.time()
+        value, remaining = self.l2.get_with_ttl(key)
+        self._record("l2", value is not None, started)
+        if value is not None:
+            self.l1.put(key, value, min(self.l1_ttl, remaining) if remaining else self.l1_ttl)
+        return value
+    
+    def set(self, key: str, value: Any, ttl: int):
+        """Write to L2 and L1."""
+        self.l2.set(key, value, ttl=ttl)
+        self.l1.put(key, value, min(self.l1_ttl, ttl))
+    
+    def invalidate(self, namespace: str) -> Optional[int]:
+        """
+        Bump a namespace in L2 and tell every worker.
+        
+        Returns:
+            The new version, or None if the bump failed
+        """
+        version = self.l2.bump_namespace(namespace)
+        if version is None:
+            return None
+        self._apply(namespace, version)
+        if self.l2.publish(self.channel, {"namespace": namespace, "version": version}):
+            with self._lock:
+                self._invalidations["published"] += 1
+        return version
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier hit, miss and latency figures plus L1 size and invalidation counts."""
+        with self._lock:
+            tiers = {
+                tier: {
+                    "hits": stats["hits"],
+                    "misses": stats["misses"],
+                    "hit_rate": round(stats["hits"] / max(stats["lookups"], 1) * 100, 2),
+                    "avg_latency_ms": round(stats["total_ms"] / max(stats["lookups"], 1), 3),
+                    "max_latency_ms": round(stats["max_ms"], 3)
+                }
+                for tier, stats in self._stats.items()
+            }
+            invalidations = dict(self._invalidations)
+            versions = dict(self._versions)
+        
+        tiers["l1"].update(self.l1.get_stats())
+        tiers["l1"]["ttl_seconds"] = self.l1_ttl
+        return {
+            **tiers,
+            "coherent": self._coherent.is_set() if self.pubsub_enabled else None,
+            "namespace_versions": versions,
+            "invalidations": invalidations
+        }
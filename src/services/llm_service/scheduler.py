@@ -0,0 +1,201 @@
+"""
+Priority scheduler for generations sent to Ollama.
+Bounds concurrency to the model and admits queued work by priority class, shedding
+low-priority requests first when the queue is full.
+"""
+
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Optional
+
+# Lower value = higher priority
+PRIORITY_CLASSES = {
+    "interactive": 0,   # Direct replies to a user mention
+    "organic": 1,       # Organic follow-ups between characters
+    "analysis": 2,      # Continuation / opportunity analysis prompts
+    "background": 3     # Fallback messages and other best-effort work
+}
+
+DEFAULT_PRIORITY = "interactive"
+
+
+class SchedulerRejected(Exception):
+    """Raised when a request is shed or times out waiting for a slot."""
+    
+    def __init__(self, priority: str, reason: str):
+        self.priority = priority
+        self.reason = reason
+        super().__init__(f"Request with priority '{priority}' rejected: {reason}")
+
+
+class _Waiter:
+    """A request queued for a generation slot."""
+    
+    def __init__(self, priority: str, rank: int, seq: int):
+        self.priority = priority
+        self.rank = rank
+        self.seq = seq
+        self.enqueued_at = time.time()
+        self.granted = False
+        self.shed = False
+    
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.rank, self.seq) < (other.rank, other.seq)
+
+
+class PriorityScheduler:
+    """
+    Admission control in front of Ollama.
+    
+    At most max_concurrency generations run at once. Further requests wait in a
+    priority queue; when the queue is full, the newest lowest-priority waiter is
+    shed to make room for higher-priority work, or the incoming request is shed
+    if nothing queued ranks below it.
+    """
+    
+    def __init__(self, max_concurrency: int = 2, max_queue_depth: int = 32, max_wait: Optional[Dict[str, float]] = None):
+        """
+        Initialize the scheduler.
+        
+        Args:
+            max_concurrency: Maximum concurrent generations
+            max_queue_depth: Maximum queued requests across all classes
+            max_wait: Per-class maximum seconds to wait for a slot
+        """
+        self.max_concurrency = max_concurrency
+        self.max_queue_depth = max_queue_depth
+        self.max_wait = {priority: 60.0 for priority in PRIORITY_CLASSES}
+        self.max_wait.update(max_wait or {})
+        
+        self._cond = threading.Condition()
+        self._queue = []
+        self._seq = itertools.count()
+        self.active = 0
+        
+        self.stats = {
+            priority: {
+                "admitted": 0,
+                "shed": 0,
+                "timed_out": 0,
+                "total_wait_ms": 0.0,
+                "max_wait_ms": 0.0
+            }
+            for priority in PRIORITY_CLASSES
+        }
+    
+    @staticmethod
+    def normalize_priority(priority: Optional[str]) -> str:
+        """Map an arbitrary priority value onto a known class."""
+        if priority and priority.lower() in PRIORITY_CLASSES:
+            return priority.lower()
+        return DEFAULT_PRIORITY
+    
+    @contextmanager
+    def slot(self, priority: Optional[str] = None):
+        """Hold a generation slot for the duration of the block."""
+        wait_ms = self.acquire(priority)
+        try:
+            yield wait_ms
+        finally:
+            self.release()
+    
+    def acquire(self, priority: Optional[str] = None) -> float:
+        """
+        Wait for a generation slot.
+        
+        Returns:
+            Milliseconds spent waiting for the slot
+        
+        Raises:
+            SchedulerRejected: If the request was shed or waited too long
+        """
+        priority = self.normalize_priority(priority)
+        
+        with self._cond:
+            if self.active < self.max_concurrency and not self._queue:
+                self.active += 1
+                self._record_admission(priority, 0.0)
+                return 0.0
+            
+            waiter = _Waiter(priority, PRIORITY_CLASSES[priority], next(self._seq))
+            
+            if len(self._queue) >= self.max_queue_depth:
+                victim = max(self._queue, key=lambda w: (w.rank, w.seq))
+                if victim.rank <= waiter.rank:
+                    self.stats[priority]["shed"] += 1
+                    raise SchedulerRejected(priority, "queue full")
+                self._queue.remove(victim)
+                heapq.heapify(self._queue)
+                victim.shed = True
+                self.stats[victim.priority]["shed"] += 1
+                self._cond.notify_all()
+            
+            heapq.heappush(self._queue, waiter)
+            self._dispatch()
+            deadline = waiter.enqueued_at + self.max_wait[priority]
+            
+            while not waiter.granted and not waiter.shed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    self._queue.remove(waiter)
+                    heapq.heapify(self._queue)
+                    self.stats[priority]["timed_out"] += 1
+                    raise SchedulerRejected(priority, f"waited more than {self.max_wait[priority]}s")
+                self._cond.wait(remaining)
+            
+            if waiter.shed:
+                raise SchedulerRejected(priority, "shed for higher-priority work")
+            
+            wait_ms = (time.time() - waiter.enqueued_at) * 1000
+            self._record_admission(priority, wait_ms)
+            return wait_ms
+    
+    def release(self):
+        """Release a slot and hand it to the highest-priority waiter."""
+        with self._cond:
+            self.active -= 1
+            self._dispatch()
+    
+    def _dispatch(self):
+        """Grant free slots to queued waiters in priority order (caller holds the lock)."""
+        while self._queue and self.active < self.max_concurrency:
+            waiter = heapq.heappop(self._queue)
+            waiter.granted = True
+            self.active += 1
+        self._cond.notify_all()
+    
+    def _record_admission(self, priority: str, wait_ms: float):
+        """Record an admitted request and its wait time (caller holds the lock)."""
+        stats = self.stats[priority]
+        stats["admitted"] += 1
+        stats["total_wait_ms"] += wait_ms
+        stats["max_wait_ms"] = max(stats["max_wait_ms"], wait_ms)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get concurrency, queue depth and per-class wait statistics."""
+        with self._cond:
+            queued = {priority: 0 for priority in PRIORITY_CLASSES}
+            for waiter in self._queue:
+                queued[waiter.priority] += 1
+            
+            classes = {}
+            for priority, stats in self.stats.items():
+                classes[priority] = {
+                    "queued": queued[priority],
+                    "admitted": stats["admitted"],
+                    "shed": stats["shed"],
+                    "timed_out": stats["timed_out"],
+                    "avg_wait_ms": round(stats["total_wait_ms"] / max(stats["admitted"], 1), 2),
+                    "max_wait_ms": round(stats["max_wait_ms"], 2)
+                }
+            
+            return {
+                "active": self.active,
+                "max_concurrency": self.max_concurrency,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self.max_queue_depth,
+                "classes": classes
+            }
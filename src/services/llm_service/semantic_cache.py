@@ -0,0 +1,200 @@
+"""
+Semantic near-duplicate tier for the LLM response cache.
+Requests whose normalized text embeds close to a recent cached request in the
+same bucket (cache namespace versions, character, message type, model tier and
+output format) reuse that request's cached response instead of generating.
+A sample of would-be hits is audited by generating anyway and comparing the
+two responses, which gives a false-hit rate for tuning the threshold.
+"""
+
+import re
+import time
+import random
+import threading
+import unicodedata
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from src.shared.service_client import get_client
+
+# Discord user, role and channel mentions: <@123>, <@!123>, <@&123>, <#123>
+_MENTION = re.compile(r"<(?:@[!&]?|#)\d+>")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Lowercase, strip mention markup and collapse whitespace."""
+    text = unicodedata.normalize("NFKC", text or "")
+    text = _MENTION.sub(" ", text).lower()
+    return _WHITESPACE.sub(" ", text).strip(" \t\n.!?")
+
+
+def semantic_text(character: Optional[str], text: Optional[str]) -> str:
+    """The text that is embedded for a request."""
+    return f"{(character or 'none').lower()}: {normalize_text(text)}"
+
+
+def ollama_embed(base_url: str, model: str, text: str, timeout: float = 10.0) -> List[float]:
+    """Embed text with an Ollama embedding model."""
+    response = get_client(base_url).post(
+        "/api/embeddings",
+        json={"model": model, "prompt": text},
+        timeout=timeout
+    )
+    response.raise_for_status()
+    return response.json()["embedding"]
+
+
+class SemanticCache:
+    """
+    Per-worker index of recent request embeddings pointing at exact response cache keys.
+    
+    The responses themselves stay in the exact cache; an index entry whose
+    response has expired or been invalidated is dropped when it is next matched.
+    """
+    
+    def __init__(self, embed: Callable[[str], List[float]], threshold: float = 0.95, max_entries: int = 256, ttl: float = 3600.0, audit_rate: float = 0.05, audit_threshold: float = 0.8, near_miss_margin: float = 0.05):
+        """
+        Initialize the semantic cache.
+        
+        Args:
+            embed: Returns the embedding of a text
+            threshold: Minimum cosine similarity for a hit
+            max_entries: Entries kept per bucket (oldest dropped first)
+            ttl: Seconds an entry is kept; align with the response cache TTL
+            audit_rate: Fraction of hits that generate anyway to check for false hits
+            audit_threshold: Response similarity below which an audited hit counts as false
+            near_miss_margin: Misses within this much of the threshold are counted as near misses
+        """
+        self.embed = embed
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.audit_rate = audit_rate
+        self.audit_threshold = audit_threshold
+        self.near_miss_margin = near_miss_margin
+        
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple, deque] = {}
+        self._false_hits = deque(maxlen=20)
+        self._stats = {
+            "lookups": 0, "hits": 0, "misses": 0, "near_misses": 0, "stale_entries": 0,
+            "audits": 0, "false_hits": 0, "embed_errors": 0, "embeds": 0,
+            "embed_ms_total": 0.0, "hit_similarity_total": 0.0
+        }
+    
+    def embed_query(self, text: str) -> Optional[np.ndarray]:
+        """Embed and L2-normalize a text; None if the embedding call fails."""
+        started = time.time()
+        try:
+            vector = np.asarray(self.embed(text), dtype=np.float32)
+        except Exception as e:
+            with self._lock:
+                self._stats["embed_errors"] += 1
+            print(f"⚠️ LLM Service: Semantic cache embedding failed: {e}")
+            return None
+        
+        with self._lock:
+            self._stats["embeds"] += 1
+            self._stats["embed_ms_total"] += (time.time() - started) * 1000
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+    
+    def lookup(self, bucket: Tuple, vector: np.ndarray) -> Optional[Tuple[str, float, str]]:
+        """
+        Find the most similar live entry in a bucket.
+        
+        Returns:
+            (cache key, similarity, matched text) when the similarity reaches the threshold
+        """
+        now = time.time()
+        with self._lock:
+            self._stats["lookups"] += 1
+            entries = self._buckets.get(bucket)
+            while entries and entries[0][3] <= now:
+                entries.popleft()
+            best = None
+            if entries:
+                similarities = np.stack([entry[0] for entry in entries]) @ vector
+                index = int(np.argmax(similarities))
+                best = (entries[index][1], float(similarities[index]), entries[index][2])
+            
+            if best and best[1] >= self.threshold:
+                return best
+            self._stats["misses"] += 1
+            if best and best[1] >= self.threshold - self.near_miss_margin:
+                self._stats["near_misses"] += 1
+            return None
+    
+    def record_hit(self, similarity: float):
+        """Count a served hit."""
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["hit_similarity_total"] += similarity
+    
+    def add(self, bucket: Tuple, vector: np.ndarray, cache_key: str, text: str):
+        """Index a request whose response was just cached under cache_key."""
+        with self._lock:
+            entries = self._buckets.setdefault(bucket, deque(maxlen=self.max_entries))
+            entries.append((vector, cache_key, text, time.time() + self.ttl))
+    
+    def discard(self, bucket: Tuple, cache_key: str):
+        """Drop entries whose response is no longer in the exact cache."""
+        with self._lock:
+            self._stats["stale_entries"] += 1
+            self._stats["misses"] += 1
+            entries = self._buckets.get(bucket)
+            if entries:
+                self._buckets[bucket] = deque((e for e in entries if e[1] != cache_key), maxlen=self.max_entries)
+    
+    def should_audit(self) -> bool:
+        """Whether this hit should be generated anyway and compared."""
+        return random.random() < self.audit_rate
+    
+    def audit(self, query: str, matched: str, similarity: float, cached_response: str, generated_response: str):
+        """Compare a fresh response with the one the hit would have served."""
+        cached_vector = self.embed_query(cached_response)
+        generated_vector = self.embed_query(generated_response)
+        if cached_vector is None or generated_vector is None:
+            return
+        
+        response_similarity = float(cached_vector @ generated_vector)
+        with self._lock:
+            self._stats["audits"] += 1
+            if response_similarity < self.audit_threshold:
+                self._stats["false_hits"] += 1
+                self._false_hits.append({
+                    "query": query,
+                    "matched": matched,
+                    "similarity": round(similarity, 4),
+                    "response_similarity": round(response_similarity, 4)
+                })
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit, near-miss, audit and false-hit statistics for threshold tuning."""
+        with self._lock:
+            stats = dict(self._stats)
+            entries = sum(len(e) for e in self._buckets.values())
+            buckets = len(self._buckets)
+            false_hits = list(self._false_hits)
+        
+        return {
+            "threshold": self.threshold,
+            "lookups": stats["lookups"],
+            "hits": stats["hits"],
+            "misses": stats["misses"],
+            "near_misses": stats["near_misses"],
+            "stale_entries": stats["stale_entries"],
+            "hit_rate": round(stats["hits"] / max(stats["lookups"], 1) * 100, 2),
+            "avg_hit_similarity": round(stats["hit_similarity_total"] / max(stats["hits"], 1), 4),
+            "audits": stats["audits"],
+            "false_hits": stats["false_hits"],
+            "false_hit_rate": round(stats["false_hits"] / max(stats["audits"], 1) * 100, 2),
+            "recent_false_hits": false_hits,
+            "embeds": stats["embeds"],
+            "embed_errors": stats["embed_errors"],
+            "avg_embed_ms": round(stats["embed_ms_total"] / max(stats["embeds"], 1), 2),
+            "entries": entries,
+            "buckets": buckets
+        }
@@ -1,14 +1,19 @@
 import os
 import hashlib
 import json
+import random
+import threading
+import time
 import traceback
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
-from flask import Flask, request, jsonify
+from typing import Dict, Any, List, Optional, Iterator
+from flask import Flask, request, jsonify, Response, stream_with_context
 from dotenv import load_dotenv
 from langchain_community.llms import Ollama
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain.schema import HumanMessage, AIMessage
+from langchain.schema import HumanMessage, AIMessage, SystemMessage
 
 # Import cache utilities
 try:
@@ -19,6 +24,21 @@ except ImportError as e:
     print(f"⚠️ LLM Service: Cache utilities not available: {e}")
     CACHE_AVAILABLE = False
 
+from src.services.llm_service.single_flight import SingleFlight
+from src.services.llm_service.scheduler import PriorityScheduler, SchedulerRejected
+from src.services.llm_service.health_probe import HealthProbe, check_ollama, check_cache
+from src.services.llm_service.backend_pool import BackendPool
+from src.services.llm_service.structured import parse_structured, schema_instructions
+from src.services.llm_service.candidates import Scorer, heuristic_scorer, QualityControlScorer, select_best
+from src.services.llm_service.prompt_budget import estimate_tokens, fit_prompt
+from src.services.llm_service.warmup import ModelWarmer, parse_active_hours
+from src.services.llm_service.response_cache import TieredResponseCache
+from src.services.llm_service.semantic_cache import SemanticCache, ollama_embed, semantic_text
+from src.services.llm_service.usage import OllamaUsageCallback, UsageRecorder
+from src.shared.messages import CHARACTERS, MessageFormatError, normalize_history, encoded_size, without_current_turn
+from src.shared.service_client import get_client_stats
+from src.shared.tracing import init_tracing, get_tracing_stats, record_span, span, wrap
+
 # Load environment variables
 load_dotenv()
 
@@ -27,12 +47,113 @@ LLM_SERVICE_PORT = int(os.getenv("LLM_SERVICE_PORT", "6001"))
 OLLAMA_BASE_URL = os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:8b-instruct-q5_K_M")
 
+# Named model tiers, e.g. "small=llama3.2:3b-instruct-q4_K_M"; the "default" tier is OLLAMA_MODEL
+DEFAULT_MODEL_TIER = "default"
+
+def _parse_model_tiers(spec: str) -> Dict[str, str]:
+    """Parse "name=model,name=model" into a tier -> model mapping."""
+    tiers = {DEFAULT_MODEL_TIER: OLLAMA_MODEL}
+    for entry in spec.split(","):
+        name, _, model = entry.partition("=")
+        if name.strip() and model.strip():
+            tiers[name.strip().lower()] = model.strip()
+    return tiers
+
+OLLAMA_MODEL_TIERS = _parse_model_tiers(os.getenv("OLLAMA_MODEL_TIERS", ""))
+
+# Ollama backend pool (comma-separated); defaults to the single OLLAMA_BASE_URL
+OLLAMA_BASE_URLS = [url.strip() for url in (os.getenv("OLLAMA_BASE_URLS") or OLLAMA_BASE_URL).split(",") if url.strip()]
+LLM_BACKEND_FAILURE_THRESHOLD = int(os.getenv("LLM_BACKEND_FAILURE_THRESHOLD", "3"))
+LLM_BACKEND_EJECTION_SECONDS = float(os.getenv("LLM_BACKEND_EJECTION_SECONDS", "30"))
+
 # Cache configuration
 RESPONSE_CACHE_TTL = int(os.getenv("LLM_RESPONSE_CACHE_TTL", "3600"))  # 1 hour
+RESPONSE_CACHE_NAMESPACE = "llm"  # every response key belongs to it; bumping it clears the whole cache
+RESPONSE_KEY_PREFIX = "llm:response:"
 MAX_PROMPT_CACHE_SIZE = int(os.getenv("MAX_PROMPT_CACHE_SIZE", "1000"))
 
+# In-process L1 in front of the KeyDB response cache (per worker; 0 entries disables it)
+LLM_L1_CACHE_MAX_ENTRIES = int(os.getenv("LLM_L1_CACHE_MAX_ENTRIES", "2048"))
+LLM_L1_CACHE_MAX_BYTES = int(float(os.getenv("LLM_L1_CACHE_MAX_MB", "32")) * 1024 * 1024)
+LLM_L1_CACHE_TTL = float(os.getenv("LLM_L1_CACHE_TTL", "300"))
+
+# Optional semantic tier: near-duplicate requests reuse a cached response (off by default)
+LLM_SEMANTIC_CACHE = os.getenv("LLM_SEMANTIC_CACHE", "false").lower() == "true"
+LLM_SEMANTIC_CACHE_EMBED_MODEL = os.getenv("LLM_SEMANTIC_CACHE_EMBED_MODEL", "nomic-embed-text")
+LLM_SEMANTIC_CACHE_EMBED_URL = os.getenv("LLM_SEMANTIC_CACHE_EMBED_URL", OLLAMA_BASE_URLS[0])
+LLM_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("LLM_SEMANTIC_CACHE_THRESHOLD", "0.95"))
+LLM_SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("LLM_SEMANTIC_CACHE_MAX_ENTRIES", "256"))  # per bucket, per worker
+LLM_SEMANTIC_CACHE_AUDIT_RATE = float(os.getenv("LLM_SEMANTIC_CACHE_AUDIT_RATE", "0.05"))
+LLM_SEMANTIC_CACHE_AUDIT_THRESHOLD = float(os.getenv("LLM_SEMANTIC_CACHE_AUDIT_THRESHOLD", "0.8"))
+
+# In-flight coalescing of identical requests
+SINGLE_FLIGHT_LOCK_TTL = int(os.getenv("LLM_SINGLE_FLIGHT_LOCK_TTL", "120"))
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv("LLM_SINGLE_FLIGHT_WAIT_TIMEOUT", "90"))
+
+# Priority scheduling in front of Ollama (limits are per worker process)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", str(2 * len(OLLAMA_BASE_URLS))))
+LLM_MAX_QUEUE_DEPTH = int(os.getenv("LLM_MAX_QUEUE_DEPTH", "32"))
+LLM_MAX_WAIT_SECONDS = {
+    "interactive": float(os.getenv("LLM_MAX_WAIT_INTERACTIVE", "60")),
+    "organic": float(os.getenv("LLM_MAX_WAIT_ORGANIC", "30")),
+    "analysis": float(os.getenv("LLM_MAX_WAIT_ANALYSIS", "15")),
+    "background": float(os.getenv("LLM_MAX_WAIT_BACKGROUND", "10"))
+}
+
+# Batch generation
+LLM_BATCH_MAX_ITEMS = int(os.getenv("LLM_BATCH_MAX_ITEMS", "16"))
+LLM_BATCH_WORKERS = int(os.getenv("LLM_BATCH_WORKERS", "16"))  # Concurrency is still bounded by the scheduler
+
+# Best-of-N generation
+LLM_BEST_OF_MAX_CANDIDATES = int(os.getenv("LLM_BEST_OF_MAX_CANDIDATES", "5"))
+QUALITY_CONTROL_URL = os.getenv("QUALITY_CONTROL_URL", "http://quality-control:6003")
+
+# Structured (JSON) output
+LLM_STRUCTURED_MAX_TOKENS = int(os.getenv("LLM_STRUCTURED_MAX_TOKENS", "128"))  # Used unless the request sets max_tokens
+LLM_STRUCTURED_ATTEMPTS = int(os.getenv("LLM_STRUCTURED_ATTEMPTS", "2"))  # Generations per request before giving up on valid output
+
+# Prompt token budget (system prompt + enhancements + history + user message); 0 disables trimming
+LLM_PROMPT_TOKEN_BUDGET = int(os.getenv("LLM_PROMPT_TOKEN_BUDGET", "1536"))
+LLM_PROMPT_MIN_HISTORY = int(os.getenv("LLM_PROMPT_MIN_HISTORY", "4"))  # Recent messages kept until enhancements are cut
+
+# Model warm-keeping: models are preloaded in the background and pinged when idle during active hours
+OLLAMA_KEEP_ALIVE = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+LLM_WARM_PING_INTERVAL = float(os.getenv("LLM_WARM_PING_INTERVAL", "240"))  # 0 disables pings
+LLM_ACTIVE_HOURS = parse_active_hours(os.getenv("LLM_ACTIVE_HOURS", ""))  # e.g. "8-23" local time; empty means always
+LLM_PRELOAD_RETRY_SECONDS = float(os.getenv("LLM_PRELOAD_RETRY_SECONDS", "10"))
+
+# Background health probing (health endpoints read the cached snapshot)
+HEALTH_PROBE_INTERVAL = float(os.getenv("LLM_HEALTH_PROBE_INTERVAL", "15"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("LLM_HEALTH_PROBE_TIMEOUT", "3"))
+
+# Default generation options; per-request settings override these for a single call
+DEFAULT_GENERATION_OPTIONS = {
+    "temperature": 0.8,
+    "num_predict": 512,
+    "top_k": 40,
+    "top_p": 0.9,
+    "repeat_penalty": 1.1
+}
+
+# Request setting name -> Ollama option name
+SETTINGS_TO_OLLAMA_OPTIONS = {
+    "temperature": "temperature",
+    "max_tokens": "num_predict",
+    "top_p": "top_p",
+    "top_k": "top_k",
+    "repeat_penalty": "repeat_penalty",
+    "seed": "seed",
+    "format": "format",
+    "stop": "stop"
+}
+
+# Stop generating when the model starts a new chat turn on its own
+LLM_STOP_ON_ROLE_MARKERS = os.getenv("LLM_STOP_ON_ROLE_MARKERS", "true").lower() == "true"
+ROLE_MARKER_STOP_SEQUENCES = ["\nUser:", "\nHuman:", "\nAssistant:", "<|eot_id|>", "<|start_header_id|>"]
+
 # --- Flask App ---
 app = Flask(__name__)
+init_tracing(app, "llm-service")
 
 class LLMService:
     """
@@ -42,37 +163,112 @@ class LLMService:
     
     def __init__(self):
         """Initialize the LLM service with Ollama connection and caching."""
-        self.llm = None
+        self.backends = None
         self.cache = None
+        self.response_cache = None
+        self.semantic_cache = None
         self.request_count = 0
         self.error_count = 0
         self.cache_hits = 0
+        self.metrics_lock = threading.Lock()  # Counters are shared by concurrent request threads
+        self.tier_stats = {
+            tier: {"generations": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0}
+            for tier in OLLAMA_MODEL_TIERS
+        }
+        self.prompt_budget_stats = {"trimmed_requests": 0, "over_budget_requests": 0, "history_messages_dropped": 0, "enhancements_dropped": 0}
+        self.history_stats = {"requests": 0, "messages_received": 0, "messages_used": 0, "bytes_received": 0}
+        self.usage = UsageRecorder()  # Token and timing histograms per caller, character and model
         
         # Initialize cache if available
         if CACHE_AVAILABLE:
             self.cache = get_cache("llm_service")
+            self.response_cache = TieredResponseCache(
+                self.cache,
+                max_entries=LLM_L1_CACHE_MAX_ENTRIES,
+                max_bytes=LLM_L1_CACHE_MAX_BYTES,
+                l1_ttl=LLM_L1_CACHE_TTL,
+                channel="response_cache:invalidations"
+            )
             print("💾 LLM Service: Cache initialized")
+            
+            if LLM_SEMANTIC_CACHE:
+                self.semantic_cache = SemanticCache(
+                    embed=lambda text: ollama_embed(LLM_SEMANTIC_CACHE_EMBED_URL, LLM_SEMANTIC_CACHE_EMBED_MODEL, text),
+                    threshold=LLM_SEMANTIC_CACHE_THRESHOLD,
+                    max_entries=LLM_SEMANTIC_CACHE_MAX_ENTRIES,
+                    ttl=RESPONSE_CACHE_TTL,
+                    audit_rate=LLM_SEMANTIC_CACHE_AUDIT_RATE,
+                    audit_threshold=LLM_SEMANTIC_CACHE_AUDIT_THRESHOLD
+                )
+                print(f"🧭 LLM Service: Semantic cache enabled ({LLM_SEMANTIC_CACHE_EMBED_MODEL}, threshold {LLM_SEMANTIC_CACHE_THRESHOLD})")
+        
+        # Identical requests that arrive while one is generating share its result
+        self.single_flight = SingleFlight(
+            cache=self.cache,
+            lock_ttl=SINGLE_FLIGHT_LOCK_TTL,
+            wait_timeout=SINGLE_FLIGHT_WAIT_TIMEOUT
+        )
+        
+        # Bounded, priority-ordered access to Ollama
+        self.scheduler = PriorityScheduler(
+            max_concurrency=LLM_MAX_CONCURRENCY,
+            max_queue_depth=LLM_MAX_QUEUE_DEPTH,
+            max_wait=LLM_MAX_WAIT_SECONDS
+        )
+        
+        # Pluggable scorers for best-of-N generation
+        self.scorers: Dict[str, Scorer] = {
+            "heuristic": heuristic_scorer,
+            "quality_control": QualityControlScorer(QUALITY_CONTROL_URL)
+        }
+        
+        # Dispatches the uncached items of /generate/batch requests and best-of-N candidates
+        self.batch_executor = ThreadPoolExecutor(max_workers=LLM_BATCH_WORKERS, thread_name_prefix="llm-batch")
         
         # Initialize Ollama connection
         self._initialize_llm()
     
+        # Models load in the background so a cold Ollama never blocks worker boot
+        self.warmer = ModelWarmer(
+            OLLAMA_BASE_URLS,
+            [OLLAMA_MODEL, *OLLAMA_MODEL_TIERS.values()],
+            keep_alive=OLLAMA_KEEP_ALIVE,
+            ping_interval=LLM_WARM_PING_INTERVAL,
+            active_hours=LLM_ACTIVE_HOURS,
+            retry_interval=LLM_PRELOAD_RETRY_SECONDS
+        )
+        self.warmer.start()
+        
+        # Ollama and cache are checked off the request path with lightweight calls
+        self.health_probe = HealthProbe(
+            checks={
+                "ollama": lambda: self.backends.probe(
+                    lambda base_url: check_ollama(base_url, OLLAMA_MODEL, timeout=HEALTH_PROBE_TIMEOUT, tier_models=OLLAMA_MODEL_TIERS)
+                ),
+                "cache": lambda: check_cache(self.cache)
+            },
+            interval=HEALTH_PROBE_INTERVAL,
+            name="llm-health-probe"
+        )
+        self.health_probe.start()
+    
     def _initialize_llm(self):
-        """Initialize the Ollama LLM connection."""
+        """Initialize the Ollama backend pool without contacting Ollama."""
         try:
-            self.llm = Ollama(
-                model=OLLAMA_MODEL,
-                base_url=OLLAMA_BASE_URL,
-                temperature=0.8,
-                num_predict=512,
-                top_k=40,
-                top_p=0.9,
-                repeat_penalty=1.1
+            # The shared clients are never mutated after creation; per-request
+            # options are bound per call in _llm_for_request
+            self.backends = BackendPool(
+                OLLAMA_BASE_URLS,
+                client_factory=lambda base_url: Ollama(
+                    model=OLLAMA_MODEL,
+                    base_url=base_url,
+                    keep_alive=OLLAMA_KEEP_ALIVE,
+                    **DEFAULT_GENERATION_OPTIONS
+                ),
+                failure_threshold=LLM_BACKEND_FAILURE_THRESHOLD,
+                ejection_seconds=LLM_BACKEND_EJECTION_SECONDS
             )
-            
-            # Test the connection
-            test_response = self.llm.invoke("Test connection")
-            print(f"🤖 LLM Service: Successfully connected to {OLLAMA_MODEL} at {OLLAMA_BASE_URL}")
-            print(f"🧪 LLM Service: Test response: {test_response[:50]}...")
+            print(f"🤖 LLM Service: Configured {OLLAMA_MODEL} on {len(OLLAMA_BASE_URLS)} backend(s); preloading in the background")
             
         except Exception as e:
             print(f"❌ LLM Service: Failed to initialize Ollama: {e}")
@@ -82,177 +278,692 @@ class LLMService:
         """Generate a cache key for the prompt and settings."""
         # Create a hash of the prompt and settings for caching
         content = f"{prompt}:{json.dumps(settings, sort_keys=True)}"
-        return f"llm:response:{hashlib.md5(content.encode()).hexdigest()}"
+        return f"{RESPONSE_KEY_PREFIX}{hashlib.md5(content.encode()).hexdigest()}"
+    
+    def _build_cache_key(self, prompt: str, user_message: Optional[str], chat_history: Optional[list], settings: Optional[Dict[str, Any]], character: Optional[str] = None) -> str:
+        """
+        Build the response cache key for a full generation request.
+        
+        The key carries the version of the "llm" namespace and, for character
+        requests, of that character's namespace, so /cache/clear can drop either
+        without scanning KeyDB.
+        """
+        cache_content = {
+            "prompt": prompt,
+            "user_message": user_message,
+            "history": [
+                {"type": msg.type, "content": msg.content} if isinstance(msg, (HumanMessage, AIMessage, SystemMessage)) else msg
+                for msg in (chat_history or [])
+            ],
+            "settings": settings or {}
+        }
+        key = self._generate_cache_key(json.dumps(cache_content, sort_keys=True, default=str), {})
+        return self.response_cache.key(key, *self._cache_namespaces(character))
+    
+    @staticmethod
+    def _cache_namespaces(character: Optional[str] = None) -> List[str]:
+        """Cache namespaces a response belongs to: all LLM responses, plus the character's."""
+        if character and character.lower() in CHARACTERS:
+            return [RESPONSE_CACHE_NAMESPACE, f"character:{character.lower()}"]
+        return [RESPONSE_CACHE_NAMESPACE]
+    
+    def invalidate_cache(self, character: Optional[str] = None) -> Optional[int]:
+        """
+        Invalidate cached responses for one character, or all of them.
+        
+        Returns:
+            The namespace's new version, or None if the cache is unavailable
+        """
+        if not self.cache:
+            return None
+        namespace = self._cache_namespaces(character)[-1]
+        version = self.response_cache.invalidate(namespace)
+        print(f"🗑️ LLM Service: Invalidated response cache namespace {namespace} (now v{version})")
+        return version
+        
+    def _build_runnable(self, llm, prompt: str, user_message: Optional[str], chat_history: Optional[list]):
+        """
+        Build the runnable and its input for a generation request.
+        
+        Args:
+            llm: Request-scoped LLM from _llm_for_request
+        
+        Returns:
+            Tuple of (runnable, input) ready for invoke() or stream()
+        """
+        messages = []
+        
+        # Message objects are passed through literally; (role, text) tuples would be
+        # parsed as templates and break on any "{" in prompts, history or JSON schemas
+        for msg in chat_history or []:
+            if isinstance(msg, HumanMessage):
+                messages.append(HumanMessage(content=msg.content))
+            elif isinstance(msg, AIMessage):
+                messages.append(AIMessage(content=msg.content))
+            elif isinstance(msg, SystemMessage):
+                messages.append(SystemMessage(content=msg.content))
+        
+        # Add current user message
+        if user_message:
+            messages.append(HumanMessage(content=user_message))
+        
+        if messages:
+            # Use chat template for proper system + conversation structure
+            chat_template = ChatPromptTemplate.from_messages([
+                SystemMessage(content=prompt),
+                *messages
+            ])
+            return chat_template | llm, {}
+        
+        # Simple prompt (fallback - treat prompt as complete input)
+        return llm, prompt
+    
+    def _fit_prompt(self, prompt: str, user_message: Optional[str], chat_history: Optional[list], request_id: Optional[int] = None, reserved_tokens: int = 0):
+        """
+        Trim the prompt and history to LLM_PROMPT_TOKEN_BUDGET.
+        
+        What was cut is logged and counted only when a request_id is given, so
+        lookups that do not generate (e.g. batch cache checks) are not double-counted.
+        
+        Returns:
+            Tuple of (prompt, chat_history, report)
+        """
+        report = None
+        if LLM_PROMPT_TOKEN_BUDGET > 0:
+            prompt, chat_history, report = fit_prompt(
+                prompt, user_message, chat_history, LLM_PROMPT_TOKEN_BUDGET,
+                min_history=LLM_PROMPT_MIN_HISTORY, reserved_tokens=reserved_tokens
+            )
+        if request_id is None:
+            return prompt, chat_history, report
+        
+        cut = report is not None and (report["trimmed"] or report["over_budget"])
+        with self.metrics_lock:
+            self.history_stats["messages_used"] += len(chat_history or [])
+            if cut:
+                stats = self.prompt_budget_stats
+                stats["trimmed_requests"] += int(report["trimmed"])
+                stats["over_budget_requests"] += int(report["over_budget"])
+                stats["history_messages_dropped"] += report["history_messages_dropped"]
+                stats["enhancements_dropped"] += len(report["enhancements_dropped"])
+        
+        if cut:
+            print(f"✂️ LLM Service: Request {request_id} prompt {report['original_tokens']} -> {report['estimated_tokens']} tokens "
+                  f"(dropped {report['history_messages_dropped']} history messages, enhancements: {report['enhancements_dropped'] or 'none'})")
+        return prompt, chat_history, report
+    
+    @contextmanager
+    def _generation(self, settings: Optional[Dict[str, Any]], priority: Optional[str], labels: Optional[Dict[str, str]] = None):
+        """
+        Hold a scheduler slot and a backend for one generation.
+        
+        Yields the request-scoped LLM and records the generation against its model
+        tier, along with its queue wait and Ollama's token counts and durations.
+        
+        Args:
+            labels: caller and character the usage is recorded under
+        """
+        tier = self._resolve_model_tier(settings)
+        usage = OllamaUsageCallback()
+        with self.scheduler.slot(priority) as wait_ms, self.backends.lease() as backend:
+            started = time.time()
+            record_span("llm.queue_wait", started - wait_ms / 1000, wait_ms, priority=self.scheduler.normalize_priority(priority))
+            try:
+                with span("llm.generate", model=OLLAMA_MODEL_TIERS[tier], backend=backend.base_url):
+                    yield self._llm_for_request(backend.llm, settings).with_config(callbacks=[usage])
+            except Exception:
+                self._record_tier_generation(tier, failed=True)
+                raise
+            finally:
+                self.usage.record({**(labels or {}), "model": OLLAMA_MODEL_TIERS[tier]}, {"queue_wait_ms": wait_ms, **usage.usage})
+            self._record_tier_generation(tier, latency_ms=(time.time() - started) * 1000)
+            self.warmer.note_activity(backend.base_url, OLLAMA_MODEL_TIERS[tier])
+    
+    def _semantic_bucket(self, cache_key: str, settings: Optional[Dict[str, Any]], labels: Optional[Dict[str, str]]) -> tuple:
+        """
+        Requests only match within the same bucket: cache namespace versions (so
+        invalidations apply), character, message type (or caller), model tier and format.
+        """
+        settings = settings or {}
+        labels = labels or {}
+        return (
+            cache_key.partition(RESPONSE_KEY_PREFIX)[0],
+            (labels.get("character") or "").lower(),
+            settings.get("message_type") or labels.get("caller"),
+            self._resolve_model_tier(settings),
+            settings.get("format")
+        )
+    
+    def _cache_lookup(self, cache_key: str, settings: Optional[Dict[str, Any]], labels: Optional[Dict[str, str]]) -> Optional[str]:
+        """Read a cached response, recording how long the lookup took."""
+        started = time.time()
+        cached_response = self.response_cache.get(cache_key)
+        elapsed_ms = (time.time() - started) * 1000
+        tier = self._resolve_model_tier(settings)
+        self.usage.record({**(labels or {}), "model": OLLAMA_MODEL_TIERS[tier]}, {"cache_lookup_ms": elapsed_ms})
+        record_span("llm.cache_lookup", started, elapsed_ms, hit=cached_response is not None)
+        return cached_response
+    
+    def _invoke(self, prompt: str, user_message: Optional[str], chat_history: Optional[list], settings: Optional[Dict[str, Any]], priority: Optional[str], labels: Optional[Dict[str, str]] = None) -> str:
+        """Run one generation on a leased backend under a scheduler slot, bypassing the cache."""
+        with self._generation(settings, priority, labels) as llm:
+            runnable, runnable_input = self._build_runnable(llm, prompt, user_message, chat_history)
+            return runnable.invoke(runnable_input)
     
-    def generate_response(self, prompt: str, user_message: str = None, chat_history: list = None, settings: Dict[str, Any] = None) -> Dict[str, Any]:
-        """Generate a response using the LLM with proper conversation structure."""
+    def generate_response(self, prompt: str, user_message: str = None, chat_history: list = None, settings: Dict[str, Any] = None, priority: str = None, response_schema: Dict[str, Any] = None, labels: Dict[str, str] = None) -> Dict[str, Any]:
+        """
+        Generate a response using the LLM with proper conversation structure.
         
-        self.request_count += 1
-        print(f"🤖 LLM Service: Processing request {self.request_count}")
+        The Ollama call runs under the priority scheduler; SchedulerRejected is
+        raised unchanged when the request is shed so callers can back off.
+        
+        With response_schema, Ollama's JSON format is used with a short token
+        budget, the output is validated server-side and returned as "parsed".
+        Invalid output is regenerated (up to LLM_STRUCTURED_ATTEMPTS) and never cached.
+        """
+        
+        request_id = self._next_request_id()
+        print(f"🤖 LLM Service: Processing request {request_id}")
+        
+        instructions = schema_instructions(response_schema) if response_schema is not None else ""
+        prompt, chat_history, prompt_budget = self._fit_prompt(prompt, user_message, chat_history, request_id, reserved_tokens=estimate_tokens(instructions))
+        
+        if response_schema is not None:
+            prompt = prompt + instructions
+            settings = {"max_tokens": LLM_STRUCTURED_MAX_TOKENS, **(settings or {}), "format": "json"}
+        
+        def is_valid(text: str) -> bool:
+            return response_schema is None or not parse_structured(text, response_schema)[1]
+        
+        def with_structured(result: Dict[str, Any]) -> Dict[str, Any]:
+            result["prompt_budget"] = prompt_budget
+            if response_schema is not None:
+                result["parsed"], errors = parse_structured(result["response"], response_schema)
+                if errors:
+                    result["validation_errors"] = errors
+            return result
         
         try:
-            # Apply settings if provided
-            if settings:
-                self._apply_settings(settings)
-            
-            # Generate cache key
+            # Check cache first
             cache_key = None
             if self.cache:
-                cache_content = {
-                    "prompt": prompt,
-                    "user_message": user_message,
-                    "history": chat_history or [],
-                    "settings": settings or {}
-                }
-                cache_key = self._generate_cache_key(json.dumps(cache_content, sort_keys=True), {})
-                
-                # Check cache first
-                cached_response = self.cache.get(cache_key)
+                cache_key = self._build_cache_key(prompt, user_message, chat_history, settings, (labels or {}).get("character"))
+                cached_response = self._cache_lookup(cache_key, settings, labels)
                 if cached_response:
-                    self.cache_hits += 1
-                    print(f"💾 LLM Service: Cache hit for request {self.request_count}")
-                    return {
+                    self._record_cache_hit()
+                    print(f"💾 LLM Service: Cache hit for request {request_id}")
+                    return with_structured({
                         "response": cached_response,
                         "cached": True,
-                        "request_id": self.request_count,
+                        "model_tier": self._resolve_model_tier(settings),
+                        "request_id": request_id,
                         "timestamp": datetime.now().isoformat()
-                    }
+                    })
             
-            # Generate response with proper conversation structure
-            if user_message:
-                # Use chat template for proper system + user message structure
-                messages = []
-                
-                # Add conversation history if provided
-                if chat_history:
-                    for msg in chat_history:
-                        if isinstance(msg, HumanMessage):
-                            messages.append(("user", msg.content))
-                        elif isinstance(msg, AIMessage):
-                            messages.append(("assistant", msg.content))
-                
-                # Add current user message
-                messages.append(("user", user_message))
+            # Near-duplicate requests reuse a cached response; a sampled hit generates anyway as an audit
+            semantic, audit = None, None
+            if cache_key and self.semantic_cache:
+                query = semantic_text((labels or {}).get("character"), user_message or prompt)
+                vector = self.semantic_cache.embed_query(query)
+                if vector is not None:
+                    semantic = (self._semantic_bucket(cache_key, settings, labels), vector, query)
+                    match = self.semantic_cache.lookup(semantic[0], vector)
+                    if match:
+                        source_key, similarity, matched = match
+                        cached_response = self.response_cache.get(source_key)
+                        if cached_response is None:
+                            self.semantic_cache.discard(semantic[0], source_key)
+                        elif self.semantic_cache.should_audit():
+                            audit = (matched, similarity, cached_response)
+                        else:
+                            self.semantic_cache.record_hit(similarity)
+                            self._record_cache_hit()
+                            print(f"🧭 LLM Service: Semantic cache hit for request {request_id} (similarity {similarity:.3f})")
+                            return with_structured({
+                                "response": cached_response,
+                                "cached": True,
+                                "semantic_similarity": round(similarity, 4),
+                                "model_tier": self._resolve_model_tier(settings),
+                                "request_id": request_id,
+                                "timestamp": datetime.now().isoformat()
+                            })
+            
+            def generate() -> str:
+                attempts = LLM_STRUCTURED_ATTEMPTS if response_schema is not None else 1
+                for attempt in range(attempts):
+                    # Retries use a fresh seed so they do not reproduce the invalid output
+                    attempt_settings = settings if attempt == 0 else {**settings, "seed": random.randint(0, 2**31 - 1)}
+                    generated = self._invoke(prompt, user_message, chat_history, attempt_settings, priority, labels)
+                    if is_valid(generated):
+                        break
+                    print(f"⚠️ LLM Service: Request {request_id} produced invalid structured output (attempt {attempt + 1}/{attempts})")
+                else:
+                    # Never cache output that failed validation
+                    return generated
                 
-                # Create chat template with system prompt and messages
-                chat_template = ChatPromptTemplate.from_messages([
-                    ("system", prompt),
-                    *messages
-                ])
+                # Cache the response before releasing followers so other workers can read it
+                if self.cache and cache_key:
+                    self.response_cache.set(cache_key, generated, ttl=RESPONSE_CACHE_TTL)
+                    print(f"💾 LLM Service: Cached response for request {request_id}")
+                    if semantic:
+                        self.semantic_cache.add(semantic[0], semantic[1], cache_key, semantic[2])
+                    if audit:
+                        self.semantic_cache.audit(semantic[2], audit[0], audit[1], audit[2], generated)
+                return generated
                 
-                response = chat_template | self.llm
-                result = response.invoke({})
-            elif chat_history:
-                # Use chat template for conversation (legacy support)
-                messages = []
-                for msg in chat_history:
-                    if isinstance(msg, HumanMessage):
-                        messages.append(("user", msg.content))
-                    elif isinstance(msg, AIMessage):
-                        messages.append(("assistant", msg.content))
+            if cache_key:
+                result, role = self.single_flight.do(cache_key, generate, fetch=lambda: self.response_cache.get(cache_key))
+            else:
+                result, role = generate(), SingleFlight.ROLE_LEADER
                 
-                # Add system prompt and current message
-                chat_template = ChatPromptTemplate.from_messages([
-                    ("system", prompt),
-                    *messages
-                ])
+            if role != SingleFlight.ROLE_LEADER:
+                print(f"🔗 LLM Service: Request {request_id} coalesced with an in-flight generation ({role})")
                 
-                response = chat_template | self.llm
-                result = response.invoke({})
-            else:
-                # Simple prompt (fallback - treat prompt as complete input)
-                result = self.llm.invoke(prompt)
-            
-            # Cache the response
-            if self.cache and cache_key:
-                self.cache.set(cache_key, result, ttl=RESPONSE_CACHE_TTL)
-                print(f"💾 LLM Service: Cached response for request {self.request_count}")
-            
-            return {
+            return with_structured({
                 "response": result,
                 "cached": False,
-                "request_id": self.request_count,
+                "coalesced": role != SingleFlight.ROLE_LEADER,
+                "model_tier": self._resolve_model_tier(settings),
+                "request_id": request_id,
                 "timestamp": datetime.now().isoformat()
-            }
+            })
             
+        except SchedulerRejected as e:
+            print(f"🚦 LLM Service: Request {request_id} shed by scheduler: {e.reason}")
+            raise
         except Exception as e:
-            self.error_count += 1
+            self._record_error()
             print(f"❌ LLM Service: Error generating response: {e}")
             print(traceback.format_exc())
             raise Exception(f"LLM generation failed: {e}")
     
-    def _apply_settings(self, settings: Dict[str, Any]):
-        """Apply LLM settings dynamically."""
+    def stream_response(self, prompt: str, user_message: str = None, chat_history: list = None, settings: Dict[str, Any] = None, priority: str = None, labels: Dict[str, str] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Generate a response token by token as Ollama produces it.
+        
+        Yields ``{"token": ...}`` events followed by a final ``{"done": True, ...}``
+        event carrying the full response. The complete response is written to the
+        response cache once the stream finishes, and a cache hit is replayed as a
+        single token.
+        """
+        
+        request_id = self._next_request_id()
+        print(f"🌊 LLM Service: Processing streaming request {request_id}")
+        prompt, chat_history, prompt_budget = self._fit_prompt(prompt, user_message, chat_history, request_id)
+        
         try:
-            if "temperature" in settings:
-                self.llm.temperature = settings["temperature"]
-            if "max_tokens" in settings:
-                self.llm.num_predict = settings["max_tokens"]
-            if "top_p" in settings:
-                self.llm.top_p = settings["top_p"]
-            if "top_k" in settings:
-                self.llm.top_k = settings["top_k"]
-            if "repeat_penalty" in settings:
-                self.llm.repeat_penalty = settings["repeat_penalty"]
+            cache_key = None
+            if self.cache:
+                cache_key = self._build_cache_key(prompt, user_message, chat_history, settings, (labels or {}).get("character"))
+                cached_response = self._cache_lookup(cache_key, settings, labels)
+                if cached_response:
+                    self._record_cache_hit()
+                    print(f"💾 LLM Service: Cache hit for streaming request {request_id}")
+                    yield {"token": cached_response}
+                    yield {
+                        "done": True,
+                        "response": cached_response,
+                        "cached": True,
+                        "prompt_budget": prompt_budget,
+                        "request_id": request_id,
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    return
                 
-        except Exception as e:
-            print(f"⚠️ LLM Service: Warning - could not apply settings: {e}")
+            chunks = []
+            with self._generation(settings, priority, labels) as llm:
+                runnable, runnable_input = self._build_runnable(llm, prompt, user_message, chat_history)
+                for chunk in runnable.stream(runnable_input):
+                    if not chunk:
+                        continue
+                    chunks.append(chunk)
+                    yield {"token": chunk}
     
-    def get_health_status(self) -> Dict[str, Any]:
-        """Get the health status of the LLM service."""
-        try:
-            # Test LLM connection
-            test_response = self.llm.invoke("Health check")
-            llm_healthy = len(test_response) > 0
+            result = "".join(chunks)
             
-            cache_healthy = True
-            cache_stats = {}
-            if self.cache:
-                try:
-                    # Test cache connection
-                    test_key = "health_check"
-                    self.cache.set(test_key, "test", ttl=60)
-                    test_result = self.cache.get(test_key)
-                    cache_healthy = test_result == "test"
-                    self.cache.delete(test_key)
+            # Only a completed stream is cached; aborted streams never reach here
+            if self.cache and cache_key:
+                self.response_cache.set(cache_key, result, ttl=RESPONSE_CACHE_TTL)
+                print(f"💾 LLM Service: Cached streamed response for request {request_id}")
                     
-                    cache_stats = {
-                        "available": True,
-                        "healthy": cache_healthy
-                    }
-                except Exception as e:
-                    cache_healthy = False
-                    cache_stats = {
-                        "available": True,
-                        "healthy": False,
-                        "error": str(e)
-                    }
-            else:
-                cache_stats = {"available": False}
-            
-            return {
-                "status": "healthy" if llm_healthy and cache_healthy else "degraded",
-                "llm": {
-                    "model": OLLAMA_MODEL,
-                    "base_url": OLLAMA_BASE_URL,
-                    "healthy": llm_healthy
-                },
-                "cache": cache_stats,
-                "metrics": {
-                    "total_requests": self.request_count,
-                    "error_count": self.error_count,
-                    "cache_hits": self.cache_hits,
-                    "cache_hit_rate": self.cache_hits / max(self.request_count, 1) * 100
-                },
+            yield {
+                "done": True,
+                "response": result,
+                "cached": False,
+                "prompt_budget": prompt_budget,
+                "request_id": request_id,
                 "timestamp": datetime.now().isoformat()
             }
             
-        except Exception as e:
-            return {
-                "status": "unhealthy",
+        except SchedulerRejected as e:
+            print(f"🚦 LLM Service: Streaming request {request_id} shed by scheduler: {e.reason}")
+            yield {
+                "done": True,
                 "error": str(e),
+                "shed": True,
+                "request_id": request_id,
                 "timestamp": datetime.now().isoformat()
             }
+        except Exception as e:
+            self._record_error()
+            print(f"❌ LLM Service: Error streaming response: {e}")
+            print(traceback.format_exc())
+            yield {
+                "done": True,
+                "error": f"LLM generation failed: {e}",
+                "request_id": request_id,
+                "timestamp": datetime.now().isoformat()
+            }
+    
+    def generate_batch(self, generation_requests: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Generate responses for several independent requests in one call.
+        
+        Cached items are answered without being dispatched; the rest run
+        concurrently through generate_response, so each still waits for a scheduler
+        slot and joins any identical in-flight generation. Results keep the input
+        order and carry a per-item status.
+        
+        Args:
+            generation_requests: generate_response() keyword arguments, one per item
+        """
+        results: List[Optional[Dict[str, Any]]] = [None] * len(generation_requests)
+        futures = {}
+        
+        for index, args in enumerate(generation_requests):
+            cached_response = None
+            if self.cache and args.get("response_schema") is None:
+                # Key on the trimmed prompt, as generate_response does
+                prompt, chat_history, prompt_budget = self._fit_prompt(args["prompt"], args.get("user_message"), args.get("chat_history"))
+                cache_key = self._build_cache_key(prompt, args.get("user_message"), chat_history, args.get("settings"), (args.get("labels") or {}).get("character"))
+                cached_response = self._cache_lookup(cache_key, args.get("settings"), args.get("labels"))
+            
+            if cached_response:
+                request_id = self._next_request_id()
+                self._record_cache_hit()
+                results[index] = {
+                    "index": index,
+                    "status": "ok",
+                    "status_code": 200,
+                    "response": cached_response,
+                    "cached": True,
+                    "model_tier": self._resolve_model_tier(args.get("settings")),
+                    "prompt_budget": prompt_budget,
+                    "request_id": request_id,
+                    "timestamp": datetime.now().isoformat()
+                }
+            else:
+                futures[index] = self.batch_executor.submit(wrap(self.generate_response), **args)
+        
+        for index, future in futures.items():
+            try:
+                result = future.result()
+                results[index] = {"index": index, "status": "ok", "status_code": 200, **result}
+            except SchedulerRejected as e:
+                results[index] = {"index": index, "status": "shed", "status_code": 503, "error": str(e), "priority": e.priority}
+            except Exception as e:
+                results[index] = {"index": index, "status": "error", "status_code": 500, "error": str(e)}
+        
+        print(f"📦 LLM Service: Batch of {len(results)} served ({len(results) - len(futures)} from cache)")
+        
+        return {
+            "results": results,
+            "summary": {
+                "total": len(results),
+                "cached": sum(1 for r in results if r.get("cached")),
+                "generated": sum(1 for r in results if r["status"] == "ok" and not r.get("cached")),
+                "shed": sum(1 for r in results if r["status"] == "shed"),
+                "failed": sum(1 for r in results if r["status"] == "error")
+            },
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def generate_best_of(self, prompt: str, user_message: str = None, chat_history: list = None, settings: Dict[str, Any] = None, priority: str = None, n: int = 3, scorer: str = "heuristic", scorer_context: Dict[str, Any] = None, labels: Dict[str, str] = None) -> Dict[str, Any]:
+        """
+        Generate n candidates in parallel and return the best one.
+        
+        Each candidate uses a distinct seed and skips the response cache, since a
+        cached reply would make every candidate identical. If the requested scorer
+        fails, candidates are ranked with the heuristic scorer instead.
+        
+        Raises:
+            SchedulerRejected: If every candidate was shed
+        """
+        request_id = self._next_request_id()
+        n = max(1, min(n, LLM_BEST_OF_MAX_CANDIDATES))
+        scorer_name = scorer if scorer in self.scorers else "heuristic"
+        print(f"🎯 LLM Service: Processing best-of-{n} request {request_id} ({scorer_name} scorer)")
+        prompt, chat_history, prompt_budget = self._fit_prompt(prompt, user_message, chat_history, request_id)
+        
+        base_seed = random.randint(0, 2**31 - 1 - n)
+        seeds = [base_seed + i for i in range(n)]
+        futures = [
+            self.batch_executor.submit(wrap(self._invoke), prompt, user_message, chat_history, {**(settings or {}), "seed": seed}, priority, labels)
+            for seed in seeds
+        ]
+        
+        texts, candidate_seeds, errors = [], [], []
+        for seed, future in zip(seeds, futures):
+            try:
+                texts.append(future.result())
+                candidate_seeds.append(seed)
+            except Exception as e:
+                errors.append(e)
+        
+        if not texts:
+            if all(isinstance(e, SchedulerRejected) for e in errors):
+                raise errors[0]
+            self._record_error()
+            raise Exception(f"LLM generation failed: {errors[0]}")
+        
+        scorer_fallback = False
+        try:
+            scores = self.scorers[scorer_name](texts, scorer_context or {})
+        except Exception as e:
+            print(f"⚠️ LLM Service: {scorer_name} scorer failed for request {request_id}, using heuristic: {e}")
+            scores = heuristic_scorer(texts, scorer_context or {})
+            scorer_fallback = True
+        
+        best_index = select_best(texts, scores)
+        print(f"🎯 LLM Service: Request {request_id} picked candidate {best_index} (score {scores[best_index]['score']})")
+        
+        return {
+            "response": texts[best_index],
+            "passed": scores[best_index]["passed"],
+            "score": scores[best_index]["score"],
+            "best_index": best_index,
+            "candidates": [
+                {"response": text, "seed": seed, **score}
+                for text, seed, score in zip(texts, candidate_seeds, scores)
+            ],
+            "failed_candidates": len(errors),
+            "scorer": "heuristic" if scorer_fallback else scorer_name,
+            "scorer_fallback": scorer_fallback,
+            "model_tier": self._resolve_model_tier(settings),
+            "prompt_budget": prompt_budget,
+            "request_id": request_id,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _resolve_generation_options(self, settings: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Map request settings onto Ollama options for a single call.
+        
+        A budget in settings["message_type_budgets"] for settings["message_type"]
+        overrides max_tokens and adds stop sequences, and role-marker stops are
+        added for free-text output.
+        """
+        settings = dict(settings or {})
+        budget = (settings.get("message_type_budgets") or {}).get(settings.get("message_type"), {})
+        stop = list(settings.get("stop") or []) + list(budget.get("stop") or [])
+        if LLM_STOP_ON_ROLE_MARKERS and settings.get("format") != "json":
+            stop += ROLE_MARKER_STOP_SEQUENCES
+        settings.update({key: value for key, value in budget.items() if key != "stop"})
+        settings["stop"] = list(dict.fromkeys(stop)) or None
+        
+        options = {}
+        for setting_name, option_name in SETTINGS_TO_OLLAMA_OPTIONS.items():
+            if settings.get(setting_name) is not None:
+                options[option_name] = settings[setting_name]
+        return options
+    
+    def _llm_for_request(self, llm, settings: Optional[Dict[str, Any]]):
+        """
+        Get an LLM runnable configured for one request.
+        
+        Args:
+            llm: Shared client of the backend leased for this request
+        
+        Options are bound to the call rather than set on the shared client, so
+        concurrent requests with different settings never affect each other.
+        """
+        options = self._resolve_generation_options(settings)
+        tier = self._resolve_model_tier(settings)
+        if tier != DEFAULT_MODEL_TIER:
+            options["model"] = OLLAMA_MODEL_TIERS[tier]
+        if not options:
+            return llm
+        return llm.bind(**options)
+    
+    def _resolve_model_tier(self, settings: Optional[Dict[str, Any]]) -> str:
+        """Get the model tier requested in settings, falling back to the default tier."""
+        tier = str((settings or {}).get("model_tier") or DEFAULT_MODEL_TIER).lower()
+        return tier if tier in OLLAMA_MODEL_TIERS else DEFAULT_MODEL_TIER
+    
+    def _next_request_id(self) -> int:
+        """Allocate a request id under the metrics lock."""
+        with self.metrics_lock:
+            self.request_count += 1
+            return self.request_count
+    
+    def _record_cache_hit(self):
+        """Count a response cache hit."""
+        with self.metrics_lock:
+            self.cache_hits += 1
+    
+    def _record_history(self, messages: int, size_bytes: int):
+        """Count the chat history received with a generation request."""
+        with self.metrics_lock:
+            self.history_stats["requests"] += 1
+            self.history_stats["messages_received"] += messages
+            self.history_stats["bytes_received"] += size_bytes
+    
+    def _record_error(self):
+        """Count a failed generation."""
+        with self.metrics_lock:
+            self.error_count += 1
+    
+    def _record_tier_generation(self, tier: str, latency_ms: float = 0.0, failed: bool = False):
+        """Count a generation and its latency against a model tier."""
+        with self.metrics_lock:
+            stats = self.tier_stats[tier]
+            if failed:
+                stats["errors"] += 1
+                return
+            stats["generations"] += 1
+            stats["total_ms"] += latency_ms
+            stats["max_ms"] = max(stats["max_ms"], latency_ms)
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get request, cache, coalescing, scheduler and token usage metrics."""
+        with self.metrics_lock:
+            request_count = self.request_count
+            error_count = self.error_count
+            cache_hits = self.cache_hits
+            prompt_budget = {"budget": LLM_PROMPT_TOKEN_BUDGET, **self.prompt_budget_stats}
+            history = dict(self.history_stats)
+            model_tiers = {
+                tier: {
+                    "model": OLLAMA_MODEL_TIERS[tier],
+                    "generations": stats["generations"],
+                    "errors": stats["errors"],
+                    "avg_latency_ms": round(stats["total_ms"] / max(stats["generations"], 1), 2),
+                    "max_latency_ms": round(stats["max_ms"], 2)
+                }
+                for tier, stats in self.tier_stats.items()
+            }
+        
+        return {
+            "total_requests": request_count,
+            "error_count": error_count,
+            "cache_hits": cache_hits,
+            "cache_hit_rate": cache_hits / max(request_count, 1) * 100,
+            "response_cache": self.response_cache.get_stats() if self.response_cache else None,
+            "semantic_cache": self.semantic_cache.get_stats() if self.semantic_cache else None,
+            "single_flight": self.single_flight.get_stats(),
+            "scheduler": self.scheduler.get_stats(),
+            "backends": self.backends.get_stats(),
+            "http_clients": get_client_stats(),
+            "tracing": get_tracing_stats(),
+            "model_tiers": model_tiers,
+            "prompt_budget": prompt_budget,
+            "history": history,
+            "usage": self.usage.snapshot()
+        }
+    
+    def get_health_status(self) -> Dict[str, Any]:
+        """
+        Get the health status of the LLM service.
+        
+        Built from the background probe's last snapshot; never calls the model.
+        The service reports "degraded" rather than failing while models are still
+        being preloaded.
+        """
+        probe = self.health_probe.snapshot()
+        checks = probe["checks"]
+        
+        # A tier counts as available if any healthy backend has its model
+        healthy_backends = [b for b in checks.get("ollama", {}).get("backends", {}).values() if b.get("healthy")]
+        model_tiers = {
+            tier: {
+                "model": model,
+                "available": any(b.get("tiers", {}).get(tier, False) for b in healthy_backends)
+            }
+            for tier, model in OLLAMA_MODEL_TIERS.items()
+        }
+        
+        if not checks:
+            status = "starting"
+        elif not checks["ollama"]["healthy"]:
+            status = "unhealthy"
+        elif (probe["stale"]
+              or not checks["ollama"].get("model_available", False)
+              or checks["ollama"].get("healthy_backends", 1) < checks["ollama"].get("total_backends", 1)
+              or not all(t["available"] for t in model_tiers.values())
+              or not checks["cache"]["healthy"]
+              or not self.warmer.ready.is_set()):
+            status = "degraded"
+        else:
+            status = "healthy"
+        
+        ollama = checks.get("ollama", {})
+        return {
+            "status": status,
+            "llm": {
+                "model": OLLAMA_MODEL,
+                "base_url": OLLAMA_BASE_URL,
+                "healthy": ollama.get("healthy", False),
+                "model_available": ollama.get("model_available", False),
+                "version": ollama.get("version"),
+                "latency_ms": ollama.get("latency_ms"),
+                "error": ollama.get("error"),
+                "healthy_backends": ollama.get("healthy_backends"),
+                "total_backends": ollama.get("total_backends", len(OLLAMA_BASE_URLS)),
+                "backends": ollama.get("backends", {}),
+                "model_tiers": model_tiers
+            },
+            "cache": checks.get("cache", {"available": self.cache is not None}),
+            "ready": self.warmer.ready.is_set(),
+            "warmup": self.warmer.get_stats(),
+            "probe": {
+                "checked_at": probe["checked_at"],
+                "age_seconds": probe["age_seconds"],
+                "stale": probe["stale"],
+                "interval_seconds": probe["interval_seconds"]
+            },
+            "metrics": self.get_metrics(),
+            "timestamp": datetime.now().isoformat()
+        }
 
 # Global LLM service instance
 llm_service = LLMService()
@@ -273,6 +984,67 @@ def health_check():
             "timestamp": datetime.now().isoformat()
         }), 503
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint: 200 once the default model is loaded on a backend."""
+    warmup = llm_service.warmer.get_stats()
+    return jsonify({
+        "ready": warmup["ready"],
+        "warmup": warmup,
+        "timestamp": datetime.now().isoformat()
+    }), 200 if warmup["ready"] else 503
+
+def _to_chat_message(message: Dict[str, Any], speaker: Optional[str]):
+    """
+    Convert a shared-schema message to a LangChain message.
+    
+    When the request names the character being voiced (speaker), the other
+    characters' lines are attributed user turns, so the model only sees its own
+    lines as its own.
+    """
+    if message["role"] == "system":
+        return SystemMessage(content=message["content"])
+    if message["role"] == "user":
+        return HumanMessage(content=message["content"])
+    if speaker and message["character"] and message["character"] != speaker.lower():
+        return HumanMessage(content=f"{message['character'].title()}: {message['content']}")
+    return AIMessage(content=message["content"])
+
+def _parse_generate_request(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a /generate style JSON payload into generate_response() arguments.
+    
+    Raises:
+        MessageFormatError: If a chat_history entry does not fit the shared message schema
+    """
+    history = normalize_history(data.get('chat_history'))
+    llm_service._record_history(len(history), encoded_size(data.get('chat_history')))
+    # The current message is sent as user_message; a copy at the end of the history would repeat the turn
+    history = without_current_turn(history, data.get('user_message'))
+    formatted_history = [_to_chat_message(message, data.get('character')) for message in history]
+    
+    # Model tier and message type travel with the settings so they are part of the response cache key
+    settings = dict(data.get('settings') or {})
+    for field in ('model_tier', 'message_type'):
+        if data.get(field):
+            settings[field] = data[field]
+    
+    return {
+        "prompt": data['prompt'],
+        "user_message": data.get('user_message'),
+        "chat_history": formatted_history,
+        "settings": settings,
+        "priority": data.get('priority'),
+        # Usage metrics are broken down by these; they do not affect generation
+        "labels": {"caller": data.get('caller'), "character": data.get('character')}
+    }
+
+def _response_schema(data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Get the requested output schema when structured (JSON) output is requested."""
+    if data.get('format') != 'json':
+        return None
+    return data.get('schema') or {"type": "object"}
+
 @app.route('/generate', methods=['POST'])
 def generate_response():
     """Generate a response using the LLM."""
@@ -284,31 +1056,21 @@ def generate_response():
                 "error": "Missing required field: prompt"
             }), 400
         
-        prompt = data['prompt']
-        user_message = data.get('user_message')
-        chat_history = data.get('chat_history', [])
-        settings = data.get('settings', {})
-        
-        # Convert chat history to proper format if needed
-        formatted_history = []
-        for msg in chat_history:
-            if isinstance(msg, dict):
-                if msg.get('type') == 'human':
-                    formatted_history.append(HumanMessage(content=msg['content']))
-                elif msg.get('type') == 'ai':
-                    formatted_history.append(AIMessage(content=msg['content']))
-            else:
-                formatted_history.append(msg)
-        
-        result = llm_service.generate_response(
-            prompt=prompt,
-            user_message=user_message,
-            chat_history=formatted_history,
-            settings=settings
-        )
+        result = llm_service.generate_response(**_parse_generate_request(data), response_schema=_response_schema(data))
         
         return jsonify(result), 200
         
+    except MessageFormatError as e:
+        return jsonify({
+            "error": f"Invalid chat_history: {e}"
+        }), 400
+    except SchedulerRejected as e:
+        return jsonify({
+            "error": str(e),
+            "shed": True,
+            "priority": e.priority,
+            "timestamp": datetime.now().isoformat()
+        }), 503, {"Retry-After": "5"}
     except Exception as e:
         print(f"❌ LLM Service: Error in generate endpoint: {e}")
         return jsonify({
@@ -316,12 +1078,117 @@ def generate_response():
             "timestamp": datetime.now().isoformat()
         }), 500
 
+@app.route('/generate/batch', methods=['POST'])
+def generate_batch():
+    """Generate responses for several independent requests in one round-trip."""
+    try:
+        data = request.get_json(silent=True)
+        items = data.get('requests') if isinstance(data, dict) else None
+        
+        if not isinstance(items, list) or not items:
+            return jsonify({
+                "error": "Missing required field: requests (non-empty list)"
+            }), 400
+        
+        if len(items) > LLM_BATCH_MAX_ITEMS:
+            return jsonify({
+                "error": f"Batch too large: {len(items)} requests (max {LLM_BATCH_MAX_ITEMS})"
+            }), 400
+        
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or 'prompt' not in item:
+                return jsonify({
+                    "error": f"Missing required field: prompt (request {index})"
+                }), 400
+        
+        # A top-level priority applies to items that do not set their own
+        generation_requests = [
+            {**_parse_generate_request({"priority": data.get('priority'), **item}), "response_schema": _response_schema(item)}
+            for item in items
+        ]
+        
+        return jsonify(llm_service.generate_batch(generation_requests)), 200
+    
+    except MessageFormatError as e:
+        return jsonify({
+            "error": f"Invalid chat_history: {e}"
+        }), 400
+    except Exception as e:
+        print(f"❌ LLM Service: Error in batch endpoint: {e}")
+        return jsonify({
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }), 500
+
+@app.route('/generate/best-of', methods=['POST'])
+def generate_best_of():
+    """Generate several candidates in parallel and return the best-scoring one."""
+    try:
+        data = request.get_json()
+        
+        if not data or 'prompt' not in data:
+            return jsonify({
+                "error": "Missing required field: prompt"
+            }), 400
+        
+        result = llm_service.generate_best_of(
+            **_parse_generate_request(data),
+            n=int(data.get('n', 3)),
+            scorer=data.get('scorer', 'heuristic'),
+            scorer_context=data.get('scorer_context', {})
+        )
+        
+        return jsonify(result), 200
+    
+    except MessageFormatError as e:
+        return jsonify({
+            "error": f"Invalid chat_history: {e}"
+        }), 400
+    except SchedulerRejected as e:
+        return jsonify({
+            "error": str(e),
+            "shed": True,
+            "priority": e.priority,
+            "timestamp": datetime.now().isoformat()
+        }), 503, {"Retry-After": "5"}
+    except Exception as e:
+        print(f"❌ LLM Service: Error in best-of endpoint: {e}")
+        return jsonify({
+            "error": str(e),
+            "timestamp": datetime.now().isoformat()
+        }), 500
+
+@app.route('/generate/stream', methods=['POST'])
+def generate_response_stream():
+    """Stream a generated response as newline-delimited JSON events."""
+    data = request.get_json(silent=True)
+    
+    if not data or 'prompt' not in data:
+        return jsonify({
+            "error": "Missing required field: prompt"
+        }), 400
+    
+    try:
+        generation_args = _parse_generate_request(data)
+    except MessageFormatError as e:
+        return jsonify({
+            "error": f"Invalid chat_history: {e}"
+        }), 400
+    
+    def event_stream():
+        for event in llm_service.stream_response(**generation_args):
+            yield json.dumps(event) + "\n"
+    
+    return Response(stream_with_context(event_stream()), mimetype="application/x-ndjson")
+
 @app.route('/models', methods=['GET'])
 def get_models():
     """Get information about available models."""
     return jsonify({
         "current_model": OLLAMA_MODEL,
+        "model_tiers": OLLAMA_MODEL_TIERS,
         "base_url": OLLAMA_BASE_URL,
+        "backends": OLLAMA_BASE_URLS,
         "capabilities": [
             "text_generation",
             "conversation",
@@ -334,9 +1201,8 @@ def get_models():
 def get_metrics():
     """Get service metrics."""
     try:
-        health_status = llm_service.get_health_status()
         return jsonify({
-            "metrics": health_status.get("metrics", {}),
+            "metrics": llm_service.get_metrics(),
             "timestamp": datetime.now().isoformat()
         }), 200
     except Exception as e:
@@ -347,14 +1213,25 @@ def get_metrics():
 
 @app.route('/cache/clear', methods=['POST'])
 def clear_cache():
-    """Clear the LLM response cache."""
+    """Clear the LLM response cache, or only one character's responses with {"character": ...}."""
     try:
+        data = request.get_json(silent=True) or {}
+        character = data.get('character')
+        if character and character.lower() not in CHARACTERS:
+            return jsonify({
+                "error": f"Unknown character: {character}"
+            }), 400
+        
         if llm_service.cache:
-            # Clear LLM-specific cache keys
-            # Note: This is a simple implementation - in production you'd want more sophisticated cache management
-            llm_service.cache_hits = 0
+            version = llm_service.invalidate_cache(character)
+            if version is None:
+                return jsonify({
+                    "error": "Cache invalidation failed",
+                    "timestamp": datetime.now().isoformat()
+                }), 500
             return jsonify({
-                "message": "Cache cleared successfully",
+                "message": f"Cache cleared for {character.lower() if character else 'all characters'}",
+                "namespace_version": version,
                 "timestamp": datetime.now().isoformat()
             }), 200
         else:
@@ -0,0 +1,154 @@
+"""
+Single-flight request coalescing for the LLM service.
+Identical generations that arrive while one is already running share its result
+instead of each going to Ollama.
+"""
+
+import time
+import uuid
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+class _InFlightCall:
+    """A generation currently running in this process."""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key.
+    
+    Within a process, followers block on the leader's call. Across workers, the
+    leader holds a short-lived KeyDB lock and followers poll for the result the
+    leader publishes, falling back to running the call themselves if the leader
+    disappears or takes too long.
+    """
+    
+    ROLE_LEADER = "leader"
+    ROLE_LOCAL_FOLLOWER = "local_follower"
+    ROLE_REMOTE_FOLLOWER = "remote_follower"
+    
+    def __init__(self, cache=None, lock_ttl: int = 120, wait_timeout: float = 90.0, poll_interval: float = 0.1):
+        """
+        Initialize the coalescer.
+        
+        Args:
+            cache: Optional BotCache used for the cross-worker lock
+            lock_ttl: Seconds before an abandoned cross-worker lock expires
+            wait_timeout: Maximum seconds a follower waits for another worker's result
+            poll_interval: Seconds between polls while waiting on another worker
+        """
+        self.cache = cache
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _InFlightCall] = {}
+        
+        self.leader_runs = 0
+        self.local_followers = 0
+        self.remote_followers = 0
+        self.remote_wait_timeouts = 0
+    
+    def do(self, key: str, fn: Callable[[], Any], fetch: Optional[Callable[[], Any]] = None) -> Tuple[Any, str]:
+        """
+        Run fn once for all concurrent callers with the same key.
+        
+        Args:
+            key: Coalescing key (the response cache key)
+            fn: Produces the result; must publish it where fetch can see it
+                before returning when cross-worker coalescing is used
+            fetch: Looks up a result published by another worker, or None
+        
+        Returns:
+            Tuple of (result, role) where role says how the result was obtained
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.local_followers += 1
+                leader = False
+            else:
+                call = _InFlightCall()
+                self._calls[key] = call
+                leader = True
+        
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, self.ROLE_LOCAL_FOLLOWER
+        
+        try:
+            result, role = self._run_leader(key, fn, fetch)
+            call.result = result
+            return result, role
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+    
+    def _run_leader(self, key: str, fn: Callable[[], Any], fetch: Optional[Callable[[], Any]]) -> Tuple[Any, str]:
+        """Run fn as this process's leader, coordinating with other workers via KeyDB."""
+        if not self.cache or fetch is None:
+            return self._run(fn), self.ROLE_LEADER
+        
+        lock_key = f"singleflight:{key}"
+        token = uuid.uuid4().hex
+        if self.cache.set_if_absent(lock_key, token, ttl=self.lock_ttl):
+            try:
+                return self._run(fn), self.ROLE_LEADER
+            finally:
+                if self.cache.get(lock_key) == token:
+                    self.cache.delete(lock_key)
+        
+        # Another worker is generating this response; wait for it to publish
+        deadline = time.time() + self.wait_timeout
+        while time.time() < deadline:
+            result = fetch()
+            if result is not None:
+                with self._lock:
+                    self.remote_followers += 1
+                return result, self.ROLE_REMOTE_FOLLOWER
+            if not self.cache.exists(lock_key):
+                # The other worker finished without publishing (e.g. it failed)
+                result = fetch()
+                if result is not None:
+                    with self._lock:
+                        self.remote_followers += 1
+                    return result, self.ROLE_REMOTE_FOLLOWER
+                break
+            time.sleep(self.poll_interval)
+        else:
+            with self._lock:
+                self.remote_wait_timeouts += 1
+        
+        return self._run(fn), self.ROLE_LEADER
+    
+    def _run(self, fn: Callable[[], Any]) -> Any:
+        """Run fn and count it as a real generation."""
+        with self._lock:
+            self.leader_runs += 1
+        return fn()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters."""
+        with self._lock:
+            saved = self.local_followers + self.remote_followers
+            return {
+                "in_flight": len(self._calls),
+                "generations_run": self.leader_runs,
+                "local_followers": self.local_followers,
+                "remote_followers": self.remote_followers,
+                "remote_wait_timeouts": self.remote_wait_timeouts,
+                "generations_saved": saved
+            }
@@ -0,0 +1,81 @@
+"""
+Structured (JSON) output support for the LLM service.
+Validates model output against a small subset of JSON Schema: type, properties,
+required, enum, items, minimum and maximum.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+_TYPE_CHECKS = {
+    "object": lambda v: isinstance(v, dict),
+    "array": lambda v: isinstance(v, list),
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "null": lambda v: v is None
+}
+
+
+def validate(instance: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """
+    Validate an instance against a schema.
+    
+    Returns:
+        List of validation errors, empty if the instance is valid
+    """
+    errors = []
+    
+    expected = schema.get("type")
+    if expected:
+        types = expected if isinstance(expected, list) else [expected]
+        if not any(_TYPE_CHECKS.get(t, lambda v: True)(instance) for t in types):
+            return [f"{path}: expected {' or '.join(types)}, got {type(instance).__name__}"]
+    
+    if "enum" in schema and instance not in schema["enum"]:
+        errors.append(f"{path}: {instance!r} is not one of {schema['enum']}")
+    
+    if isinstance(instance, (int, float)) and not isinstance(instance, bool):
+        if "minimum" in schema and instance < schema["minimum"]:
+            errors.append(f"{path}: {instance} is less than {schema['minimum']}")
+        if "maximum" in schema and instance > schema["maximum"]:
+            errors.append(f"{path}: {instance} is greater than {schema['maximum']}")
+    
+    if isinstance(instance, dict):
+        for name in schema.get("required", []):
+            if name not in instance:
+                errors.append(f"{path}.{name}: required property missing")
+        for name, property_schema in schema.get("properties", {}).items():
+            if name in instance:
+                errors.extend(validate(instance[name], property_schema, f"{path}.{name}"))
+    
+    if isinstance(instance, list) and "items" in schema:
+        for index, item in enumerate(instance):
+            errors.extend(validate(item, schema["items"], f"{path}[{index}]"))
+    
+    return errors
+
+
+def parse_structured(text: str, schema: Dict[str, Any]) -> Tuple[Optional[Any], List[str]]:
+    """
+    Parse model output as JSON and validate it.
+    
+    Returns:
+        Tuple of (parsed value or None, validation errors)
+    """
+    try:
+        parsed = json.loads(text)
+    except (TypeError, ValueError) as e:
+        return None, [f"invalid JSON: {e}"]
+    
+    errors = validate(parsed, schema)
+    return (parsed if not errors else None), errors
+
+
+def schema_instructions(schema: Dict[str, Any]) -> str:
+    """Prompt suffix telling the model which JSON shape to produce."""
+    return (
+        "\n\nRespond ONLY with a single JSON object matching this JSON schema, with no other text:\n"
+        f"{json.dumps(schema, sort_keys=True)}"
+    )
@@ -0,0 +1,144 @@
+"""
+Per-generation token and timing accounting for the LLM service.
+Ollama reports token counts and phase durations with every completed generation;
+these are combined with the service's own queue-wait and cache-lookup times and
+aggregated into histograms per caller, character and model.
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+TOKEN_BUCKETS = [16, 32, 64, 128, 256, 512, 1024, 2048, 4096]
+MS_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+# Recorded value -> histogram buckets
+USAGE_METRICS = {
+    "prompt_tokens": TOKEN_BUCKETS,
+    "completion_tokens": TOKEN_BUCKETS,
+    "prompt_eval_ms": MS_BUCKETS,
+    "eval_ms": MS_BUCKETS,
+    "load_ms": MS_BUCKETS,
+    "total_ms": MS_BUCKETS,
+    "queue_wait_ms": MS_BUCKETS,
+    "cache_lookup_ms": MS_BUCKETS
+}
+
+# Label names used to break the histograms down
+USAGE_DIMENSIONS = ("caller", "character", "model")
+
+# Ollama's final-response fields -> recorded values (durations are in nanoseconds)
+_OLLAMA_FIELDS = {
+    "prompt_eval_count": ("prompt_tokens", 1),
+    "eval_count": ("completion_tokens", 1),
+    "prompt_eval_duration": ("prompt_eval_ms", 1e-6),
+    "eval_duration": ("eval_ms", 1e-6),
+    "load_duration": ("load_ms", 1e-6),
+    "total_duration": ("total_ms", 1e-6)
+}
+
+
+def ollama_usage(generation_info: Optional[Dict[str, Any]]) -> Dict[str, float]:
+    """Extract token counts and durations (in ms) from an Ollama final response."""
+    usage = {}
+    for field, (name, scale) in _OLLAMA_FIELDS.items():
+        value = (generation_info or {}).get(field)
+        if value is not None:
+            usage[name] = value * scale
+    return usage
+
+
+class OllamaUsageCallback(BaseCallbackHandler):
+    """Captures Ollama's usage fields when a generation (invoke or stream) completes."""
+    
+    def __init__(self):
+        self.usage: Dict[str, float] = {}
+    
+    def on_llm_end(self, response, **kwargs):
+        """Keep the usage fields of the final generation."""
+        for generations in response.generations:
+            for generation in generations:
+                self.usage.update(ollama_usage(generation.generation_info))
+
+
+class Histogram:
+    """Fixed-bucket histogram with cumulative counts, like a Prometheus histogram."""
+    
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+    
+    def observe(self, value: float):
+        """Add one observation."""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Count, sum, average, maximum and cumulative bucket counts."""
+        cumulative, buckets = 0, []
+        for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+            cumulative += count
+            buckets.append({"le": bound, "count": cumulative})
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 2),
+            "avg": round(self.sum / self.count, 2) if self.count else 0.0,
+            "max": round(self.max, 2),
+            "buckets": buckets
+        }
+
+
+class UsageRecorder:
+    """Thread-safe usage histograms, overall and per label value."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._overall: Dict[str, Histogram] = {}
+        self._by_dimension: Dict[str, Dict[str, Dict[str, Histogram]]] = {d: {} for d in USAGE_DIMENSIONS}
+    
+    @staticmethod
+    def _observe(histograms: Dict[str, Histogram], values: Dict[str, float]):
+        """Observe values into a histogram set (caller holds the lock)."""
+        for name, value in values.items():
+            if name not in histograms:
+                histograms[name] = Histogram(USAGE_METRICS[name])
+            histograms[name].observe(value)
+    
+    def record(self, labels: Dict[str, Optional[str]], values: Dict[str, float]):
+        """
+        Record usage values for one request.
+        
+        Args:
+            labels: caller, character and model; missing labels count as "unknown"
+            values: Names from USAGE_METRICS -> value; other names are ignored
+        """
+        values = {name: value for name, value in values.items() if name in USAGE_METRICS}
+        if not values:
+            return
+        
+        with self._lock:
+            self._observe(self._overall, values)
+            for dimension in USAGE_DIMENSIONS:
+                label = str(labels.get(dimension) or "unknown")
+                self._observe(self._by_dimension[dimension].setdefault(label, {}), values)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Histograms overall and per caller, character and model."""
+        with self._lock:
+            return {
+                "overall": {name: h.snapshot() for name, h in self._overall.items()},
+                **{
+                    f"by_{dimension}": {
+                        label: {name: h.snapshot() for name, h in histograms.items()}
+                        for label, histograms in by_label.items()
+                    }
+                    for dimension, by_label in self._by_dimension.items()
+                }
+            }
@@ -0,0 +1,198 @@
+"""
+Model preloading and warm-keeping for the LLM service.
+Models are loaded on a background thread so startup never blocks on Ollama, and
+idle backends are pinged during active hours so Ollama does not unload the model
+between conversations.
+"""
+
+import time
+import threading
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from src.shared.service_client import get_client
+
+
+def preload_model(base_url: str, model: str, keep_alive: str, timeout: float = 300.0):
+    """
+    Load a model into memory (or refresh its keep-alive) without generating.
+    
+    Ollama treats a generate request without a prompt as a load request.
+    """
+    # The warmer retries failed preloads on its own schedule
+    response = get_client(base_url).post(
+        "/api/generate",
+        json={"model": model, "keep_alive": keep_alive},
+        timeout=timeout,
+        retries=0
+    )
+    response.raise_for_status()
+
+
+def parse_active_hours(spec: Optional[str]) -> Optional[Tuple[int, int]]:
+    """
+    Parse an "START-END" hour range such as "8-23" or "22-6".
+    
+    Returns:
+        (start, end) hours, or None for an empty spec (always active)
+    
+    Raises:
+        ValueError: If the spec is malformed
+    """
+    if not spec or not spec.strip():
+        return None
+    start, end = (int(part) for part in spec.split("-", 1))
+    if not (0 <= start <= 23 and 0 <= end <= 24):
+        raise ValueError(f"Invalid active hours: {spec}")
+    return start, end
+
+
+def in_active_hours(hours: Optional[Tuple[int, int]], now: Optional[datetime] = None) -> bool:
+    """Whether the current local hour is inside the range; ranges may wrap past midnight."""
+    if hours is None:
+        return True
+    hour = (now or datetime.now()).hour
+    start, end = hours
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end
+
+
+class ModelWarmer:
+    """
+    Preloads models on every backend and keeps them resident.
+    
+    The service is ready once the first model is loaded on any backend; backends
+    that fail to load are retried. Meanwhile, loaded models that have not served a
+    generation for ping_interval seconds are pinged during active hours to refresh
+    Ollama's keep-alive.
+    """
+    
+    def __init__(self, base_urls: List[str], models: List[str], keep_alive: str = "30m", ping_interval: float = 240.0, active_hours: Optional[Tuple[int, int]] = None, retry_interval: float = 10.0, preload: Callable[[str, str, str], None] = preload_model):
+        """
+        Initialize the warmer.
+        
+        Args:
+            base_urls: Ollama base URLs
+            models: Models to keep loaded; the first one gates readiness
+            keep_alive: Ollama keep_alive sent with preloads and pings
+            ping_interval: Idle seconds before a backend is pinged (0 disables pings)
+            active_hours: (start, end) local hours during which pings are sent, None for always
+            retry_interval: Seconds between preload attempts for backends that failed
+            preload: Loads one model on one backend, raising on failure
+        """
+        self.base_urls = base_urls
+        self.models = list(dict.fromkeys(models))
+        self.keep_alive = keep_alive
+        self.ping_interval = ping_interval
+        self.active_hours = active_hours
+        self.retry_interval = retry_interval
+        self.preload = preload
+        
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._started_at = time.time()
+        self._ready_at: Optional[float] = None
+        self._loaded = set()
+        self._last_activity = {(url, model): 0.0 for url in base_urls for model in self.models}
+        self._stats = {"preloads": 0, "pings": 0, "failures": 0, "last_error": None}
+    
+    def start(self):
+        """Start preloading in a daemon thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="llm-model-warmer", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+    
+    def note_activity(self, base_url: str, model: str):
+        """Record that a backend served a generation, which also refreshes the model's keep-alive."""
+        with self._lock:
+            self._last_activity[(base_url, model)] = time.time()
+    
+    def _load(self, base_url: str, model: str, kind: str) -> bool:
+        """Preload or ping one model on one backend, recording the outcome."""
+        try:
+            self.preload(base_url, model, self.keep_alive)
+        except Exception as e:
+            with self._lock:
+                self._stats["failures"] += 1
+                self._stats["last_error"] = f"{base_url} {model}: {e}"
+            return False
+        
+        with self._lock:
+            self._stats[kind] += 1
+            self._last_activity[(base_url, model)] = time.time()
+        return True
+    
+    def preload_pending(self) -> bool:
+        """
+        Try to load every model that is not loaded yet.
+        
+        Returns:
+            True once every model is loaded on every backend
+        """
+        for base_url in self.base_urls:
+            for model in self.models:
+                if (base_url, model) in self._loaded or self._stop.is_set():
+                    continue
+                if self._load(base_url, model, "preloads"):
+                    with self._lock:
+                        self._loaded.add((base_url, model))
+                    print(f"🔥 LLM Service: Loaded {model} on {base_url}")
+                    if model == self.models[0] and not self.ready.is_set():
+                        self._ready_at = time.time()
+                        self.ready.set()
+                        print(f"✅ LLM Service: Ready after {self._ready_at - self._started_at:.1f}s")
+        return len(self._loaded) == len(self.base_urls) * len(self.models)
+    
+    def ping_idle(self, now: Optional[float] = None):
+        """
+        Refresh the keep-alive of loaded models idle for at least ping_interval during active hours.
+        
+        Models that are not loaded yet are left to preload_pending.
+        """
+        if self.ping_interval <= 0 or not in_active_hours(self.active_hours):
+            return
+        now = now or time.time()
+        with self._lock:
+            idle = [key for key, last in self._last_activity.items() if key in self._loaded and now - last >= self.ping_interval]
+        for base_url, model in idle:
+            self._load(base_url, model, "pings")
+    
+    def _run(self):
+        """
+        Retry pending preloads and ping idle loaded models until stopped.
+        
+        Pings do not wait for every preload to succeed, so a backend that never
+        loads does not stop the others from being kept warm.
+        """
+        while True:
+            all_loaded = self.preload_pending()
+            self.ping_idle()
+            if all_loaded and self.ping_interval <= 0:
+                return
+            if self._stop.wait(min(self.ping_interval, 60) if all_loaded else self.retry_interval):
+                return
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get readiness and warm-keeping statistics."""
+        with self._lock:
+            now = time.time()
+            return {
+                "ready": self.ready.is_set(),
+                "startup_seconds": round(self._ready_at - self._started_at, 2) if self._ready_at else None,
+                "loaded": sorted(f"{model}@{url}" for url, model in self._loaded),
+                "keep_alive": self.keep_alive,
+                "ping_interval_seconds": self.ping_interval,
+                "active_now": in_active_hours(self.active_hours),
+                "idle_seconds": {f"{model}@{url}": round(now - last, 1) if last else None for (url, model), last in self._last_activity.items()},
+                **self._stats
+            }
@@ -0,0 +1,110 @@
+"""
+Idempotent orchestration for the message router.
+A client that retries /orchestrate with the same idempotency key attaches to the
+original run, or gets its stored result, instead of generating the reply again.
+"""
+
+import time
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+
+class IdempotentResults:
+    """
+    Runs keyed calls at most once at a time and remembers their successful results.
+    
+    The first caller for a key claims it in KeyDB (SET NX) and runs the call.
+    Callers that arrive while it runs poll for the result, and callers that arrive
+    afterwards get the stored result. Failed results are not stored and the claim is
+    released, so a retry after a failure runs the call again. When the cache cannot
+    be reached the call runs without deduplication.
+    """
+    
+    STATUS_NEW = "new"
+    STATUS_ATTACHED = "attached"
+    STATUS_REPLAYED = "replayed"
+    STATUS_IN_PROGRESS = "in_progress"
+    STATUS_BYPASSED = "bypassed"
+    
+    def __init__(self, cache, result_ttl: int = 600, lock_ttl: int = 120, wait_timeout: float = 25.0, poll_interval: float = 0.1):
+        """
+        Initialize the store.
+        
+        Args:
+            cache: BotCache holding claims and results (shared by all workers)
+            result_ttl: Seconds a successful result is kept for replays
+            lock_ttl: Seconds before the claim of a run that died expires
+            wait_timeout: Maximum seconds a retry waits for the original run; should stay
+                below the client's own timeout so the retry is not abandoned too
+            poll_interval: Seconds between polls while waiting
+        """
+        self.cache = cache
+        self.result_ttl = result_ttl
+        self.lock_ttl = lock_ttl
+        self.wait_timeout = wait_timeout
+        self.poll_interval = poll_interval
+        
+        self._lock = threading.Lock()
+        self._stats = {"runs": 0, "attached": 0, "replayed": 0, "still_in_progress": 0, "bypassed": 0}
+    
+    def run(self, key: str, fn: Callable[[], Dict[str, Any]]) -> Tuple[Dict[str, Any], str]:
+        """
+        Run fn for the key unless it is already running or has already succeeded.
+        
+        Args:
+            key: Idempotency key (scoped by the caller)
+            fn: Produces the result; results with "success": True are stored
+        
+        Returns:
+            Tuple of (result, status). With STATUS_IN_PROGRESS the original run is
+            still going after wait_timeout and the result is None. With
+            STATUS_BYPASSED the cache failed and fn ran without a claim.
+        """
+        record_key = f"orchestrate:{key}"
+        deadline = time.time() + self.wait_timeout
+        waited = False
+        
+        while True:
+            record = self.cache.get(record_key)
+            if record and record.get("state") == "done":
+                status = self.STATUS_ATTACHED if waited else self.STATUS_REPLAYED
+                self._count(status)
+                return record["result"], status
+            
+            if record is None:
+                if self.cache.set_if_absent(record_key, {"state": "running", "started": time.time()}, ttl=self.lock_ttl):
+                    return self._run(record_key, fn), self.STATUS_NEW
+                # BotCache reports errors as a missing key and a failed claim, so only a cache
+                # that does not answer a ping is treated as down; otherwise the claim is retried
+                if not self.cache.ping():
+                    self._count("bypassed")
+                    return fn(), self.STATUS_BYPASSED
+            
+            # Another request holds the claim; wait for its result or for the claim to go away
+            if time.time() >= deadline:
+                self._count("still_in_progress")
+                return None, self.STATUS_IN_PROGRESS
+            waited = True
+            time.sleep(self.poll_interval)
+    
+    def _run(self, record_key: str, fn: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run fn under the claim and store its result if it succeeded."""
+        self._count("runs")
+        result = None
+        try:
+            result = fn()
+            return result
+        finally:
+            if result and result.get("success"):
+                self.cache.set(record_key, {"state": "done", "result": result}, ttl=self.result_ttl)
+            else:
+                self.cache.delete(record_key)
+    
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get run, attach, replay and bypass counters."""
+        with self._lock:
+            return dict(self._stats)
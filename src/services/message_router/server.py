@@ -4,8 +4,10 @@ import traceback
 import random
 import time
 import threading
+import queue
 from datetime import datetime, timedelta
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Callable
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 import redis
@@ -27,6 +29,12 @@ import sys
 import os.path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from utils.retry_manager import retry_sync, RetryConfig
+from src.shared.messages import MessageFormatError, normalize_history, speaker, to_wire
+from src.services.message_router.idempotency import IdempotentResults
+from src.shared.circuit_breaker import get_adaptive_timeout, get_breaker, get_breaker_stats
+from src.shared.health_probe import HealthProbe, check_cache, check_http
+from src.shared.service_client import get_client, get_client_stats
+from src.shared.tracing import init_tracing, get_tracing_stats, span, wrap
 
 # Load environment variables
 load_dotenv()
@@ -50,10 +58,124 @@ STEWIE_DISCORD_URL = os.getenv("STEWIE_DISCORD_URL", "http://stewie-discord:6013
 # Cache configuration
 ROUTING_CACHE_TTL = int(os.getenv("ROUTING_CACHE_TTL", "300"))  # 5 minutes
 
+# Parallel orchestration configuration (per-stage timeouts in seconds)
+ROUTER_STAGE_WORKERS = int(os.getenv("ROUTER_STAGE_WORKERS", "16"))
+ROUTER_STAGE_TIMEOUTS = {
+    "coordinator": float(os.getenv("ROUTER_COORDINATOR_TIMEOUT", "10")),
+    "character_config": float(os.getenv("ROUTER_CHARACTER_CONFIG_TIMEOUT", "10")),
+    "rag": float(os.getenv("ROUTER_RAG_TIMEOUT", "8")),
+    "fine_tuning": float(os.getenv("ROUTER_FINE_TUNING_TIMEOUT", "10"))
+}
+
+# Endpoints that always get the caller's timeout: generation time depends on the
+# requested length, so a p99 learned from short replies would cut off long ones
+FIXED_TIMEOUT_ENDPOINTS = {"/generate", "/generate/stream", "/generate/batch"}
+
+# Background post-processing configuration
+POST_PROCESSING_QUEUE_SIZE = int(os.getenv("ROUTER_POST_PROCESSING_QUEUE_SIZE", "200"))
+POST_PROCESSING_WORKERS = int(os.getenv("ROUTER_POST_PROCESSING_WORKERS", "2"))
+
+# Background dependency health probing (seconds)
+ROUTER_HEALTH_INTERVAL = float(os.getenv("ROUTER_HEALTH_INTERVAL", "15"))
+ROUTER_HEALTH_TIMEOUT = float(os.getenv("ROUTER_HEALTH_TIMEOUT", "3"))
+
+# Idempotent /orchestrate: results of retried requests are shared instead of regenerated
+ROUTER_IDEMPOTENCY_TTL = int(os.getenv("ROUTER_IDEMPOTENCY_TTL", "600"))
+ROUTER_IDEMPOTENCY_LOCK_TTL = int(os.getenv("ROUTER_IDEMPOTENCY_LOCK_TTL", "120"))
+ROUTER_IDEMPOTENCY_WAIT = float(os.getenv("ROUTER_IDEMPOTENCY_WAIT", "25"))
+
 # --- Flask App ---
 app = Flask(__name__)
+init_tracing(app, "message-router")
 logging.basicConfig(level=logging.INFO)
 
+class PostProcessingPipeline:
+    """
+    Bounded in-process queue drained by background workers.
+    
+    Used for work that must not delay the reply (quality metrics, conversation
+    storage, fine-tuning feedback). When the queue is full new jobs are dropped
+    instead of blocking the caller, and every outcome is counted.
+    """
+    
+    def __init__(self, handler: Callable[[Dict[str, Any]], None], max_size: int = 200, workers: int = 2, name: str = "post-processing"):
+        """
+        Initialize the pipeline and start its worker threads.
+        
+        Args:
+            handler: Callable invoked with each queued job
+            max_size: Maximum number of pending jobs before new ones are dropped
+            workers: Number of daemon worker threads draining the queue
+            name: Name used for worker threads and logging
+        """
+        self.handler = handler
+        self.name = name
+        self.jobs = queue.Queue(maxsize=max_size)
+        self.stats_lock = threading.Lock()
+        self.enqueued = 0
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+        self.max_queue_depth = 0
+        
+        for i in range(workers):
+            worker = threading.Thread(target=self._worker, name=f"{name}-{i}", daemon=True)
+            worker.start()
+    
+    def submit(self, job: Dict[str, Any]) -> bool:
+        """
+        Queue a job without blocking.
+        
+        Returns:
+            True if the job was queued, False if it was dropped due to backpressure
+        """
+        try:
+            # Jobs run under the trace of the request that queued them
+            self.jobs.put_nowait((wrap(self._handle), job))
+        except queue.Full:
+            with self.stats_lock:
+                self.dropped += 1
+            print(f"⚠️ Message Router: {self.name} queue full ({self.jobs.maxsize}), dropping job")
+            return False
+        
+        with self.stats_lock:
+            self.enqueued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.jobs.qsize())
+        return True
+    
+    def _worker(self):
+        """Drain jobs from the queue forever."""
+        while True:
+            handle, job = self.jobs.get()
+            try:
+                handle(job)
+                with self.stats_lock:
+                    self.processed += 1
+            except Exception as e:
+                with self.stats_lock:
+                    self.failed += 1
+                print(f"❌ Message Router: {self.name} job failed: {e}")
+            finally:
+                self.jobs.task_done()
+    
+    def _handle(self, job: Dict[str, Any]):
+        """Run one job as a span."""
+        with span(self.name):
+            self.handler(job)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and job counters."""
+        with self.stats_lock:
+            return {
+                "queue_depth": self.jobs.qsize(),
+                "queue_capacity": self.jobs.maxsize,
+                "max_queue_depth": self.max_queue_depth,
+                "enqueued": self.enqueued,
+                "processed": self.processed,
+                "failed": self.failed,
+                "dropped": self.dropped
+            }
+
 class MessageRouter:
     """
     Central message routing service that coordinates between all microservices.
@@ -72,6 +194,16 @@ class MessageRouter:
         self.active_retry_threads = 0
         self.max_concurrent_retries = 3  # Limit to 3 concurrent retry threads
         
+        # Shared pool for running independent orchestration stages concurrently
+        self.stage_executor = ThreadPoolExecutor(max_workers=ROUTER_STAGE_WORKERS, thread_name_prefix="router-stage")
+        
+        # Metrics and learning calls are drained in the background after the reply is returned
+        self.post_processing = PostProcessingPipeline(
+            self._post_process_response,
+            max_size=POST_PROCESSING_QUEUE_SIZE,
+            workers=POST_PROCESSING_WORKERS
+        )
+        
         # Initialize cache if available
         if CACHE_AVAILABLE:
             self.cache = get_cache("message_router")
@@ -80,8 +212,31 @@ class MessageRouter:
         # Initialize KeyDB connection instead of MongoDB
         self.redis_client = self._initialize_keydb()
         
-        # Service health status
-        self.service_health = {}
+        # Retried /orchestrate calls attach to the original run instead of generating again
+        self.idempotent_results = IdempotentResults(
+            self.cache,
+            result_ttl=ROUTER_IDEMPOTENCY_TTL,
+            lock_ttl=ROUTER_IDEMPOTENCY_LOCK_TTL,
+            wait_timeout=ROUTER_IDEMPOTENCY_WAIT
+        ) if self.cache else None
+        
+        # Dependencies are probed concurrently in the background; /health reads the snapshot
+        services = {
+            "llm_service": LLM_SERVICE_URL,
+            "character_config": CHARACTER_CONFIG_URL,
+            "rag_retriever": RAG_RETRIEVER_URL,
+            "conversation_coordinator": CONVERSATION_COORDINATOR_URL,
+            "quality_control": QUALITY_CONTROL_URL,
+            "fine_tuning": FINE_TUNING_URL
+        }
+        checks = {
+            name: (lambda url=url: check_http(url, timeout=ROUTER_HEALTH_TIMEOUT))
+            for name, url in services.items()
+        }
+        checks["keydb"] = self._check_keydb
+        checks["cache"] = lambda: check_cache(self.cache)
+        self.health_probe = HealthProbe(checks=checks, interval=ROUTER_HEALTH_INTERVAL, name="router-health-probe")
+        self.health_probe.start()
     
     def _initialize_keydb(self):
         """Initialize KeyDB connection for conversation storage"""
@@ -101,34 +256,78 @@ class MessageRouter:
             print(f"❌ Message Router: Failed to connect to KeyDB: {e}")
             return None
     
+    def _check_keydb(self) -> Dict[str, Any]:
+        """Check the conversation store connection."""
+        self.redis_client.ping()
+        return {"healthy": True}
+    
     def _make_service_request(self, service_url: str, endpoint: str, method: str = "GET", data: Dict = None, timeout: int = 30) -> Dict[str, Any]:
         """
         Make a request to a microservice with error handling.
+        Uses the shared keep-alive client for the service, so calls reuse pooled connections.
+        Calls to a service whose circuit breaker is open fail immediately, and the timeout
+        is tightened to the endpoint's observed p99 except for FIXED_TIMEOUT_ENDPOINTS
+        (see src/shared/circuit_breaker.py). Each call records exactly one outcome.
         
         Args:
             service_url: Base URL of the service
             endpoint: API endpoint to call
             method: HTTP method (GET, POST, etc.)
             data: Request data for POST requests
-            timeout: Request timeout in seconds
+            timeout: Maximum request timeout in seconds
             
         Returns:
             Response data or error information
         """
+        if method.upper() not in ("GET", "POST"):
+            return {
+                "success": False,
+                "error": f"Unsupported HTTP method: {method}",
+                "status_code": 500
+            }
+        
+        breaker = get_breaker(service_url)
+        if not breaker.allow():
+            return {
+                "success": False,
+                "error": f"Circuit open for {service_url}, call skipped",
+                "status_code": 503,
+                "circuit_open": True
+            }
+        
+        adaptive_timeout = get_adaptive_timeout(f"{service_url}{endpoint}")
+        ceiling = timeout
+        if endpoint not in FIXED_TIMEOUT_ENDPOINTS:
+            timeout = adaptive_timeout.timeout(ceiling)
+        started = time.time()
+        
         try:
-            url = f"{service_url}{endpoint}"
+            client = get_client(service_url)
             
             if method.upper() == "GET":
-                response = requests.get(url, timeout=timeout)
-            elif method.upper() == "POST":
-                response = requests.post(url, json=data, timeout=timeout)
+                response = client.get(endpoint, timeout=timeout)
             else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
+                response = client.post(endpoint, json=data, timeout=timeout)
+            elapsed = time.time() - started
+            
+            if response.status_code >= 500:
+                breaker.record_failure()
+                return {
+                    "success": False,
+                    "error": f"Service returned {response.status_code}",
+                    "status_code": response.status_code,
+                    "response": response.text
+                }
+            
+            # Parse before recording, so an unparseable body is counted once, as a failure
+            payload = response.json() if response.status_code == 200 else None
+            breaker.record_success()
+            adaptive_timeout.record(elapsed)
             
             if response.status_code == 200:
                 return {
                     "success": True,
-                    "data": response.json(),
+                    "data": payload,
                     "status_code": response.status_code
                 }
             else:
@@ -139,19 +338,28 @@ class MessageRouter:
                     "response": response.text
                 }
                 
-        except requests.exceptions.Timeout:
+        except requests.exceptions.Timeout as e:
+            # Timing out below the caller's own timeout only shows the tightened limit was too low
+            if timeout < ceiling and not isinstance(e, requests.exceptions.ConnectTimeout):
+                breaker.release()
+            else:
+                breaker.record_failure()
+            if not isinstance(e, requests.exceptions.ConnectTimeout):
+                adaptive_timeout.record(timeout)
             return {
                 "success": False,
-                "error": f"Service timeout after {timeout}s",
+                "error": f"Service timeout after {timeout:.1f}s",
                 "status_code": 408
             }
         except requests.exceptions.ConnectionError:
+            breaker.record_failure()
             return {
                 "success": False,
                 "error": "Service unavailable",
                 "status_code": 503
             }
         except Exception as e:
+            breaker.record_failure()
             return {
                 "success": False,
                 "error": str(e),
@@ -283,6 +491,243 @@ class MessageRouter:
             print(f"❌ Message Router: Error delegating organic response generation: {e}")
             return None
     
+    def _run_parallel_stages(self, stages: Dict[str, Callable[[], Dict[str, Any]]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run independent orchestration stages concurrently and wait for all of them.
+        
+        Args:
+            stages: Mapping of stage name to a callable returning a service response
+            
+        Returns:
+            Mapping of stage name to its service response. Stages that exceed their
+            timeout in ROUTER_STAGE_TIMEOUTS or raise are reported as failed responses
+            so callers can apply their usual fallback.
+        """
+        started = time.time()
+        futures = {name: self.stage_executor.submit(wrap(self._run_stage), name, stage) for name, stage in stages.items()}
+        
+        results = {}
+        for name, future in futures.items():
+            stage_timeout = ROUTER_STAGE_TIMEOUTS.get(name, 30)
+            remaining = max(stage_timeout - (time.time() - started), 0)
+            try:
+                results[name] = future.result(timeout=remaining)
+            except FuturesTimeoutError:
+                future.cancel()
+                print(f"⏱️ Message Router: Stage {name} exceeded {stage_timeout}s, using fallback")
+                results[name] = {
+                    "success": False,
+                    "error": f"Stage timeout after {stage_timeout}s",
+                    "status_code": 408
+                }
+            except Exception as e:
+                results[name] = {
+                    "success": False,
+                    "error": str(e),
+                    "status_code": 500
+                }
+        
+        print(f"⚡ Message Router: Parallel stages {list(stages.keys())} joined in {time.time() - started:.2f}s")
+        return results
+    
+    @staticmethod
+    def _run_stage(name: str, stage: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run one orchestration stage as a span of the request's trace."""
+        with span(f"stage.{name}") as stage_span:
+            result = stage()
+            stage_span.set_attribute("success", result.get("success"))
+            return result
+    
+    def _character_stages(self, character: str, input_text: str, conversation_history: List[Dict[str, Any]], channel_id: str) -> Dict[str, Callable[[], Dict[str, Any]]]:
+        """Build the character config and prompt optimization stages for a character."""
+        # Build comprehensive context for fine-tuning
+        conversation_context = {
+            "topic": "general",  # Could be enhanced with topic detection
+            "conversation_context": {
+                "recent_topics": [],  # Could be populated from conversation history
+                "last_speaker": speaker(conversation_history[-1]) if conversation_history else None,
+                "conversation_length": len(conversation_history),
+                "channel_id": channel_id,
+                "is_continuation": len(conversation_history) > 0
+            },
+            "request_context": {
+                "user_input": input_text,
+                "selected_character": character,
+                "timestamp": datetime.now().isoformat()
+            }
+        }
+        
+        return {
+            "character_config": lambda: self._make_service_request(
+                CHARACTER_CONFIG_URL,
+                f"/llm_prompt/{character}",
+                timeout=ROUTER_STAGE_TIMEOUTS["character_config"]
+            ),
+            "fine_tuning": lambda: self._make_service_request(
+                FINE_TUNING_URL,
+                "/optimize-prompt",
+                method="POST",
+                data={
+                    "character": character,
+                    "context": conversation_context
+                },
+                timeout=ROUTER_STAGE_TIMEOUTS["fine_tuning"]
+            )
+        }
+    
+    def _post_process_response(self, job: Dict[str, Any]):
+        """
+        Run the post-response work for an orchestrated reply off the request path.
+        
+        Collects quality metrics, stores the conversation record in KeyDB and
+        records performance data for fine-tuning. None of this affects the reply
+        that was already returned to the Discord handler.
+        
+        Args:
+            job: Snapshot of the orchestration state queued by orchestrate_conversation
+        """
+        request_id = job["request_id"]
+        selected_character = job["selected_character"]
+        channel_id = job["channel_id"]
+        user_id = job["user_id"]
+        input_text = job["input_text"]
+        generated_response = job["generated_response"]
+        conversation_history = job["conversation_history"]
+        rag_context_length = job["rag_context_length"]
+        prompt_optimized = job["prompt_optimized"]
+        
+        # Step 6: Quality control analysis (for metrics only, not blocking)
+        print(f"📊 Message Router: Analyzing response quality for metrics")
+        
+        # Determine last speaker from conversation history
+        last_speaker = None
+        if conversation_history:
+            last_speaker = speaker(conversation_history[-1])
+        
+        quality_response = self._make_service_request(
+            QUALITY_CONTROL_URL,
+            "/analyze",
+            method="POST",
+            data={
+                "response": generated_response,
+                "character": selected_character,
+                "conversation_id": channel_id,  # Use channel_id as conversation_id
+                "context": input_text,
+                "last_speaker": last_speaker
+            }
+        )
+        
+        if quality_response["success"]:
+            quality_data = quality_response["data"]
+            quality_passed = quality_data.get("quality_check_passed", True)
+            quality_score = quality_data.get("overall_score", 85)
+            quality_metrics = quality_data.get("metrics", {})
+            print(f"📊 Message Router: Quality analysis - Score: {quality_score}, Passed: {quality_passed}")
+            
+            # NOTE: We don't block on quality control here anymore
+            # The Discord bots handle quality control and retries
+            # We just collect metrics for learning
+            
+        else:
+            # Fallback values if quality control unavailable
+            quality_passed = True
+            quality_score = 85
+            quality_metrics = {}
+            print(f"⚠️ Message Router: Quality control unavailable, using fallback values")
+        
+        # Step 7: Store conversation in KeyDB
+        try:
+            conversation_record = {
+                "timestamp": datetime.now().isoformat(),
+                "channel_id": channel_id,
+                "user_id": user_id,
+                "character_name": selected_character,
+                "input_text": input_text,
+                "response_text": generated_response,
+                "conversation_history_length": len(conversation_history),
+                "rag_context_used": str(rag_context_length > 0),  # Convert bool to string
+                "quality_score": quality_score,
+                "quality_passed": str(quality_passed),  # Convert bool to string
+                "quality_metrics": json.dumps(quality_metrics),
+                "prompt_optimized": str(prompt_optimized),  # Convert bool to string
+                "request_id": request_id
+            }
+            
+            # Store conversation record in KeyDB
+            record_key = f"conversation:{channel_id}:{request_id}:{datetime.now().timestamp()}"
+            self.redis_client.hset(record_key, mapping=conversation_record)
+            
+            # Set expiry (24 hours)
+            self.redis_client.expire(record_key, 86400)
+            
+            print(f"💾 Message Router: Stored conversation record in KeyDB")
+            
+        except Exception as e:
+            print(f"⚠️ Message Router: Failed to store conversation: {e}")
+        
+        # Step 8: Enhanced performance recording for fine-tuning learning
+        try:
+            # Create comprehensive performance metrics
+            response_id = f"{channel_id}_{request_id}_{int(datetime.now().timestamp())}"
+            
+            performance_metrics = {
+                "quality_score": quality_score,
+                "quality_passed": quality_passed,
+                "rag_context_length": rag_context_length,
+                "conversation_turns": len(conversation_history),
+                "character_used": selected_character,
+                "prompt_optimized": prompt_optimized,
+                "message_type": "direct_response",
+                "user_input_length": len(input_text),
+                "response_length": len(generated_response),
+                "timestamp": datetime.now().isoformat()
+            }
+            
+            # Determine feedback type based on quality score and threshold
+            if quality_passed:
+                user_feedback = "quality_pass_direct"
+                feedback_details = f"High quality direct response (score: {quality_score})"
+            else:
+                user_feedback = "quality_concern_direct"
+                feedback_details = f"Quality concerns in direct response (score: {quality_score})"
+            
+            # Include quality metrics for detailed analysis
+            if quality_response["success"] and "data" in quality_response:
+                qd = quality_response["data"]
+                performance_metrics.update({
+                    "authenticity_score": qd.get("metrics", {}).get("authenticity_score", 0),
+                    "engagement_score": qd.get("metrics", {}).get("engagement_score", 0),
+                    "flow_score": qd.get("metrics", {}).get("flow_score", 0),
+                    "quality_issues": qd.get("conversation_flow", {}).get("issues", []),
+                    "quality_strengths": qd.get("conversation_flow", {}).get("strengths", [])
+                })
+            
+            # Record comprehensive performance data
+            ft_response = self._make_service_request(
+                FINE_TUNING_URL,
+                "/record-performance",
+                method="POST",
+                data={
+                    "response_id": response_id,
+                    "character": selected_character,
+                    "metrics": performance_metrics,
+                    "user_feedback": user_feedback,
+                    "feedback_details": feedback_details,
+                    "response_text": generated_response,  # Include actual response for learning
+                    "user_input": input_text,  # Include input for context learning
+                    "conversation_context": conversation_history[-3:] if conversation_history else []
+                },
+                timeout=5  # Short timeout for async operation
+            )
+            
+            if ft_response["success"]:
+                print(f"📊 Message Router: Performance data recorded for fine-tuning learning")
+            else:
+                print(f"⚠️ Message Router: Fine-tuning recording failed: {ft_response.get('error', 'Unknown error')}")
+                
+        except Exception as e:
+            print(f"⚠️ Message Router: Fine-tuning recording error: {e}")
+    
     def orchestrate_conversation(self, conversation_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Orchestrate a complete conversation flow through all microservices.
@@ -299,7 +744,6 @@ class MessageRouter:
             # Extract key information
             character_name = conversation_data.get("character_name")
             input_text = conversation_data.get("input_text", "")
-            conversation_history = conversation_data.get("conversation_history", [])
             channel_id = conversation_data.get("channel_id", "default")
             user_id = conversation_data.get("user_id", "anonymous")
             
@@ -309,20 +753,46 @@ class MessageRouter:
                     "error": "Missing required field: character_name"
                 }
             
-            # Step 1: Use conversation coordinator to select responding character
-            print(f"🎭 Message Router: Determining responding character")
-            coordinator_response = self._make_service_request(
-                CONVERSATION_COORDINATOR_URL,
-                "/select-character",
-                method="POST",
-                data={
-                    "message": input_text,
-                    "conversation_id": channel_id,
-                    "available_characters": [character_name],  # For single character bots
-                    "force_character": character_name  # Force the specific character for individual bots
+            try:
+                conversation_history = normalize_history(conversation_data.get("conversation_history"))
+            except MessageFormatError as e:
+                return {
+                    "success": False,
+                    "error": f"Invalid conversation_history: {e}"
                 }
-            )
             
+            # Steps 1-4: Run the independent lookups concurrently. Character selection,
+            # RAG retrieval and the requested character's config/prompt optimization
+            # don't depend on each other, so we speculatively fetch the config for the
+            # requested character while the coordinator decides, then join.
+            print(f"🎭 Message Router: Running coordinator, config, RAG and fine-tuning stages in parallel")
+            stages = {
+                "coordinator": lambda: self._make_service_request(
+                    CONVERSATION_COORDINATOR_URL,
+                    "/select-character",
+                    method="POST",
+                    data={
+                        "message": input_text,
+                        "conversation_id": channel_id,
+                        "available_characters": [character_name],  # For single character bots
+                        "force_character": character_name  # Force the specific character for individual bots
+                    },
+                    timeout=ROUTER_STAGE_TIMEOUTS["coordinator"]
+                ),
+                **self._character_stages(character_name, input_text, conversation_history, channel_id)
+            }
+            if input_text:
+                stages["rag"] = lambda: self._make_service_request(
+                    RAG_RETRIEVER_URL,
+                    "/retrieve",
+                    method="POST",
+                    data={"query": input_text, "num_results": 3},
+                    timeout=ROUTER_STAGE_TIMEOUTS["rag"]
+                )
+            
+            stage_results = self._run_parallel_stages(stages)
+            
+            coordinator_response = stage_results["coordinator"]
             if coordinator_response["success"]:
                 selected_character = coordinator_response["data"]["selected_character"]
                 selection_reasoning = coordinator_response["data"]["reasoning"]
@@ -332,13 +802,15 @@ class MessageRouter:
                 selected_character = character_name
                 print(f"⚠️ Message Router: Coordinator unavailable, using fallback character {selected_character}")
             
-            # Step 2: Get character configuration
-            print(f"🔄 Message Router: Getting character config for {selected_character}")
-            char_config_response = self._make_service_request(
-                CHARACTER_CONFIG_URL, 
-                f"/llm_prompt/{selected_character}"
-            )
+            # The speculative config/prompt was fetched for the requested character;
+            # only pay for a second round if the coordinator picked someone else.
+            if selected_character.lower() != character_name.lower():
+                print(f"🔄 Message Router: Coordinator switched to {selected_character}, refetching config and prompt")
+                stage_results.update(self._run_parallel_stages(
+                    self._character_stages(selected_character, input_text, conversation_history, channel_id)
+                ))
             
+            char_config_response = stage_results["character_config"]
             if not char_config_response["success"]:
                 return {
                     "success": False,
@@ -347,51 +819,13 @@ class MessageRouter:
             
             character_config = char_config_response["data"]
             
-            # Step 3: Get RAG context if needed
             rag_context = ""
-            if input_text:
-                print(f"🔍 Message Router: Retrieving RAG context")
-                rag_response = self._make_service_request(
-                    RAG_RETRIEVER_URL,
-                    "/retrieve",
-                    method="POST",
-                    data={"query": input_text, "num_results": 3}
-                )
-                
-                if rag_response["success"]:
-                    rag_context = rag_response["data"].get("context", "")
-            
-            # Step 4: Get optimized prompt from fine-tuning service with enhanced context
-            print(f"🔧 Message Router: Getting optimized prompt with conversation context")
-            
-            # Build comprehensive context for fine-tuning
-            conversation_context = {
-                "topic": "general",  # Could be enhanced with topic detection
-                "conversation_context": {
-                    "recent_topics": [],  # Could be populated from conversation history
-                    "last_speaker": conversation_history[-1].get("character") if conversation_history else None,
-                    "conversation_length": len(conversation_history),
-                    "channel_id": channel_id,
-                    "is_continuation": len(conversation_history) > 0
-                },
-                "request_context": {
-                    "user_input": input_text,
-                    "selected_character": selected_character,
-                    "timestamp": datetime.now().isoformat()
-                }
-            }
-            
-            fine_tuning_response = self._make_service_request(
-                FINE_TUNING_URL,
-                "/optimize-prompt",
-                method="POST",
-                data={
-                    "character": selected_character,
-                    "context": conversation_context
-                }
-            )
+            rag_response = stage_results.get("rag")
+            if rag_response and rag_response["success"]:
+                rag_context = rag_response["data"].get("context", "")
             
             # Use optimized prompt if available, otherwise fallback to character config
+            fine_tuning_response = stage_results["fine_tuning"]
             if fine_tuning_response["success"] and "data" in fine_tuning_response:
                 response_data = fine_tuning_response["data"]
                 if "optimized_prompt" in response_data:
@@ -409,17 +843,22 @@ class MessageRouter:
             # Step 5: Generate response using LLM service
             print(f"🤖 Message Router: Generating response for {selected_character}")
             
-            llm_response = self._make_service_request(
+            llm_response = self._run_stage("generate", lambda: self._make_service_request(
                 LLM_SERVICE_URL,
                 "/generate",
                 method="POST",
                 data={
                     "prompt": optimized_prompt,
                     "user_message": input_text,
-                    "chat_history": conversation_history,
-                    "settings": character_config.get("llm_settings", {})
+                    "chat_history": to_wire(conversation_history),
+                    "character": selected_character,
+                    "settings": character_config.get("llm_settings", {}),
+                    # Discord fallback messages must never delay a real user reply
+                    "priority": "background" if user_id == "system_fallback" else "interactive",
+                    "caller": "message-router",
+                    "message_type": "fallback" if user_id == "system_fallback" else "direct"
                 }
-            )
+            ))
             
             if not llm_response["success"]:
                 return {
@@ -429,137 +868,19 @@ class MessageRouter:
             
             generated_response = llm_response["data"]["response"]
             
-            # Step 6: Quality control analysis (for metrics only, not blocking)
-            print(f"📊 Message Router: Analyzing response quality for metrics")
-            
-            # Determine last speaker from conversation history
-            last_speaker = None
-            if conversation_history:
-                last_speaker = conversation_history[-1].get("character")
-            
-            quality_response = self._make_service_request(
-                QUALITY_CONTROL_URL,
-                "/analyze",
-                method="POST",
-                data={
-                    "response": generated_response,
-                    "character": selected_character,
-                    "conversation_id": channel_id,  # Use channel_id as conversation_id
-                    "context": input_text,
-                    "last_speaker": last_speaker
-                }
-            )
-            
-            if quality_response["success"]:
-                quality_data = quality_response["data"]
-                quality_passed = quality_data.get("quality_check_passed", True)
-                quality_score = quality_data.get("overall_score", 85)
-                quality_metrics = quality_data.get("metrics", {})
-                print(f"📊 Message Router: Quality analysis - Score: {quality_score}, Passed: {quality_passed}")
-                
-                # NOTE: We don't block on quality control here anymore
-                # The Discord bots handle quality control and retries
-                # We just collect metrics for learning
-                
-            else:
-                # Fallback values if quality control unavailable
-                quality_passed = True
-                quality_score = 85
-                quality_metrics = {}
-                print(f"⚠️ Message Router: Quality control unavailable, using fallback values")
-            
-            # Step 7: Store conversation in KeyDB
-            try:
-                conversation_record = {
-                    "timestamp": datetime.now().isoformat(),
-                    "channel_id": channel_id,
-                    "user_id": user_id,
-                    "character_name": selected_character,
-                    "input_text": input_text,
-                    "response_text": generated_response,
-                    "conversation_history_length": len(conversation_history),
-                    "rag_context_used": str(len(rag_context) > 0),  # Convert bool to string
-                    "quality_score": quality_score,
-                    "quality_passed": str(quality_passed),  # Convert bool to string
-                    "quality_metrics": json.dumps(quality_metrics),
-                    "prompt_optimized": str(fine_tuning_response["success"]),  # Convert bool to string
-                    "request_id": self.request_count
-                }
-                
-                # Store conversation record in KeyDB
-                record_key = f"conversation:{channel_id}:{self.request_count}:{datetime.now().timestamp()}"
-                self.redis_client.hset(record_key, mapping=conversation_record)
-                
-                # Set expiry (24 hours)
-                self.redis_client.expire(record_key, 86400)
-                
-                print(f"💾 Message Router: Stored conversation record in KeyDB")
-                
-            except Exception as e:
-                print(f"⚠️ Message Router: Failed to store conversation: {e}")
-            
-            # Step 8: Enhanced performance recording for fine-tuning learning
-            try:
-                # Create comprehensive performance metrics
-                response_id = f"{channel_id}_{self.request_count}_{int(datetime.now().timestamp())}"
-                
-                performance_metrics = {
-                    "quality_score": quality_score,
-                    "quality_passed": quality_passed,
-                    "rag_context_length": len(rag_context),
-                    "conversation_turns": len(conversation_history),
-                    "character_used": selected_character,
-                    "prompt_optimized": fine_tuning_response["success"],
-                    "message_type": "direct_response",
-                    "user_input_length": len(input_text),
-                    "response_length": len(generated_response),
-                    "timestamp": datetime.now().isoformat()
-                }
-                
-                # Determine feedback type based on quality score and threshold
-                if quality_passed:
-                    user_feedback = "quality_pass_direct"
-                    feedback_details = f"High quality direct response (score: {quality_score})"
-                else:
-                    user_feedback = "quality_concern_direct"
-                    feedback_details = f"Quality concerns in direct response (score: {quality_score})"
-                
-                # Include quality metrics for detailed analysis
-                if quality_response["success"] and "data" in quality_response:
-                    qd = quality_response["data"]
-                    performance_metrics.update({
-                        "authenticity_score": qd.get("metrics", {}).get("authenticity_score", 0),
-                        "engagement_score": qd.get("metrics", {}).get("engagement_score", 0),
-                        "flow_score": qd.get("metrics", {}).get("flow_score", 0),
-                        "quality_issues": qd.get("conversation_flow", {}).get("issues", []),
-                        "quality_strengths": qd.get("conversation_flow", {}).get("strengths", [])
-                    })
-                
-                # Record comprehensive performance data
-                ft_response = self._make_service_request(
-                    FINE_TUNING_URL,
-                    "/record-performance",
-                    method="POST",
-                    data={
-                        "response_id": response_id,
-                        "character": selected_character,
-                        "metrics": performance_metrics,
-                        "user_feedback": user_feedback,
-                        "feedback_details": feedback_details,
-                        "response_text": generated_response,  # Include actual response for learning
-                        "user_input": input_text,  # Include input for context learning
-                        "conversation_context": conversation_history[-3:] if conversation_history else []
-                    },
-                    timeout=5  # Short timeout for async operation
-                )
-                
-                if ft_response["success"]:
-                    print(f"📊 Message Router: Performance data recorded for fine-tuning learning")
-                else:
-                    print(f"⚠️ Message Router: Fine-tuning recording failed: {ft_response.get('error', 'Unknown error')}")
-                    
-            except Exception as e:
-                print(f"⚠️ Message Router: Fine-tuning recording error: {e}")
+            # Steps 6-8: Quality metrics, conversation storage and fine-tuning feedback
+            # don't affect the reply, so hand them to the background pipeline.
+            post_processing_queued = self.post_processing.submit({
+                "request_id": self.request_count,
+                "selected_character": selected_character,
+                "channel_id": channel_id,
+                "user_id": user_id,
+                "input_text": input_text,
+                "generated_response": generated_response,
+                "conversation_history": conversation_history,
+                "rag_context_length": len(rag_context),
+                "prompt_optimized": fine_tuning_response["success"]
+            })
             
             # NOTE: Organic conversation analysis is now handled by Discord handlers
             # after they successfully send their direct responses to prevent race conditions
@@ -569,10 +890,10 @@ class MessageRouter:
                 "data": {
                     "response": generated_response,
                     "character": selected_character,
-                    "quality_score": quality_score,
                     "rag_context_length": len(rag_context),
                     "conversation_id": channel_id,
                     "request_id": self.request_count,
+                    "post_processing_queued": post_processing_queued,
                     "organic_followup_scheduled": False  # Now handled by Discord handlers
                 }
             }
@@ -588,91 +909,49 @@ class MessageRouter:
             }
     
     def get_service_health(self) -> Dict[str, Any]:
-        """Get health status of all connected services."""
-        # Core services
-        services = {
-            "llm_service": LLM_SERVICE_URL,
-            "character_config": CHARACTER_CONFIG_URL,
-            "rag_retriever": RAG_RETRIEVER_URL,
-            "conversation_coordinator": CONVERSATION_COORDINATOR_URL,
-            "quality_control": QUALITY_CONTROL_URL,
-            "fine_tuning": FINE_TUNING_URL
-        }
-        
+        """
+        Get health status of all connected services from the background probe.
+        Never waits on a dependency; response times are those measured by the last probe round.
+        """
+        probe = self.health_probe.snapshot()
         health_status = {}
-        overall_healthy = True
+        overall_healthy = not probe["stale"]
         
-        for service_name, service_url in services.items():
-            try:
-                response = self._make_service_request(service_url, "/health", timeout=5)
-                if response["success"]:
-                    health_status[service_name] = {
-                        "status": "healthy",
-                        "response_time": "< 5s",
-                        "last_check": datetime.now().isoformat()
-                    }
-                else:
-                    health_status[service_name] = {
-                        "status": "unhealthy",
-                        "error": response["error"],
-                        "last_check": datetime.now().isoformat()
-                    }
-                    overall_healthy = False
-            except Exception as e:
-                health_status[service_name] = {
-                    "status": "unreachable",
-                    "error": str(e),
-                    "last_check": datetime.now().isoformat()
-                }
+        for name, check in probe["checks"].items():
+            if check.get("available") is False:
+                health_status[name] = {"status": "unavailable", "last_check": probe["checked_at"]}
+                continue
+        
+            if check["healthy"]:
+                status = "healthy"
+            else:
+                status = "unreachable" if "error" in check else "unhealthy"
                 overall_healthy = False
         
-        # Check KeyDB
-        try:
-            self.redis_client.ping()
-            health_status["keydb"] = {
-                "status": "healthy",
-                "last_check": datetime.now().isoformat()
+            health_status[name] = {
+                "status": status,
+                "response_time_ms": check["latency_ms"],
+                "last_check": probe["checked_at"]
             }
-        except Exception as e:
-            health_status["keydb"] = {
-                "status": "unhealthy",
-                "error": str(e),
-                "last_check": datetime.now().isoformat()
-            }
-            overall_healthy = False
-        
-        # Check cache
-        if self.cache:
-            try:
-                test_key = "health_check"
-                self.cache.set(test_key, "test", ttl=60)
-                test_result = self.cache.get(test_key)
-                cache_healthy = test_result == "test"
-                self.cache.delete(test_key)
-                
-                health_status["cache"] = {
-                    "status": "healthy" if cache_healthy else "unhealthy",
-                    "last_check": datetime.now().isoformat()
-                }
-                if not cache_healthy:
-                    overall_healthy = False
-            except Exception as e:
-                health_status["cache"] = {
-                    "status": "unhealthy",
-                    "error": str(e),
-                    "last_check": datetime.now().isoformat()
-                }
-                overall_healthy = False
-        else:
-            health_status["cache"] = {"status": "unavailable"}
+            for key in ("error", "status_code", "reported_status"):
+                if check.get(key) is not None:
+                    health_status[name][key] = check[key]
         
         return {
             "status": "healthy" if overall_healthy else "degraded",
             "services": health_status,
+            "probe": {
+                "checked_at": probe["checked_at"],
+                "age_seconds": probe["age_seconds"],
+                "stale": probe["stale"],
+                "round_ms": probe["round_ms"],
+                "interval_seconds": probe["interval_seconds"]
+            },
             "metrics": {
                 "total_requests": self.request_count,
                 "error_count": self.error_count,
-                "error_rate": self.error_count / max(self.request_count, 1) * 100
+                "error_rate": self.error_count / max(self.request_count, 1) * 100,
+                "post_processing": self.post_processing.get_stats()
             },
             "timestamp": datetime.now().isoformat()
         }
@@ -708,12 +987,30 @@ def orchestrate_conversation():
                 "error": "No JSON data provided"
             }), 400
         
-        result = message_router.orchestrate_conversation(data)
+        # Retries carrying the same key (e.g. the Discord message hash) share one run
+        idempotency_key = request.headers.get("Idempotency-Key") or data.get("idempotency_key")
+        if idempotency_key and message_router.idempotent_results:
+            scoped_key = f"{str(data.get('character_name', '')).lower()}:{idempotency_key}"
+            result, idempotency_status = message_router.idempotent_results.run(
+                scoped_key,
+                lambda: message_router.orchestrate_conversation(data)
+            )
+            if idempotency_status == IdempotentResults.STATUS_IN_PROGRESS:
+                return jsonify({
+                    "success": False,
+                    "error": "A request with this idempotency key is still in progress",
+                    "in_progress": True
+                }), 409, {"X-Idempotency-Status": idempotency_status}
+            if idempotency_status not in (IdempotentResults.STATUS_NEW, IdempotentResults.STATUS_BYPASSED):
+                print(f"♻️ Message Router: Request {idempotency_key[:8]} served from its original run ({idempotency_status})")
+        else:
+            result, idempotency_status = message_router.orchestrate_conversation(data), None
         
+        headers = {"X-Idempotency-Status": idempotency_status} if idempotency_status else {}
         if result["success"]:
-            return jsonify(result), 200
+            return jsonify(result), 200, headers
         else:
-            return jsonify(result), 400
+            return jsonify(result), 400, headers
             
     except Exception as e:
         print(f"❌ Message Router: Error in orchestrate endpoint: {e}")
@@ -743,6 +1040,11 @@ def get_metrics():
             "total_requests": message_router.request_count,
             "error_count": message_router.error_count,
             "error_rate": message_router.error_count / max(message_router.request_count, 1) * 100,
+            "post_processing": message_router.post_processing.get_stats(),
+            "http_clients": get_client_stats(),
+            "circuit_breakers": get_breaker_stats(),
+            "idempotency": message_router.idempotent_results.get_stats() if message_router.idempotent_results else None,
+            "tracing": get_tracing_stats(),
             "timestamp": datetime.now().isoformat()
         }), 200
     except Exception as e:
@@ -850,7 +1152,7 @@ def handle_organic_notification():
                 print(f"❌ Error in delegated organic analysis: {e}")
         
         # Start the background thread for delayed analysis
-        analysis_thread = threading.Thread(target=delayed_organic_analysis, daemon=True)
+        analysis_thread = threading.Thread(target=wrap(delayed_organic_analysis), daemon=True)
         analysis_thread.start()
         
         return response_obj, 200
@@ -28,6 +28,16 @@ import sys
 import os.path
 sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
 from utils.retry_manager import retry_async, RetryConfig
+from src.shared.messages import MessageFormatError, from_stored_record, make_message
+from src.shared.service_client import get_client, get_client_stats
+from src.shared.tracing import init_tracing, span, wrap
+
+# Pooled keep-alive clients for the services this handler calls
+message_router_client = get_client(MESSAGE_ROUTER_URL, name="message-router")
+quality_control_client = get_client("http://quality-control:6003", name="quality-control")
+
+# Requests from the router (organic messages) continue its trace
+init_tracing(app, "peter-discord")
 
 # Import Redis for conversation history
 import redis
@@ -159,15 +169,9 @@ class PeterDiscordBot:
                         print(f"   Raw data: {message_data}")
                         continue
                     
-                    # Convert to format expected by message router
-                    formatted_message = {
-                        "role": "assistant" if message_data["message_type"] in ["peter", "brian", "stewie"] else "user",
-                        "content": message_data["content"],
-                        "character": message_data["message_type"] if message_data["message_type"] in ["peter", "brian", "stewie"] else "user",
-                        "timestamp": message_data["timestamp"]
-                    }
-                    messages.append(formatted_message)
-                except (json.JSONDecodeError, KeyError) as e:
+                    # Convert to the shared message schema used by the router and LLM service
+                    messages.append(from_stored_record(message_data))
+                except (json.JSONDecodeError, KeyError, MessageFormatError) as e:
                     print(f"⚠️ Peter Discord: Skipping malformed message in history: {e}")
                     continue
             
@@ -268,7 +272,8 @@ class PeterDiscordBot:
                             input_text=content,
                             channel_id=channel_id,
                             user_id=str(message.author.id),
-                            conversation_history=conversation_history
+                            conversation_history=conversation_history,
+                            idempotency_key=message_hash
                         )
                         
                         if not response or not response.get("success"):
@@ -338,8 +343,8 @@ class PeterDiscordBot:
             loop = asyncio.get_event_loop()
             quality_response = await loop.run_in_executor(
                 None,
-                lambda: requests.post(
-                    "http://quality-control:6003/analyze",
+                lambda: quality_control_client.post(
+                    "/analyze",
                     json={
                         "response": response,
                         "character": "peter",
@@ -384,10 +389,7 @@ class PeterDiscordBot:
                     input_text=f"[ERROR_FALLBACK_{error_type.upper()}] {original_input}",
                     channel_id=channel_id,
                     user_id="system_fallback",
-                    conversation_history=[{
-                        "role": "system", 
-                        "content": prompt
-                    }]
+                    conversation_history=[make_message("system", prompt)]
                 )
                 
                 if not fallback_response or not fallback_response.get("success"):
@@ -417,12 +419,7 @@ class PeterDiscordBot:
         """Notify message router that a direct response was sent, triggering organic conversation analysis."""
         try:
             # Create updated conversation history with the response we just sent
-            updated_history = conversation_history + [{
-                "role": "assistant",
-                "content": response_sent,
-                "character": "peter",
-                "timestamp": datetime.now().isoformat()
-            }]
+            updated_history = conversation_history + [make_message("assistant", response_sent, "peter", datetime.now().isoformat())]
             
             # Send notification to message router for organic analysis
             notification_data = {
@@ -438,14 +435,15 @@ class PeterDiscordBot:
             
             # Make async request to message router
             loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(
-                    f"{MESSAGE_ROUTER_URL}/organic-notification",
-                    json=notification_data,
-                    timeout=5  # Short timeout for async notification
+            with span("discord.organic_notification", character="peter", channel_id=channel_id):
+                response = await loop.run_in_executor(
+                    None,
+                    wrap(lambda: message_router_client.post(
+                        "/organic-notification",
+                        json=notification_data,
+                        timeout=5  # Short timeout for async notification
+                    ))
                 )
-            )
             
             if response.status_code == 200:
                 print(f"✅ Peter Discord: Organic analysis notification sent to message router")
@@ -455,8 +453,12 @@ class PeterDiscordBot:
         except Exception as e:
             print(f"⚠️ Peter Discord: Failed to send organic notification: {e}")
     
-    async def send_to_message_router(self, input_text: str, channel_id: str, user_id: str, conversation_history: list) -> Optional[Dict[str, Any]]:
-        """Send message to the message router service."""
+    async def send_to_message_router(self, input_text: str, channel_id: str, user_id: str, conversation_history: list, idempotency_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Send message to the message router service.
+        Retries that pass the same idempotency_key (the message hash) reuse the router's
+        original run instead of generating the reply again.
+        """
         try:
             data = {
                 "character_name": "Peter",
@@ -465,13 +467,16 @@ class PeterDiscordBot:
                 "user_id": user_id,
                 "conversation_history": conversation_history
             }
+            if idempotency_key:
+                data["idempotency_key"] = idempotency_key
             
-            # Use asyncio to make non-blocking HTTP request
+            # Use asyncio to make non-blocking HTTP request; each mention starts a trace here
             loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(f"{MESSAGE_ROUTER_URL}/orchestrate", json=data, timeout=30)
-            )
+            with span("discord.mention", character="peter", channel_id=channel_id):
+                response = await loop.run_in_executor(
+                    None,
+                    wrap(lambda: message_router_client.post("/orchestrate", json=data, timeout=30))
+                )
             
             if response.status_code == 200:
                 return response.json()
@@ -556,7 +561,8 @@ def health_check():
         return jsonify({
             "status": health_status,
             "service": "Peter_Discord_Handler",
-            **status
+            **status,
+            "http_clients": get_client_stats()
         }), 200
     except Exception as e:
         return jsonify({
@@ -634,8 +640,8 @@ def send_organic_message():
                 }
                 
                 # Send notification to message router for continued organic analysis
-                response = requests.post(
-                    f"{MESSAGE_ROUTER_URL}/organic-notification",
+                response = message_router_client.post(
+                    "/organic-notification",
                     json=notification_data,
                     timeout=5
                 )
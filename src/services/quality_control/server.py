@@ -10,7 +10,10 @@ from datetime import datetime, timedelta
 import hashlib
 import os
 
+from shared.tracing import init_tracing
+
 app = Flask(__name__)
+init_tracing(app, "quality-control")
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -142,7 +145,8 @@ class EnhancedQualityControlService:
                                         conversation_id: str = "default", 
                                         context: str = "", 
                                         last_speaker: str = None,
-                                        message_type: str = "direct") -> Dict:
+                                        message_type: str = "direct",
+                                        store_turn: bool = True) -> Dict:
         """Enhanced comprehensive response quality analysis with adaptive thresholds and organic response support"""
         start_time = datetime.now()
         
@@ -208,8 +212,9 @@ class EnhancedQualityControlService:
             # Adaptive pass/fail determination
             quality_check_passed = overall_score >= adaptive_threshold
         
-        # Store conversation turn for future analysis
-        self._store_conversation_turn(conversation_id, character, response, overall_score)
+        # Store conversation turn for future analysis (skipped for candidates that may never be sent)
+        if store_turn:
+            self._store_conversation_turn(conversation_id, character, response, overall_score)
         
         analysis_time = (datetime.now() - start_time).total_seconds()
         
@@ -1135,6 +1140,51 @@ def analyze_response():
         logger.error(f"Error in enhanced analysis: {str(e)}")
         return jsonify({'error': f'Enhanced analysis failed: {str(e)}'}), 500
 
+@app.route('/analyze/batch', methods=['POST'])
+def analyze_response_batch():
+    """Score several candidate responses for the same conversation turn"""
+    try:
+        data = request.get_json()
+        
+        if not data or not isinstance(data.get('responses'), list) or not data['responses']:
+            return jsonify({'error': 'Missing responses field (non-empty list)'}), 400
+        
+        character = data.get('character', 'unknown')
+        conversation_id = data.get('conversation_id', 'default')
+        context = data.get('context', '')
+        last_speaker = data.get('last_speaker')
+        message_type = data.get('message_type', 'direct')
+        
+        # Candidates are scored against the same history; none is stored as a turn yet
+        analyses = [
+            quality_service.analyze_response_quality_enhanced(
+                response_text, character, conversation_id, context, last_speaker, message_type, store_turn=False
+            )
+            for response_text in data['responses']
+        ]
+        
+        # Optionally record the best passing candidate, which is the one the caller will send
+        best_index = None
+        passing = [i for i, analysis in enumerate(analyses) if analysis['quality_check_passed']]
+        if passing:
+            best_index = max(passing, key=lambda i: analyses[i]['overall_score'])
+            if data.get('record_best', False):
+                quality_service._store_conversation_turn(
+                    conversation_id, character, data['responses'][best_index], analyses[best_index]['overall_score']
+                )
+        
+        logger.info(f"📦 Quality Control: Scored {len(analyses)} candidates for {character} ({len(passing)} passed)")
+        
+        return jsonify({
+            'analyses': analyses,
+            'best_index': best_index,
+            'timestamp': datetime.now().isoformat()
+        })
+        
+    except Exception as e:
+        logger.error(f"Error in batch analysis: {str(e)}")
+        return jsonify({'error': f'Batch analysis failed: {str(e)}'}), 500
+
 @app.route('/analyze-legacy', methods=['POST'])
 def analyze_response_legacy():
     """Legacy analysis endpoint for backwards compatibility"""
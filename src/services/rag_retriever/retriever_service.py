@@ -10,9 +10,12 @@ from chromadb.config import Settings
 import numpy as np
 from datetime import datetime
 
+from src.shared.tracing import init_tracing
+
 # Service configuration
 SERVICE_NAME = "RAG Retriever"
 app = Flask(__name__)
+init_tracing(app, "rag-retriever")
 logging.basicConfig(level=logging.INFO)
 
 # Environment variables
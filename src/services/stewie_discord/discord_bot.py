@@ -8,6 +8,9 @@ from dotenv import load_dotenv
 import discord
 from discord.ext import commands
 
+from src.shared.service_client import get_client
+from src.shared.tracing import configure_tracing, span, wrap
+
 # Load environment variables
 load_dotenv()
 
@@ -15,6 +18,8 @@ load_dotenv()
 DISCORD_BOT_TOKEN_STEWIE = os.getenv("DISCORD_BOT_TOKEN_STEWIE")
 MESSAGE_ROUTER_URL = os.getenv("MESSAGE_ROUTER_URL", "http://message-router:6005/orchestrate")
 
+configure_tracing("stewie-discord")
+
 class StewieDiscordBot:
     """Stewie Griffin Discord bot handler."""
     
@@ -107,12 +112,13 @@ class StewieDiscordBot:
                 "conversation_history": conversation_history
             }
             
-            # Use asyncio to make non-blocking HTTP request
+            # Use asyncio to make non-blocking HTTP request; each mention starts a trace here
             loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: requests.post(MESSAGE_ROUTER_URL, json=data, timeout=30)
-            )
+            with span("discord.mention", character="stewie", channel_id=channel_id):
+                response = await loop.run_in_executor(
+                    None,
+                    wrap(lambda: get_client(MESSAGE_ROUTER_URL, name="message-router").post("", json=data, timeout=30))
+                )
             
             if response.status_code == 200:
                 return response.json()
@@ -7,7 +7,8 @@ import os
 import json
 import time
 import logging
-from typing import Any, Optional, Union
+import threading
+from typing import Any, Callable, Optional, Tuple, Union
 from datetime import timedelta
 
 try:
@@ -29,6 +30,7 @@ class BotCache:
         self.prefix = prefix
         self.redis_client = None
         self.fallback_cache = {}  # In-memory fallback
+        self._fallback_lock = threading.Lock()  # Makes fallback claims (set_if_absent) atomic
         
         # Try to connect to Redis/KeyDB
         if REDIS_AVAILABLE and redis_url:
@@ -43,6 +45,16 @@ class BotCache:
         else:
             logger.info("Redis not available or no URL provided. Using in-memory cache.")
     
+    def ping(self) -> bool:
+        """Whether the cache can be reached; the in-memory fallback always can."""
+        if not self.redis_client:
+            return True
+        try:
+            return bool(self.redis_client.ping())
+        except Exception as e:
+            logger.error(f"Failed to ping cache: {e}")
+            return False
+    
     def _make_key(self, key: str) -> str:
         """Create a prefixed cache key."""
         return f"{self.prefix}:{key}"
@@ -125,6 +137,44 @@ class BotCache:
             logger.error(f"Failed to get cache key {key}: {e}")
             return default
     
+    def get_with_ttl(self, key: str, default: Any = None) -> Tuple[Any, Optional[float]]:
+        """
+        Get a value and its remaining time to live in one round trip.
+        
+        Args:
+            key: Cache key
+            default: Default value if key not found
+        
+        Returns:
+            (value, remaining seconds); remaining is None for keys without a TTL or not found
+        """
+        try:
+            cache_key = self._make_key(key)
+            
+            if self.redis_client:
+                pipe = self.redis_client.pipeline(transaction=False)
+                pipe.get(cache_key)
+                pipe.pttl(cache_key)
+                value, pttl = pipe.execute()
+                if value is None:
+                    return default, None
+                return json.loads(value), pttl / 1000 if pttl and pttl > 0 else None
+            else:
+                cached_item = self.fallback_cache.get(cache_key)
+                if not cached_item:
+                    return default, None
+                if cached_item['expiry'] is None:
+                    return json.loads(cached_item['value']), None
+                remaining = cached_item['expiry'] - time.time()
+                if remaining <= 0:
+                    del self.fallback_cache[cache_key]
+                    return default, None
+                return json.loads(cached_item['value']), remaining
+        
+        except Exception as e:
+            logger.error(f"Failed to get cache key {key} with TTL: {e}")
+            return default, None
+    
     def delete(self, key: str) -> bool:
         """
         Delete a key from the cache.
@@ -180,6 +230,236 @@ class BotCache:
             logger.error(f"Failed to check cache key {key}: {e}")
             return False
     
+    def set_if_absent(self, key: str, value: Any, ttl: Optional[Union[int, timedelta]] = None) -> bool:
+        """
+        Set a value only if the key does not already exist (SET NX).
+        Useful for short-lived locks shared between workers.
+        
+        Args:
+            key: Cache key
+            value: Value to cache (will be JSON serialized)
+            ttl: Time to live in seconds or timedelta
+            
+        Returns:
+            True if the value was set, False if the key already existed or on error
+        """
+        try:
+            cache_key = self._make_key(key)
+            serialized_value = json.dumps(value)
+            if isinstance(ttl, timedelta):
+                ttl = int(ttl.total_seconds())
+            
+            if self.redis_client:
+                return bool(self.redis_client.set(cache_key, serialized_value, nx=True, ex=ttl or None))
+            else:
+                # Check and write under one lock, so only one thread can win the claim
+                with self._fallback_lock:
+                    cached_item = self.fallback_cache.get(cache_key)
+                    if cached_item and (cached_item['expiry'] is None or time.time() < cached_item['expiry']):
+                        return False
+                    self.fallback_cache[cache_key] = {
+                        'value': serialized_value,
+                        'expiry': time.time() + ttl if ttl else None
+                    }
+                    return True
+                
+        except Exception as e:
+            logger.error(f"Failed to set cache key {key} if absent: {e}")
+            return False
+    
+    def namespace_versions(self, *namespaces: str) -> list:
+        """
+        Get the current version of each namespace (0 if never invalidated).
+        
+        Args:
+            namespaces: Namespace names
+        
+        Returns:
+            Versions in the same order, fetched in one round trip
+        """
+        try:
+            version_keys = [self._make_key(f"ns:{namespace}") for namespace in namespaces]
+            
+            if self.redis_client:
+                values = self.redis_client.mget(version_keys) if version_keys else []
+            else:
+                values = [self.fallback_cache.get(key, {}).get('value') for key in version_keys]
+            return [int(value or 0) for value in values]
+        
+        except Exception as e:
+            logger.error(f"Failed to get namespace versions {namespaces}: {e}")
+            return [0] * len(namespaces)
+    
+    def versioned_key(self, key: str, *namespaces: str, versions: Optional[list] = None) -> str:
+        """
+        Qualify a key with the current version of each namespace it belongs to.
+        Bumping any of the namespaces makes every key built before it unreachable;
+        the old entries are left to expire by TTL.
+        
+        Args:
+            key: Cache key
+            namespaces: Namespaces the entry belongs to, e.g. "llm", "character:peter"
+            versions: Versions already known to the caller; fetched when omitted
+        
+        Returns:
+            Key such as "llm.v3:character:peter.v1:<key>"
+        """
+        if versions is None:
+            versions = self.namespace_versions(*namespaces)
+        tags = [f"{namespace}.v{version}" for namespace, version in zip(namespaces, versions)]
+        return ":".join(tags + [key])
+    
+    def bump_namespace(self, namespace: str) -> Optional[int]:
+        """
+        Invalidate every key in a namespace in O(1) by incrementing its version.
+        
+        Args:
+            namespace: Namespace name
+        
+        Returns:
+            The new version, or None on error
+        """
+        try:
+            version_key = self._make_key(f"ns:{namespace}")
+            
+            if self.redis_client:
+                return int(self.redis_client.incr(version_key))
+            else:
+                version = int(self.fallback_cache.get(version_key, {}).get('value') or 0) + 1
+                self.fallback_cache[version_key] = {'value': version, 'expiry': None}
+                return version
+        
+        except Exception as e:
+            logger.error(f"Failed to bump namespace {namespace}: {e}")
+            return None
+    
+    def publish(self, channel: str, message: Any) -> bool:
+        """
+        Publish a message to every subscriber of a channel.
+        
+        Args:
+            channel: Channel name (prefixed like keys)
+            message: Message (will be JSON serialized)
+        
+        Returns:
+            True if published, False without Redis/KeyDB or on error
+        """
+        if not self.redis_client:
+            return False
+        try:
+            self.redis_client.publish(self._make_key(channel), json.dumps(message))
+            return True
+        except Exception as e:
+            logger.error(f"Failed to publish to {channel}: {e}")
+            return False
+    
+    def subscribe(self, channel: str, on_message: Callable[[Any], None], on_state: Optional[Callable[[bool], None]] = None, retry_seconds: float = 5.0) -> bool:
+        """
+        Deliver messages published on a channel to on_message from a daemon thread.
+        The thread resubscribes after connection errors; on_state(True) is called once
+        the subscription is confirmed and on_state(False) when it is lost, so callers
+        can drop state that may have missed messages in between.
+        
+        Args:
+            channel: Channel name (prefixed like keys)
+            on_message: Called with each decoded message
+            on_state: Called with the subscription state
+            retry_seconds: Delay before resubscribing
+        
+        Returns:
+            True if the subscriber was started, False without Redis/KeyDB
+        """
+        if not self.redis_client:
+            return False
+        channel_key = self._make_key(channel)
+        
+        def listen():
+            while True:
+                pubsub = None
+                try:
+                    pubsub = self.redis_client.pubsub()
+                    pubsub.subscribe(channel_key)
+                    for message in pubsub.listen():
+                        if message.get("type") == "subscribe" and on_state:
+                            on_state(True)
+                        elif message.get("type") == "message":
+                            try:
+                                on_message(json.loads(message["data"]))
+                            except Exception as e:
+                                logger.error(f"Failed to handle message on {channel}: {e}")
+                except Exception as e:
+                    logger.warning(f"Subscription to {channel} lost: {e}")
+                finally:
+                    if on_state:
+                        on_state(False)
+                    if pubsub:
+                        try:
+                            pubsub.close()
+                        except Exception:
+                            pass
+                time.sleep(retry_seconds)
+        
+        threading.Thread(target=listen, name=f"cache-subscriber-{channel}", daemon=True).start()
+        return True
+    
+    def stream_append(self, key: str, values: list, max_length: Optional[int] = None) -> bool:
+        """
+        Append values to a stream in one round trip, trimming it to about max_length entries.
+        
+        Args:
+            key: Stream key
+            values: Values to append (each JSON serialized)
+            max_length: Approximate maximum stream length (oldest entries trimmed)
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        try:
+            cache_key = self._make_key(key)
+            
+            if self.redis_client:
+                pipe = self.redis_client.pipeline(transaction=False)
+                for value in values:
+                    pipe.xadd(cache_key, {"data": json.dumps(value)}, maxlen=max_length, approximate=True)
+                pipe.execute()
+                return True
+            else:
+                cached_item = self.fallback_cache.setdefault(cache_key, {'value': [], 'expiry': None})
+                cached_item['value'].extend(values)
+                if max_length:
+                    del cached_item['value'][:-max_length]
+                return True
+        
+        except Exception as e:
+            logger.error(f"Failed to append to stream {key}: {e}")
+            return False
+    
+    def stream_read(self, key: str, count: Optional[int] = None) -> list:
+        """
+        Read the newest entries of a stream, oldest first.
+        
+        Args:
+            key: Stream key
+            count: Maximum entries to read (all if omitted)
+        
+        Returns:
+            List of values
+        """
+        try:
+            cache_key = self._make_key(key)
+            
+            if self.redis_client:
+                entries = self.redis_client.xrevrange(cache_key, count=count)
+                return [json.loads(fields["data"]) for _, fields in reversed(entries)]
+            else:
+                cached_item = self.fallback_cache.get(cache_key)
+                values = cached_item['value'] if cached_item else []
+                return list(values[-count:] if count else values)
+        
+        except Exception as e:
+            logger.error(f"Failed to read stream {key}: {e}")
+            return []
+    
     def list_push(self, key: str, value: Any, max_length: Optional[int] = None) -> bool:
         """
         Push a value to a list and optionally trim to max length.
@@ -0,0 +1,195 @@
+"""
+Circuit breakers and adaptive timeouts for calls between services.
+
+A circuit breaker stops calling a dependency that keeps failing: after
+SERVICE_BREAKER_THRESHOLD consecutive failures it opens and callers fail
+immediately. After SERVICE_BREAKER_RESET seconds it lets one trial call through
+(half-open). A success closes it again and a failure re-opens it.
+
+An adaptive timeout derives a call's timeout from the recent p99 latency of the
+same endpoint. The timeout is the p99 times SERVICE_TIMEOUT_HEADROOM, never below
+SERVICE_TIMEOUT_FLOOR and never above the caller's own timeout. Timed-out calls
+count as samples at their timeout, so a dependency that slows down pushes its
+timeout back up instead of failing repeatedly at a stale limit. A call that only
+timed out because its timeout was tightened is not a breaker failure.
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Dict
+
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("SERVICE_BREAKER_THRESHOLD", "5"))
+DEFAULT_RESET_TIMEOUT = float(os.getenv("SERVICE_BREAKER_RESET", "30"))
+DEFAULT_TIMEOUT_FLOOR = float(os.getenv("SERVICE_TIMEOUT_FLOOR", "2"))
+DEFAULT_TIMEOUT_HEADROOM = float(os.getenv("SERVICE_TIMEOUT_HEADROOM", "2"))
+DEFAULT_TIMEOUT_MIN_SAMPLES = int(os.getenv("SERVICE_TIMEOUT_MIN_SAMPLES", "20"))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one dependency."""
+    
+    def __init__(self, name: str, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD, reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        """
+        Initialize the breaker.
+        
+        Args:
+            name: Dependency name used in logs and metrics
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open before a trial call
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._consecutive_failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._stats = {"successes": 0, "failures": 0, "rejected": 0, "opened": 0}
+    
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+    
+    def allow(self) -> bool:
+        """Whether a call may go through now; rejected calls are counted."""
+        with self._lock:
+            if self._state == OPEN and time.time() - self._opened_at >= self.reset_timeout:
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            
+            if self._state == CLOSED:
+                return True
+            if self._state == HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            
+            self._stats["rejected"] += 1
+            return False
+    
+    def record_success(self):
+        """Record a call the dependency handled; closes a half-open circuit."""
+        with self._lock:
+            self._stats["successes"] += 1
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                print(f"✅ Circuit breaker {self.name}: CLOSED after successful trial call")
+            self._state = CLOSED
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        """Record a failed call; opens the circuit at the threshold or after a failed trial."""
+        with self._lock:
+            self._stats["failures"] += 1
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or (self._state == CLOSED and self._consecutive_failures >= self.failure_threshold):
+                self._state = OPEN
+                self._opened_at = time.time()
+                self._trial_in_flight = False
+                self._stats["opened"] += 1
+                print(f"🚨 Circuit breaker {self.name}: OPEN after {self._consecutive_failures} consecutive failures, retrying in {self.reset_timeout}s")
+    
+    def release(self):
+        """Record a call whose outcome says nothing about the dependency; frees a half-open trial."""
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the breaker state and counters."""
+        with self._lock:
+            retry_in = max(self.reset_timeout - (time.time() - self._opened_at), 0) if self._state == OPEN else 0
+            return {
+                "state": self._state,
+                "consecutive_failures": self._consecutive_failures,
+                "retry_in_seconds": round(retry_in, 1),
+                **self._stats
+            }
+
+
+class AdaptiveTimeout:
+    """Timeout for one endpoint derived from its recent p99 latency."""
+    
+    def __init__(self, floor: float = DEFAULT_TIMEOUT_FLOOR, headroom: float = DEFAULT_TIMEOUT_HEADROOM, min_samples: int = DEFAULT_TIMEOUT_MIN_SAMPLES, window: int = 200):
+        """
+        Initialize the timeout.
+        
+        Args:
+            floor: Lowest timeout ever returned, in seconds
+            headroom: Multiplier applied to the observed p99
+            min_samples: Calls observed before the caller's timeout is tightened
+            window: Recent calls used for the p99
+        """
+        self.floor = floor
+        self.headroom = headroom
+        self.min_samples = min_samples
+        
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=window)
+    
+    def record(self, latency: float):
+        """Record a call's latency in seconds (the timeout, for calls that timed out)."""
+        with self._lock:
+            self._latencies.append(latency)
+    
+    def p99(self) -> float:
+        """Recent p99 latency in seconds (0 without samples)."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return 0.0
+        return latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)]
+    
+    def timeout(self, ceiling: float) -> float:
+        """Timeout for the next call, capped by the caller's own timeout."""
+        with self._lock:
+            samples = len(self._latencies)
+        if samples < self.min_samples:
+            return ceiling
+        return min(ceiling, max(self.floor, self.p99() * self.headroom))
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the sample count and current p99."""
+        with self._lock:
+            samples = len(self._latencies)
+        return {"samples": samples, "p99_seconds": round(self.p99(), 3)}
+
+
+# One breaker per dependency and one timeout per endpoint, shared by every caller in the process
+_breakers: Dict[str, CircuitBreaker] = {}
+_timeouts: Dict[str, AdaptiveTimeout] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str, **options) -> CircuitBreaker:
+    """Get the shared breaker for a dependency, creating it on first use."""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name, **options)
+        return _breakers[name]
+
+
+def get_adaptive_timeout(name: str, **options) -> AdaptiveTimeout:
+    """Get the shared adaptive timeout for an endpoint, creating it on first use."""
+    with _registry_lock:
+        if name not in _timeouts:
+            _timeouts[name] = AdaptiveTimeout(**options)
+        return _timeouts[name]
+
+
+def get_breaker_stats() -> Dict[str, Any]:
+    """Breaker state per dependency and p99 per endpoint for this process."""
+    with _registry_lock:
+        breakers = dict(_breakers)
+        timeouts = dict(_timeouts)
+    return {
+        "breakers": {name: breaker.get_stats() for name, breaker in breakers.items()},
+        "timeouts": {name: timeout.get_stats() for name, timeout in timeouts.items()}
+    }
@@ -0,0 +1,139 @@
+"""
+Background health probing for services with dependencies.
+Dependencies are checked concurrently on a timer with lightweight calls and the
+result is kept as a snapshot, so health endpoints answer immediately and never
+wait on (or load) a dependency.
+"""
+
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from .service_client import get_client
+
+
+def check_cache(cache) -> Dict[str, Any]:
+    """Check the KeyDB cache with a short-lived round trip."""
+    if not cache:
+        return {"healthy": True, "available": False}
+    
+    test_key = "health_check"
+    cache.set(test_key, "test", ttl=60)
+    healthy = cache.get(test_key) == "test"
+    cache.delete(test_key)
+    return {"healthy": healthy, "available": True}
+
+
+def check_http(base_url: str, path: str = "/health", timeout: float = 3.0) -> Dict[str, Any]:
+    """
+    Check a service's health endpoint once, without retries.
+    
+    The service is healthy when it answers 200; the status it reports
+    (e.g. "degraded") is passed through.
+    """
+    response = get_client(base_url).get(path, timeout=timeout, retries=0)
+    try:
+        reported = response.json().get("status")
+    except ValueError:
+        reported = None
+    return {"healthy": response.status_code == 200, "status_code": response.status_code, "reported_status": reported}
+
+
+class HealthProbe:
+    """
+    Runs named health checks on a background thread and caches the results.
+    
+    Each check returns a dict with at least a "healthy" key; exceptions are recorded
+    as unhealthy. All checks of a round run concurrently, so a round takes as long
+    as the slowest check rather than the sum. Readers get the last snapshot with its
+    age and never wait on a check.
+    """
+    
+    def __init__(self, checks: Dict[str, Callable[[], Dict[str, Any]]], interval: float = 15.0, stale_after: Optional[float] = None, name: str = "health-probe"):
+        """
+        Initialize the probe.
+        
+        Args:
+            checks: Check name -> callable returning the check result
+            interval: Seconds between probe rounds
+            stale_after: Age in seconds after which the snapshot is reported as stale
+                (defaults to three intervals)
+            name: Name of the background threads
+        """
+        self.checks = checks
+        self.interval = interval
+        self.stale_after = stale_after if stale_after is not None else interval * 3
+        self.name = name
+        
+        self._lock = threading.Lock()
+        self._results: Dict[str, Dict[str, Any]] = {}
+        self._checked_at: Optional[float] = None
+        self._round_ms: Optional[float] = None
+        self._probe_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._executor = ThreadPoolExecutor(max_workers=max(len(checks), 1), thread_name_prefix=name)
+    
+    def start(self):
+        """Start probing in a daemon thread (idempotent)."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the background thread."""
+        self._stop.set()
+    
+    def _run(self):
+        """Probe immediately, then every interval until stopped."""
+        while not self._stop.is_set():
+            self.probe_once()
+            self._stop.wait(self.interval)
+    
+    @staticmethod
+    def _check(check: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+        """Run one check, timing it and recording exceptions as unhealthy."""
+        started = time.time()
+        try:
+            result = dict(check())
+        except Exception as e:
+            result = {"healthy": False, "error": str(e)}
+        result["latency_ms"] = round((time.time() - started) * 1000, 2)
+        return result
+    
+    def probe_once(self) -> Dict[str, Any]:
+        """Run every check once, concurrently, and publish the results."""
+        started = time.time()
+        futures = {name: self._executor.submit(self._check, check) for name, check in self.checks.items()}
+        results = {name: future.result() for name, future in futures.items()}
+        
+        with self._lock:
+            self._results = results
+            self._checked_at = time.time()
+            self._round_ms = round((self._checked_at - started) * 1000, 2)
+            self._probe_count += 1
+        
+        return self.snapshot()
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Get the last published results with their age."""
+        with self._lock:
+            checked_at = self._checked_at
+            results = {name: dict(result) for name, result in self._results.items()}
+            probe_count = self._probe_count
+            round_ms = self._round_ms
+        
+        age = time.time() - checked_at if checked_at is not None else None
+        return {
+            "checks": results,
+            "checked_at": datetime.fromtimestamp(checked_at).isoformat() if checked_at is not None else None,
+            "age_seconds": round(age, 2) if age is not None else None,
+            "stale": age is None or age > self.stale_after,
+            "probe_count": probe_count,
+            "round_ms": round_ms,
+            "interval_seconds": self.interval
+        }
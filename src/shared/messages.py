@@ -0,0 +1,136 @@
+"""
+Conversation message schema shared by the Discord handlers, message router,
+conversation coordinator and LLM service.
+
+A message is a dict with "role" ("user", "assistant" or "system"), "content",
+"character" (the Griffin who spoke, None for users) and an optional "timestamp".
+Conversion is strict: anything that cannot be mapped raises MessageFormatError
+instead of being dropped silently.
+"""
+
+import os
+import json
+from typing import Any, Dict, List, Optional
+
+CHARACTERS = ("peter", "brian", "stewie")
+ROLES = ("user", "assistant", "system")
+
+# Most recent messages sent to the LLM service with a generation request
+MAX_HISTORY_MESSAGES = int(os.getenv("HISTORY_MAX_MESSAGES", "10"))
+
+# Legacy LangChain-style {"type": ...} history
+_LEGACY_TYPES = {"human": "user", "ai": "assistant", "system": "system"}
+
+
+class MessageFormatError(ValueError):
+    """Raised when a history entry cannot be converted to a message."""
+
+
+def make_message(role: str, content: str, character: Optional[str] = None, timestamp: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Build a validated message.
+    
+    Raises:
+        MessageFormatError: If the role is unknown or the content is empty
+    """
+    if role not in ROLES:
+        raise MessageFormatError(f"unknown role {role!r} (expected one of {', '.join(ROLES)})")
+    if not isinstance(content, str) or not content.strip():
+        raise MessageFormatError("message content must be a non-empty string")
+    
+    character = character.lower() if isinstance(character, str) else None
+    if character == "user":
+        character = None
+    
+    message = {"role": role, "content": content, "character": character}
+    if timestamp:
+        message["timestamp"] = timestamp
+    return message
+
+
+def from_stored_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a conversation_history:{channel_id} record ("message_type" is "user" or a character)."""
+    speaker = str(record.get("message_type") or "").lower()
+    if speaker in CHARACTERS:
+        return make_message("assistant", record.get("content"), speaker, record.get("timestamp"))
+    if speaker == "user":
+        return make_message("user", record.get("content"), timestamp=record.get("timestamp"))
+    raise MessageFormatError(f"unknown message_type {speaker!r}")
+
+
+def speaker(message: Dict[str, Any]) -> str:
+    """Who a message is from: the character's name, or "user"/"system"."""
+    return message.get("character") or message.get("role", "user")
+
+
+def normalize_message(raw: Any) -> Dict[str, Any]:
+    """
+    Convert any supported history entry to a message.
+    
+    Accepts messages, legacy {"type": "human"|"ai"} dicts and stored records.
+    
+    Raises:
+        MessageFormatError: If the entry matches none of them
+    """
+    if not isinstance(raw, dict):
+        raise MessageFormatError(f"expected a dict, got {type(raw).__name__}")
+    
+    if "role" in raw:
+        return make_message(raw["role"], raw.get("content"), raw.get("character"), raw.get("timestamp"))
+    if "type" in raw:
+        if raw["type"] not in _LEGACY_TYPES:
+            raise MessageFormatError(f"unknown type {raw['type']!r}")
+        return make_message(_LEGACY_TYPES[raw["type"]], raw.get("content"), raw.get("character"), raw.get("timestamp"))
+    if "message_type" in raw:
+        return from_stored_record(raw)
+    raise MessageFormatError("message has no role, type or message_type")
+
+
+def normalize_history(history: Optional[List[Any]]) -> List[Dict[str, Any]]:
+    """
+    Convert a whole history, oldest first.
+    
+    Raises:
+        MessageFormatError: Naming the index of the first bad entry
+    """
+    messages = []
+    for index, raw in enumerate(history or []):
+        try:
+            messages.append(normalize_message(raw))
+        except MessageFormatError as e:
+            raise MessageFormatError(f"message {index}: {e}") from e
+    return messages
+
+
+def without_current_turn(history: List[Dict[str, Any]], user_message: Optional[str]) -> List[Dict[str, Any]]:
+    """
+    Drop the last message when it is the current user message.
+    
+    The Discord handlers store the incoming message before reading the history,
+    so their history already ends with the turn that is also sent as user_message.
+    """
+    if history and user_message and history[-1]["role"] == "user" and history[-1]["content"].strip() == user_message.strip():
+        return history[:-1]
+    return history
+
+
+def to_wire(history: Optional[List[Any]], limit: int = MAX_HISTORY_MESSAGES) -> List[Dict[str, Any]]:
+    """
+    Prepare history for a generation request.
+    
+    Keeps the most recent limit messages and only the fields the LLM service
+    reads, so nothing is serialized that the model never sees.
+    """
+    messages = normalize_history(list(history or [])[-limit:]) if limit > 0 else []
+    wire = []
+    for message in messages:
+        entry = {"role": message["role"], "content": message["content"]}
+        if message["character"]:
+            entry["character"] = message["character"]
+        wire.append(entry)
+    return wire
+
+
+def encoded_size(history: Optional[List[Any]]) -> int:
+    """Size in bytes of the history as sent in a JSON request body."""
+    return len(json.dumps(history or [], ensure_ascii=False).encode("utf-8"))
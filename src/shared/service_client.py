@@ -0,0 +1,232 @@
+"""
+Pooled HTTP client for calls between services.
+
+One client per target base URL keeps a requests Session with a keep-alive
+connection pool, so repeated calls reuse TCP connections instead of connecting
+every time. Every call gets a connect and read timeout, optional retries with
+backoff and an optional overall deadline, and is counted in per-target latency
+and error metrics. Calls made inside a trace carry the trace headers and are
+recorded as client spans.
+
+Retry rules:
+- Failures before the request is sent (connection refused, unresolvable host, connect
+  timeout) are retried for every method, since the target never saw the request
+- Connections dropped after sending (reset, closed before the response), read timeouts
+  and 502/503/504 responses are only retried for idempotent calls (GET/HEAD, or
+  idempotent=True), since the target may already have acted on the request
+"""
+
+import os
+import time
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ConnectTimeoutError, MaxRetryError, NewConnectionError
+
+from .tracing import current_span, span, trace_headers
+
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("SERVICE_CONNECT_TIMEOUT", "2"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("SERVICE_READ_TIMEOUT", "30"))
+DEFAULT_POOL_SIZE = int(os.getenv("SERVICE_POOL_SIZE", "20"))
+DEFAULT_RETRIES = int(os.getenv("SERVICE_RETRIES", "1"))
+DEFAULT_BACKOFF = float(os.getenv("SERVICE_RETRY_BACKOFF", "0.2"))
+
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class DeadlineExceeded(requests.exceptions.Timeout):
+    """Raised when a call's overall deadline runs out before an attempt could complete."""
+
+
+def _failed_before_send(error: requests.exceptions.ConnectionError) -> bool:
+    """Whether a connection error happened while connecting, before any of the request was sent."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, (NewConnectionError, ConnectTimeoutError))
+
+
+class ServiceClient:
+    """Keep-alive HTTP client for one target service with retries and metrics."""
+    
+    def __init__(self, base_url: str, name: Optional[str] = None, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT, read_timeout: float = DEFAULT_READ_TIMEOUT, retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF, pool_size: int = DEFAULT_POOL_SIZE, latency_window: int = 200):
+        """
+        Initialize the client.
+        
+        Args:
+            base_url: Target base URL, e.g. http://llm-service:6001
+            name: Name used in metrics (defaults to the base URL)
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Default seconds to wait for a response
+            retries: Default retries after the first attempt
+            backoff: Base delay before a retry, doubled each time
+            pool_size: Connections kept alive to the target
+            latency_window: Recent calls used for latency percentiles
+        """
+        self.base_url = base_url.rstrip("/")
+        self.name = name or self.base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff = backoff
+        
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        self._lock = threading.Lock()
+        self._latencies_ms = deque(maxlen=latency_window)
+        self._stats = {"requests": 0, "errors": 0, "retries": 0, "timeouts": 0, "connection_errors": 0, "max_latency_ms": 0.0}
+        self._by_endpoint: Dict[str, Dict[str, int]] = {}
+    
+    def _record(self, endpoint: str, latency_ms: float, error: Optional[str]):
+        """Count one attempt."""
+        with self._lock:
+            self._stats["requests"] += 1
+            self._latencies_ms.append(latency_ms)
+            self._stats["max_latency_ms"] = max(self._stats["max_latency_ms"], latency_ms)
+            endpoint_stats = self._by_endpoint.setdefault(endpoint, {"requests": 0, "errors": 0})
+            endpoint_stats["requests"] += 1
+            if error:
+                self._stats["errors"] += 1
+                endpoint_stats["errors"] += 1
+                if error in ("timeouts", "connection_errors"):
+                    self._stats[error] += 1
+    
+    def request(self, method: str, path: str, timeout: Optional[float] = None, retries: Optional[int] = None, deadline: Optional[float] = None, idempotent: Optional[bool] = None, **kwargs) -> requests.Response:
+        """
+        Send a request, retrying per the module's retry rules.
+        
+        Args:
+            method: HTTP method
+            path: Path appended to the base URL (or a full URL on the same target)
+            timeout: Read timeout per attempt (defaults to the client's)
+            retries: Retries after the first attempt (defaults to the client's)
+            deadline: Overall seconds for all attempts; each attempt's timeout is capped by what is left
+            idempotent: Whether timeouts and 502/503/504 may be retried (defaults to GET/HEAD/OPTIONS)
+            **kwargs: Passed to requests (json, params, headers, ...)
+        
+        Returns:
+            The response of the last attempt (any status code)
+        
+        Raises:
+            requests.exceptions.RequestException: If no attempt produced a response
+        """
+        method = method.upper()
+        endpoint = path.split("?", 1)[0] if not path.startswith("http") else path
+        if current_span() is None:
+            return self._send(method, path, endpoint, timeout, retries, deadline, idempotent, **kwargs)
+        
+        with span(f"{method} {self.name}{endpoint}", kind="client", target=self.name) as call:
+            kwargs["headers"] = {**trace_headers(), **(kwargs.get("headers") or {})}
+            response = self._send(method, path, endpoint, timeout, retries, deadline, idempotent, **kwargs)
+            call.set_attribute("status_code", response.status_code)
+            return response
+    
+    def _send(self, method: str, path: str, endpoint: str, timeout: Optional[float], retries: Optional[int], deadline: Optional[float], idempotent: Optional[bool], **kwargs) -> requests.Response:
+        """Run the attempts of one request."""
+        url = path if path.startswith("http") else f"{self.base_url}{path}"
+        read_timeout = timeout if timeout is not None else self.read_timeout
+        retries = self.retries if retries is None else retries
+        idempotent = method in IDEMPOTENT_METHODS if idempotent is None else idempotent
+        give_up_at = time.time() + deadline if deadline else None
+        
+        attempt = 0
+        while True:
+            attempt_timeout = read_timeout
+            if give_up_at:
+                remaining = give_up_at - time.time()
+                if remaining <= 0:
+                    raise DeadlineExceeded(f"{self.name}{endpoint}: deadline of {deadline}s exceeded after {attempt} attempt(s)")
+                attempt_timeout = min(read_timeout, remaining)
+            
+            started = time.time()
+            try:
+                response = self.session.request(method, url, timeout=(min(self.connect_timeout, attempt_timeout), attempt_timeout), **kwargs)
+            except requests.exceptions.ConnectionError as e:
+                # ConnectTimeout is both a ConnectionError and a Timeout; it never reached the target
+                self._record(endpoint, (time.time() - started) * 1000, "connection_errors")
+                if attempt >= retries or not (idempotent or _failed_before_send(e)):
+                    raise
+                error = e
+            except requests.exceptions.Timeout as e:
+                self._record(endpoint, (time.time() - started) * 1000, "timeouts")
+                if attempt >= retries or not idempotent:
+                    raise
+                error = e
+            else:
+                failed = response.status_code >= 500
+                self._record(endpoint, (time.time() - started) * 1000, "status" if failed else None)
+                if response.status_code not in RETRY_STATUSES or attempt >= retries or not idempotent:
+                    return response
+                error = f"HTTP {response.status_code}"
+            
+            attempt += 1
+            delay = self.backoff * (2 ** (attempt - 1))
+            if give_up_at and time.time() + delay >= give_up_at:
+                raise DeadlineExceeded(f"{self.name}{endpoint}: deadline of {deadline}s leaves no time to retry after {error}")
+            with self._lock:
+                self._stats["retries"] += 1
+            time.sleep(delay)
+    
+    def get(self, path: str, **kwargs) -> requests.Response:
+        """GET request."""
+        return self.request("GET", path, **kwargs)
+    
+    def post(self, path: str, **kwargs) -> requests.Response:
+        """POST request."""
+        return self.request("POST", path, **kwargs)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get request, error, retry and latency figures for the target."""
+        with self._lock:
+            latencies = sorted(self._latencies_ms)
+            stats = dict(self._stats)
+            by_endpoint = {endpoint: dict(s) for endpoint, s in self._by_endpoint.items()}
+        
+        return {
+            "base_url": self.base_url,
+            "requests": stats["requests"],
+            "errors": stats["errors"],
+            "error_rate": round(stats["errors"] / max(stats["requests"], 1) * 100, 2),
+            "retries": stats["retries"],
+            "timeouts": stats["timeouts"],
+            "connection_errors": stats["connection_errors"],
+            "avg_latency_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+            "p95_latency_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 2) if latencies else 0.0,
+            "max_latency_ms": round(stats["max_latency_ms"], 2),
+            "endpoints": by_endpoint
+        }
+
+
+# One client (and connection pool) per target, shared by every caller in the process
+_clients: Dict[str, ServiceClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(base_url: str, name: Optional[str] = None, **options) -> ServiceClient:
+    """
+    Get the shared client for a target, creating it on first use.
+    
+    Options only apply when the client is created; per-call timeouts, retries and
+    deadlines are passed to request() instead.
+    """
+    key = base_url.rstrip("/")
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = ServiceClient(base_url, name=name, **options)
+        return _clients[key]
+
+
+def get_client_stats() -> Dict[str, Dict[str, Any]]:
+    """Metrics for every target this process has called, keyed by client name."""
+    with _clients_lock:
+        clients = list(_clients.values())
+    return {client.name: client.get_stats() for client in clients}
@@ -0,0 +1,314 @@
+"""
+Request tracing across services.
+
+A trace follows one request through every service it touches. Each service
+records spans (named, timed pieces of work) tagged with the trace ID and their
+parent span, and passes the trace on in X-Trace-Id / X-Parent-Span-Id headers:
+init_tracing() continues the caller's trace for incoming Flask requests, and the
+shared service client adds the headers and a client span to every outbound call.
+Finished spans are exported off the request path to a KeyDB stream or a JSONL
+file, which scripts/trace_summary.py turns into per-stage latency percentiles.
+"""
+
+import os
+import json
+import time
+import uuid
+import queue
+import random
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+TRACE_HEADER = "X-Trace-Id"
+PARENT_SPAN_HEADER = "X-Parent-Span-Id"
+SAMPLED_HEADER = "X-Trace-Sampled"
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "keydb").lower()  # keydb, jsonl or off
+TRACING_REDIS_URL = os.getenv("TRACING_REDIS_URL") or os.getenv("REDIS_URL")
+TRACING_STREAM = os.getenv("TRACING_STREAM", "spans")
+TRACING_STREAM_MAX_LENGTH = int(os.getenv("TRACING_STREAM_MAX_LENGTH", "50000"))
+TRACING_FILE = os.getenv("TRACING_FILE", "logs/traces.jsonl")
+TRACING_SAMPLE_RATE = float(os.getenv("TRACING_SAMPLE_RATE", "1.0"))
+TRACING_QUEUE_SIZE = int(os.getenv("TRACING_QUEUE_SIZE", "5000"))
+
+# Requests that would only add noise to traces
+UNTRACED_PATHS = ("/health", "/ready", "/metrics")
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+_service_name = os.getenv("SERVICE_NAME", "unknown")
+
+
+def _new_id(length: int = 16) -> str:
+    return uuid.uuid4().hex[:length]
+
+
+class Span:
+    """One timed piece of work within a trace."""
+    
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str] = None, sampled: bool = True, attributes: Optional[Dict[str, Any]] = None, start: Optional[float] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.service = _service_name
+        self.attributes = dict(attributes or {})
+        self.start = start if start is not None else time.time()
+        self.duration_ms: Optional[float] = None
+        self.error: Optional[str] = None
+    
+    def set_attribute(self, key: str, value: Any):
+        """Attach a value to the span (status codes, cache outcome, model, ...)."""
+        self.attributes[key] = value
+    
+    def finish(self, error: Optional[Any] = None, end: Optional[float] = None):
+        """Record the duration and hand the span to the exporter; later calls are ignored."""
+        if self.duration_ms is not None:
+            return
+        self.duration_ms = ((end if end is not None else time.time()) - self.start) * 1000
+        if error is not None:
+            self.error = error if isinstance(error, str) else f"{type(error).__name__}: {error}"
+        if self.sampled:
+            _exporter.submit(self.to_dict())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "service": self.service,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": round(self.duration_ms or 0.0, 3),
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class SpanExporter:
+    """
+    Writes finished spans from a background thread in batches.
+    
+    Spans are queued without blocking; when the queue is full they are dropped
+    and counted, so tracing never slows down or fails a request.
+    """
+    
+    def __init__(self, kind: str = TRACING_EXPORTER, path: str = TRACING_FILE, redis_url: Optional[str] = TRACING_REDIS_URL, stream: str = TRACING_STREAM, max_length: int = TRACING_STREAM_MAX_LENGTH, queue_size: int = TRACING_QUEUE_SIZE, batch_size: int = 200):
+        """
+        Initialize the exporter; the writer thread starts with the first span.
+        
+        Args:
+            kind: "keydb", "jsonl" or "off"
+            path: JSONL file for the jsonl exporter
+            redis_url: KeyDB for the keydb exporter (off when not set)
+            stream: Stream key for the keydb exporter
+            max_length: Approximate number of spans kept in the stream
+            queue_size: Spans buffered before new ones are dropped
+            batch_size: Maximum spans written at once
+        """
+        if kind == "keydb" and not redis_url:
+            kind = "off"
+        self.kind = kind
+        self.path = path
+        self.redis_url = redis_url
+        self.stream = stream
+        self.max_length = max_length
+        self.batch_size = batch_size
+        self.spans: queue.Queue = queue.Queue(maxsize=queue_size)
+        
+        self._cache = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._stats = {"exported": 0, "dropped": 0, "failed": 0}
+    
+    def submit(self, span: Dict[str, Any]):
+        """Queue a finished span without blocking."""
+        if self.kind == "off":
+            return
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                    self._thread.start()
+        try:
+            self.spans.put_nowait(span)
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            return
+        with self._lock:
+            self._queued += 1
+    
+    def _run(self):
+        """Drain the queue forever, writing whatever has accumulated in one batch."""
+        while True:
+            batch = [self.spans.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.spans.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                written = self._write(batch)
+            except Exception as e:
+                written = False
+                print(f"⚠️ Tracing: Failed to export {len(batch)} spans: {e}")
+            with self._lock:
+                self._stats["exported" if written else "failed"] += len(batch)
+    
+    def _write(self, batch: List[Dict[str, Any]]) -> bool:
+        if self.kind == "jsonl":
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(span) + "\n" for span in batch))
+            return True
+        
+        if self._cache is None:
+            from .cache import BotCache
+            self._cache = BotCache(redis_url=self.redis_url, prefix="tracing")
+            if not self._cache.redis_client:
+                # An in-memory stream would be invisible to the summarizer
+                print(f"⚠️ Tracing: KeyDB unavailable at {self.redis_url}, span export disabled")
+                self.kind = "off"
+                return False
+        return self._cache.stream_append(self.stream, batch, max_length=self.max_length)
+    
+    def flush(self, timeout: float = 5.0) -> bool:
+        """Wait until queued spans have been written (for tests and shutdown)."""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if self._stats["exported"] + self._stats["failed"] >= self._queued:
+                    return True
+            time.sleep(0.01)
+        return False
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get export counters."""
+        with self._lock:
+            return {"exporter": self.kind, "queue_depth": self.spans.qsize(), **self._stats}
+
+
+_exporter = SpanExporter()
+
+
+def configure_tracing(service_name: str, exporter: Optional[SpanExporter] = None):
+    """Set the service name spans are recorded under, and optionally replace the exporter."""
+    global _service_name, _exporter
+    _service_name = service_name
+    if exporter is not None:
+        _exporter = exporter
+
+
+def current_span() -> Optional[Span]:
+    """The span the calling code runs in, if any."""
+    return _current_span.get()
+
+
+def start_span(name: str, **attributes) -> Span:
+    """Start a child of the current span, or a new (sampled per TRACING_SAMPLE_RATE) trace."""
+    parent = _current_span.get()
+    if parent:
+        return Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes)
+    return Span(name, _new_id(32), sampled=random.random() < TRACING_SAMPLE_RATE, attributes=attributes)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Run a block as a span; exceptions are recorded on the span and re-raised."""
+    current = start_span(name, **attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(error=e)
+        raise
+    finally:
+        _current_span.reset(token)
+        current.finish()
+
+
+def record_span(name: str, started: float, duration_ms: float, **attributes):
+    """Record an already measured interval (e.g. a queue wait) under the current span."""
+    parent = _current_span.get()
+    if parent:
+        recorded = Span(name, parent.trace_id, parent.span_id, parent.sampled, attributes, start=started)
+        recorded.finish(end=started + duration_ms / 1000)
+
+
+def trace_headers() -> Dict[str, str]:
+    """Headers that continue the current trace in the called service (empty outside a trace)."""
+    current = _current_span.get()
+    if not current:
+        return {}
+    return {
+        TRACE_HEADER: current.trace_id,
+        PARENT_SPAN_HEADER: current.span_id,
+        SAMPLED_HEADER: "1" if current.sampled else "0"
+    }
+
+
+def wrap(fn: Callable) -> Callable:
+    """
+    Bind a callable to the caller's trace so work handed to another thread
+    (executors, run_in_executor) is recorded under the current span.
+    """
+    context = contextvars.copy_context()
+    
+    def run(*args, **kwargs):
+        # A context can only be entered by one thread at a time
+        return context.copy().run(fn, *args, **kwargs)
+    
+    return run
+
+
+def init_tracing(app, service_name: str):
+    """
+    Record a server span for every request a Flask app handles, continuing the
+    caller's trace when it sent one, and return the trace ID in X-Trace-Id.
+    """
+    from flask import g, request
+    
+    configure_tracing(service_name)
+    
+    @app.before_request
+    def _start_request_span():
+        if request.path in UNTRACED_PATHS:
+            return
+        name = f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+        trace_id = request.headers.get(TRACE_HEADER)
+        if trace_id:
+            server_span = Span(name, trace_id, request.headers.get(PARENT_SPAN_HEADER), request.headers.get(SAMPLED_HEADER, "1") != "0", {"kind": "server"})
+        else:
+            server_span = Span(name, _new_id(32), sampled=random.random() < TRACING_SAMPLE_RATE, attributes={"kind": "server"})
+        g._trace_span = server_span
+        g._trace_token = _current_span.set(server_span)
+    
+    @app.after_request
+    def _tag_response(response):
+        server_span = g.get("_trace_span")
+        if server_span:
+            server_span.set_attribute("status_code", response.status_code)
+            response.headers[TRACE_HEADER] = server_span.trace_id
+        return response
+    
+    @app.teardown_request
+    def _finish_request_span(exc):
+        server_span = g.pop("_trace_span", None)
+        if server_span:
+            try:
+                _current_span.reset(g.pop("_trace_token"))
+            except ValueError:
+                # Streamed responses finish in a different context than they started
+                pass
+            server_span.finish(error=exc)
+
+
+def get_tracing_stats() -> Dict[str, Any]:
+    """Span export counters for this process."""
+    return {"service": _service_name, "sample_rate": TRACING_SAMPLE_RATE, **_exporter.get_stats()}
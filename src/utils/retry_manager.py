@@ -162,6 +162,13 @@ class RetryConfig:
         "operation_name": "discord_message"
     }
     
+    # Best-of-N organic generation - each attempt already scores several candidates
+    ORGANIC_BEST_OF = {
+        "max_attempts": 2,
+        "base_delay": 0.5,
+        "operation_name": "organic_best_of"
+    }
+    
     # Fallback generation - increased to 3 attempts since these are important 
     FALLBACK_GENERATION = {
         "max_attempts": 3,  # Increased from 1 to 3 for better fallbacks
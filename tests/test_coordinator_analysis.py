@@ -0,0 +1,66 @@
+import pytest
+import json
+import sys
+import os
+from unittest.mock import Mock
+
+# Add repository root and src/ (the coordinator image's layout) to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from src.services.conversation_coordinator import server
+from src.services.llm_service.structured import parse_structured
+
+
+def _llm_answering(answer: dict):
+    """A stand-in LLM service that validates the model's answer against the posted schema, as /generate does."""
+    def post(path, json=None, **kwargs):
+        parsed, errors = parse_structured(_json_text(answer), json["schema"])
+        response = Mock(status_code=200)
+        response.json.return_value = {"response": _json_text(answer), "parsed": parsed, "validation_errors": errors}
+        return response
+    return post
+
+
+def _json_text(value) -> str:
+    return json.dumps(value)
+
+
+class TestAnalysisCharacterCasing:
+    """Test suite for character names in the coordinator's schema-validated analysis calls."""
+    
+    def test_schemas_use_the_prompt_casing(self):
+        """Enum values match the title-cased names the prompts show."""
+        organic = server._organic_analysis_schema(["peter", "brian"])
+        continuation = server._continuation_analysis_schema(["brian", "stewie"])
+        
+        assert organic["properties"]["best_character"]["enum"] == ["Peter", "Brian", "none"]
+        assert continuation["properties"]["character"]["enum"] == ["Brian", "Stewie", "none"]
+    
+    def test_organic_answer_in_prompt_casing_is_accepted(self, monkeypatch):
+        """A model answering "Brian", as the prompt spells it, passes validation and selects brian."""
+        monkeypatch.setattr(server.llm_client, "post", _llm_answering({
+            "should_respond": True, "best_character": "Brian", "confidence": 0.8, "reason": "He'd correct Peter"
+        }))
+        
+        result = server.coordinator.analyze_organic_conversation_opportunity("Beer is a vegetable", "peter", "test-organic")
+        
+        assert result["analysis_type"] == "llm_intelligent"
+        assert result["selected_character"] == "brian"
+    
+    def test_continuation_answer_in_prompt_casing_is_accepted(self, monkeypatch):
+        """The continuation analysis maps "Stewie" back to the stewie key."""
+        monkeypatch.setattr(server.llm_client, "post", _llm_answering({
+            "continue": True, "reason": "Stewie would mock this", "character": "Stewie"
+        }))
+        
+        result = server.coordinator.analyze_conversation_continuation(
+            [{"role": "user", "content": "Who wants pizza?"}], "peter", "Holy crap, pizza!", "test-continuation"
+        )
+        
+        assert result["analysis_type"] == "llm_intelligent"
+        assert result["suggested_character"] == "stewie"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,159 @@
+import pytest
+import json
+import socket
+import threading
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service.backend_pool import BackendPool
+from src.services.llm_service.health_probe import check_ollama
+
+
+def _make_fake_ollama(name):
+    """Start a fake Ollama that answers version, tags and generate requests."""
+    
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, body):
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def do_GET(self):
+            if self.path == "/api/version":
+                self._send({"version": "0.1.32"})
+            else:
+                self._send({"models": [{"name": "llama3:8b-instruct-q5_K_M"}]})
+        
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            self._send({"response": f"hello from {name}", "done": True})
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def _unused_url():
+    """A local URL nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def fake_backends():
+    servers = [_make_fake_ollama(name) for name in ("a", "b")]
+    yield [url for _, url in servers]
+    for server, _ in servers:
+        server.shutdown()
+
+
+class TestBackendPool:
+    """Test suite for Ollama backend pool routing."""
+    
+    def test_routes_to_least_outstanding_backend(self):
+        """New requests go to the backend with the fewest in-flight requests."""
+        pool = BackendPool(["http://a", "http://b"], client_factory=lambda url: url)
+        
+        first = pool.acquire()
+        second = pool.acquire()
+        assert {first.base_url, second.base_url} == {"http://a", "http://b"}
+        
+        pool.release(first, latency_ms=10)
+        third = pool.acquire()
+        assert third.base_url == first.base_url
+    
+    def test_consecutive_failures_eject_backend(self):
+        """A backend that keeps failing stops receiving traffic."""
+        pool = BackendPool(["http://a", "http://b"], client_factory=lambda url: url, failure_threshold=2)
+        bad = pool.backends[0]
+        
+        for _ in range(2):
+            pool.acquire()
+            pool.release(bad, error=RuntimeError("connection refused"))
+        
+        chosen = [pool.acquire().base_url for _ in range(4)]
+        assert "http://a" not in chosen
+        assert pool.get_stats()["backends"]["http://a"]["ejected"] is True
+    
+    def test_all_ejected_still_attempts_a_backend(self):
+        """With every backend ejected the pool still hands one out."""
+        pool = BackendPool(["http://a"], client_factory=lambda url: url, failure_threshold=1)
+        pool.release(pool.acquire(), error=RuntimeError("down"))
+        
+        assert pool.acquire().base_url == "http://a"
+    
+    def test_only_backend_errors_count_against_a_lease(self):
+        """Caller errors inside a lease never eject a backend; transport and 5xx errors do."""
+        pool = BackendPool(["http://a"], client_factory=lambda url: url, failure_threshold=2)
+        
+        for _ in range(3):
+            with pytest.raises(KeyError):
+                with pool.lease():
+                    raise KeyError("prompt")
+        stats = pool.get_stats()["backends"]["http://a"]
+        assert (stats["failures"], stats["ejected"], stats["in_flight"]) == (0, False, 0)
+        
+        for error in (requests.exceptions.ConnectionError("refused"), ValueError("Ollama call failed with status code 500.")):
+            with pytest.raises(type(error)):
+                with pool.lease():
+                    raise error
+        stats = pool.get_stats()["backends"]["http://a"]
+        assert (stats["failures"], stats["ejected"], stats["in_flight"]) == (2, True, 0)
+    
+    def test_probe_ejects_dead_and_readmits_recovered_backend(self, fake_backends):
+        """Health probes eject unreachable backends and re-admit them once they answer."""
+        dead = _unused_url()
+        pool = BackendPool([fake_backends[0], dead], client_factory=lambda url: url)
+        check = lambda url: check_ollama(url, "llama3:8b-instruct-q5_K_M", timeout=1)
+        
+        result = pool.probe(check)
+        assert result["healthy"] is True
+        assert result["healthy_backends"] == 1
+        assert pool.get_stats()["backends"][dead]["ejected"] is True
+        
+        # The dead backend comes back (simulated by pointing it at a live server)
+        pool.backends[1].base_url = fake_backends[1]
+        pool.probe(check)
+        assert pool.get_stats()["available_backends"] == 2
+    
+    def test_lease_spreads_generations_and_records_latency(self, fake_backends):
+        """Concurrent generations through leases land on both fake Ollama servers."""
+        pool = BackendPool(fake_backends, client_factory=lambda url: url)
+        barrier = threading.Barrier(4)
+        responses = []
+        
+        def generate():
+            with pool.lease() as backend:
+                barrier.wait(2)
+                response = requests.post(f"{backend.llm}/api/generate", json={"prompt": "hi"}, timeout=2)
+                responses.append(response.json()["response"])
+        
+        threads = [threading.Thread(target=generate) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        stats = pool.get_stats()["backends"]
+        assert sorted(responses) == ["hello from a"] * 2 + ["hello from b"] * 2
+        assert all(backend["requests"] == 2 for backend in stats.values())
+        assert all(backend["avg_latency_ms"] > 0 for backend in stats.values())
+        assert all(backend["in_flight"] == 0 for backend in stats.values())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
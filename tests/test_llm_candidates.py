@@ -0,0 +1,67 @@
+import pytest
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service.candidates import heuristic_scorer, select_best
+
+
+class TestCandidateScoring:
+    """Test suite for best-of-N candidate scoring and selection."""
+    
+    def test_clean_reply_passes(self):
+        """An in-character one-liner scores full marks."""
+        scores = heuristic_scorer(["Holy crap, Lois, that's the best beer ever!"], {})
+        
+        assert scores[0]["score"] == 100.0
+        assert scores[0]["passed"] is True
+    
+    def test_role_markers_and_stage_directions_are_penalized(self):
+        """Speaking as another participant or narrating actions fails the candidate."""
+        scores = heuristic_scorer(
+            ["*laughs* Hehehe.\nBrian: Peter, stop it.", "Hehehe, that's funny stuff right there."],
+            {}
+        )
+        
+        assert scores[0]["passed"] is False
+        assert "speaks as another participant" in scores[0]["details"]["issues"]
+        assert "stage directions" in scores[0]["details"]["issues"]
+        assert scores[1]["passed"] is True
+    
+    def test_empty_and_parroting_candidates(self):
+        """Empty output fails and echoing the previous message is penalized."""
+        previous = "the brewing process is quite fascinating"
+        scores = heuristic_scorer(["", "The brewing process is quite fascinating"], {"context": previous})
+        
+        assert scores[0]["score"] == 0.0
+        assert "repeats previous message" in scores[1]["details"]["issues"]
+    
+    def test_max_words_limit(self):
+        """Replies beyond the word budget lose points."""
+        long_reply = " ".join(["blah"] * 40)
+        scores = heuristic_scorer([long_reply], {"max_words": 25})
+        
+        assert "too long" in scores[0]["details"]["issues"]
+        assert scores[0]["score"] == 70.0
+    
+    def test_select_best_prefers_passing_candidates(self):
+        """A passing candidate beats a higher-scoring one that failed."""
+        scores = [
+            {"score": 90.0, "passed": False},
+            {"score": 70.0, "passed": True},
+            {"score": 80.0, "passed": True}
+        ]
+        
+        assert select_best(["a", "b", "c"], scores) == 2
+    
+    def test_select_best_falls_back_to_top_score(self):
+        """With no passing candidate, the top score is returned."""
+        scores = [{"score": 10.0, "passed": False}, {"score": 40.0, "passed": False}]
+        
+        assert select_best(["a", "b"], scores) == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,137 @@
+import pytest
+import json
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service.health_probe import HealthProbe, check_ollama
+
+
+class _FakeOllamaHandler(BaseHTTPRequestHandler):
+    """Serves the lightweight Ollama endpoints and counts generation calls."""
+    
+    generate_calls = 0
+    
+    def do_GET(self):
+        if self.path == "/api/version":
+            body = {"version": "0.1.32"}
+        elif self.path == "/api/tags":
+            body = {"models": [{"name": "llama3:8b-instruct-q5_K_M"}]}
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        payload = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+    
+    def do_POST(self):
+        type(self).generate_calls += 1
+        self.send_response(500)
+        self.end_headers()
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def fake_ollama():
+    server = HTTPServer(("127.0.0.1", 0), _FakeOllamaHandler)
+    _FakeOllamaHandler.generate_calls = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+
+
+class TestHealthProbe:
+    """Test suite for the LLM service background health probe."""
+    
+    def test_check_ollama_uses_lightweight_endpoints(self, fake_ollama):
+        """Reachability and model presence come from /api/version and /api/tags only."""
+        result = check_ollama(fake_ollama, "llama3:8b-instruct-q5_K_M")
+        
+        assert result["healthy"] is True
+        assert result["model_available"] is True
+        assert result["version"] == "0.1.32"
+        assert _FakeOllamaHandler.generate_calls == 0
+    
+    def test_check_ollama_reports_missing_model(self, fake_ollama):
+        """A reachable Ollama without the configured model is flagged."""
+        result = check_ollama(fake_ollama, "mistral:7b")
+        
+        assert result["healthy"] is True
+        assert result["model_available"] is False
+    
+    def test_check_ollama_reports_tier_models(self, fake_ollama):
+        """Each configured model tier is checked against the pulled models."""
+        result = check_ollama(
+            fake_ollama,
+            "llama3:8b-instruct-q5_K_M",
+            tier_models={"default": "llama3:8b-instruct-q5_K_M", "small": "llama3.2:3b"}
+        )
+        
+        assert result["tiers"] == {"default": True, "small": False}
+    
+    def test_snapshot_before_first_probe_is_stale(self):
+        """Until a probe completes there are no results and the snapshot is stale."""
+        probe = HealthProbe(checks={"ollama": lambda: {"healthy": True}})
+        snapshot = probe.snapshot()
+        
+        assert snapshot["checks"] == {}
+        assert snapshot["stale"] is True
+        assert snapshot["age_seconds"] is None
+    
+    def test_failing_check_is_recorded_as_unhealthy(self):
+        """Exceptions from a check become an unhealthy result with the error."""
+        def unreachable():
+            raise ConnectionError("Connection refused")
+        
+        probe = HealthProbe(checks={"ollama": unreachable})
+        snapshot = probe.probe_once()
+        
+        assert snapshot["checks"]["ollama"]["healthy"] is False
+        assert "Connection refused" in snapshot["checks"]["ollama"]["error"]
+        assert snapshot["stale"] is False
+    
+    def test_snapshot_reads_do_not_run_checks(self):
+        """Reading the snapshot never calls the checks."""
+        calls = []
+        probe = HealthProbe(checks={"ollama": lambda: calls.append(1) or {"healthy": True}})
+        probe.probe_once()
+        
+        for _ in range(10):
+            probe.snapshot()
+        
+        assert len(calls) == 1
+    
+    def test_background_thread_publishes_snapshot(self, fake_ollama):
+        """The started probe publishes results without any reader involvement."""
+        probe = HealthProbe(
+            checks={"ollama": lambda: check_ollama(fake_ollama, "llama3:8b-instruct-q5_K_M")},
+            interval=0.05
+        )
+        probe.start()
+        try:
+            for _ in range(100):
+                if probe.snapshot()["probe_count"] >= 2:
+                    break
+                time.sleep(0.02)
+            snapshot = probe.snapshot()
+        finally:
+            probe.stop()
+        
+        assert snapshot["probe_count"] >= 2
+        assert snapshot["checks"]["ollama"]["healthy"] is True
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
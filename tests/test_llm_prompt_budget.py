@@ -0,0 +1,87 @@
+import pytest
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.messages import HumanMessage, AIMessage
+
+from src.services.llm_service.prompt_budget import fit_prompt, split_enhancements, estimate_tokens
+
+BASE_PROMPT = "You are Peter Griffin from Family Guy."
+ENHANCED_PROMPT = (
+    BASE_PROMPT
+    + "\n\nCONTEXT ENHANCEMENTS:\n"
+    + "- RELEVANT CONTEXT: " + "Peter once fought a giant chicken. " * 10 + "\n"
+    + "- RETRY OPTIMIZATION: Stay in character and keep it short\n"
+    + "- HUMOR EMPHASIS: Prioritize humor"
+)
+
+
+def _history(count):
+    """Alternating history of equally sized messages, oldest first."""
+    return [
+        (HumanMessage if i % 2 == 0 else AIMessage)(content=f"message {i:02d} " + "x" * 70)
+        for i in range(count)
+    ]
+
+
+class TestPromptBudget:
+    """Test suite for prompt token budgeting."""
+    
+    def test_prompt_within_budget_is_untouched(self):
+        """Nothing is trimmed when the prompt already fits."""
+        history = _history(2)
+        prompt, trimmed_history, report = fit_prompt(ENHANCED_PROMPT, "hey", history, budget=10000)
+        
+        assert prompt == ENHANCED_PROMPT
+        assert trimmed_history == history
+        assert report["trimmed"] is False
+        assert report["estimated_tokens"] == report["original_tokens"]
+    
+    def test_history_is_trimmed_oldest_first(self):
+        """Old messages go first and the most recent ones are kept."""
+        history = _history(10)
+        _, trimmed_history, report = fit_prompt(BASE_PROMPT, "hey", history, budget=150)
+        
+        assert report["history_messages_dropped"] > 0
+        assert trimmed_history == history[report["history_messages_dropped"]:]
+        assert report["estimated_tokens"] <= 150
+    
+    def test_enhancements_cut_by_priority_before_recent_history(self):
+        """Once history is down to the minimum, low-priority enhancements are dropped first."""
+        history = _history(4)
+        prompt, trimmed_history, report = fit_prompt(ENHANCED_PROMPT, "hey", history, budget=150, min_history=4)
+        
+        assert trimmed_history == history
+        assert report["enhancements_dropped"][0] == "RELEVANT CONTEXT"
+        assert "RETRY OPTIMIZATION: Stay in character" in prompt
+        assert not report["over_budget"]
+    
+    def test_all_enhancements_dropped_removes_header(self):
+        """Dropping every enhancement leaves just the base prompt."""
+        prompt, _, report = fit_prompt(ENHANCED_PROMPT, "hey", [], budget=estimate_tokens(BASE_PROMPT) + 10)
+        
+        assert prompt == BASE_PROMPT
+        assert len(report["enhancements_dropped"]) == 3
+    
+    def test_over_budget_is_reported_when_base_prompt_does_not_fit(self):
+        """The base prompt and user message are never cut, so the report flags overflow."""
+        prompt, trimmed_history, report = fit_prompt(BASE_PROMPT, "hey", _history(3), budget=5)
+        
+        assert prompt == BASE_PROMPT
+        assert trimmed_history == []
+        assert report["over_budget"] is True
+    
+    def test_split_enhancements(self):
+        """Enhancement bullets are split from the base prompt."""
+        base, enhancements = split_enhancements(ENHANCED_PROMPT)
+        
+        assert base == BASE_PROMPT
+        assert [e.split(":")[0] for e in enhancements] == ["RELEVANT CONTEXT", "RETRY OPTIMIZATION", "HUMOR EMPHASIS"]
+        assert split_enhancements(BASE_PROMPT) == (BASE_PROMPT, [])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+import pytest
+import sys
+import os
+import time
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.cache import BotCache
+from src.services.llm_service.response_cache import LRUCache, TieredResponseCache
+
+
+class PubSubCache(BotCache):
+    """In-memory BotCache that captures the subscriber instead of starting a KeyDB listener."""
+    
+    def subscribe(self, channel, on_message, on_state=None, retry_seconds=5.0):
+        self.on_message, self.on_state = on_message, on_state
+        return True
+    
+    def publish(self, channel, message):
+        self.published = message
+        return True
+
+
+class TestResponseCache:
+    """Test suite for the two-tier L1/L2 response cache."""
+    
+    def test_l2_hits_are_promoted_to_l1(self):
+        """A second lookup is served from L1 without touching L2."""
+        l2 = BotCache(prefix="test")
+        cache = TieredResponseCache(l2)
+        l2.set("llm.v0:response:abc", "Hehehe", ttl=60)
+        
+        assert cache.get("llm.v0:response:abc") == "Hehehe"
+        l2.delete("llm.v0:response:abc")
+        assert cache.get("llm.v0:response:abc") == "Hehehe"
+        
+        stats = cache.get_stats()
+        assert (stats["l1"]["hits"], stats["l1"]["misses"]) == (1, 1)
+        assert (stats["l2"]["hits"], stats["l2"]["misses"]) == (1, 0)
+        assert stats["coherent"] is None
+    
+    def test_l1_never_outlives_l2(self):
+        """Entries copied from L2 expire from L1 with the L2 entry's remaining TTL."""
+        l2 = BotCache(prefix="test")
+        cache = TieredResponseCache(l2, l1_ttl=300)
+        l2.set("response:short", "Indeed.", ttl=1)
+        
+        assert cache.get("response:short") == "Indeed."
+        time.sleep(1.1)
+        assert cache.get("response:short") is None
+    
+    def test_lru_is_bounded_by_bytes(self):
+        """Least recently used entries are evicted once the byte limit is exceeded."""
+        lru = LRUCache(max_entries=100, max_bytes=120)
+        lru.put("a", "x" * 40, ttl=60)
+        lru.put("b", "y" * 40, ttl=60)
+        lru.get("a")
+        lru.put("c", "z" * 40, ttl=60)
+        
+        assert lru.get("a")[0] and lru.get("c")[0]
+        assert not lru.get("b")[0]
+        assert lru.get_stats()["evictions"] == 1
+        lru.put("huge", "h" * 500, ttl=60)
+        assert not lru.get("huge")[0]
+    
+    def test_invalidation_from_another_worker_drops_l1_entries(self):
+        """A published bump advances the local namespace version and purges stale L1 entries."""
+        l2 = PubSubCache(prefix="test")
+        cache = TieredResponseCache(l2)
+        l2.on_state(True)
+        
+        key = cache.key("response:abc", "llm", "character:peter")
+        cache.set(key, "Hehehe", ttl=60)
+        assert key == "llm.v0:character:peter.v0:response:abc"
+        
+        l2.bump_namespace("character:peter")
+        l2.on_message({"namespace": "character:peter", "version": 1})
+        
+        assert cache.key("response:abc", "llm", "character:peter") == "llm.v0:character:peter.v1:response:abc"
+        assert cache.l1.get(key) == (False, None)
+        assert cache.get_stats()["invalidations"] == {"published": 0, "received": 1, "l1_entries_dropped": 1}
+        
+        assert cache.invalidate("llm") == 1
+        assert l2.published == {"namespace": "llm", "version": 1}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,120 @@
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service.scheduler import PriorityScheduler, SchedulerRejected
+
+
+def _wait_for_queue(scheduler, depth, timeout=2.0):
+    """Block until the scheduler has the expected number of queued requests."""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if scheduler.get_stats()["queue_depth"] == depth:
+            return
+        time.sleep(0.01)
+    raise AssertionError(f"queue never reached depth {depth}")
+
+
+class TestPriorityScheduler:
+    """Test suite for the LLM priority scheduler."""
+    
+    def test_admits_up_to_max_concurrency_without_waiting(self):
+        """Requests under the concurrency limit are admitted immediately."""
+        scheduler = PriorityScheduler(max_concurrency=2)
+        
+        assert scheduler.acquire("interactive") == 0.0
+        assert scheduler.acquire("background") == 0.0
+        assert scheduler.get_stats()["active"] == 2
+        
+        scheduler.release()
+        scheduler.release()
+        assert scheduler.get_stats()["active"] == 0
+    
+    def test_higher_priority_is_admitted_first(self):
+        """A queued interactive request overtakes earlier queued background work."""
+        scheduler = PriorityScheduler(max_concurrency=1)
+        scheduler.acquire("interactive")
+        order = []
+        
+        def worker(priority):
+            with scheduler.slot(priority):
+                order.append(priority)
+        
+        background = threading.Thread(target=worker, args=("background",))
+        background.start()
+        _wait_for_queue(scheduler, 1)
+        interactive = threading.Thread(target=worker, args=("interactive",))
+        interactive.start()
+        _wait_for_queue(scheduler, 2)
+        
+        scheduler.release()
+        background.join()
+        interactive.join()
+        
+        assert order == ["interactive", "background"]
+    
+    def test_full_queue_sheds_lowest_priority_waiter(self):
+        """When the queue is full, queued background work is shed for interactive work."""
+        scheduler = PriorityScheduler(max_concurrency=1, max_queue_depth=1)
+        scheduler.acquire("interactive")
+        outcomes = {}
+        
+        def worker(priority):
+            try:
+                with scheduler.slot(priority):
+                    outcomes[priority] = "admitted"
+            except SchedulerRejected as e:
+                outcomes[priority] = e.reason
+        
+        background = threading.Thread(target=worker, args=("background",))
+        background.start()
+        _wait_for_queue(scheduler, 1)
+        interactive = threading.Thread(target=worker, args=("interactive",))
+        interactive.start()
+        background.join(2)
+        
+        scheduler.release()
+        interactive.join(2)
+        
+        assert outcomes["background"] == "shed for higher-priority work"
+        assert outcomes["interactive"] == "admitted"
+        assert scheduler.get_stats()["classes"]["background"]["shed"] == 1
+    
+    def test_full_queue_rejects_incoming_low_priority(self):
+        """Incoming work is rejected when nothing queued ranks below it."""
+        scheduler = PriorityScheduler(max_concurrency=1, max_queue_depth=1)
+        scheduler.acquire("interactive")
+        
+        waiter = threading.Thread(target=scheduler.acquire, args=("interactive",), daemon=True)
+        waiter.start()
+        _wait_for_queue(scheduler, 1)
+        
+        with pytest.raises(SchedulerRejected):
+            scheduler.acquire("analysis")
+    
+    def test_wait_timeout_raises(self):
+        """Requests that wait longer than their class limit are rejected."""
+        scheduler = PriorityScheduler(max_concurrency=1, max_wait={"analysis": 0.05})
+        scheduler.acquire("interactive")
+        
+        with pytest.raises(SchedulerRejected):
+            scheduler.acquire("analysis")
+        
+        stats = scheduler.get_stats()
+        assert stats["classes"]["analysis"]["timed_out"] == 1
+        assert stats["queue_depth"] == 0
+    
+    def test_unknown_priority_defaults_to_interactive(self):
+        """Unknown or missing priorities map to the interactive class."""
+        assert PriorityScheduler.normalize_priority(None) == "interactive"
+        assert PriorityScheduler.normalize_priority("urgent") == "interactive"
+        assert PriorityScheduler.normalize_priority("Organic") == "organic"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
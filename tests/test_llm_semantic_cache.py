@@ -0,0 +1,69 @@
+import pytest
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service.semantic_cache import SemanticCache, normalize_text, semantic_text
+
+
+def bag_of_words(text):
+    """Deterministic stand-in for an embedding model: word counts over a fixed vocabulary."""
+    vocabulary = ["beer", "favorite", "your", "what", "is", "quantum", "physics", "peter", "brian", "hehehe", "indeed"]
+    words = text.replace(":", " ").split()
+    return [float(words.count(word)) for word in vocabulary]
+
+
+class TestSemanticCache:
+    """Test suite for the semantic near-duplicate cache tier."""
+    
+    def test_normalization_ignores_case_mentions_and_whitespace(self):
+        """Formatting differences do not change the embedded text."""
+        assert normalize_text("<@!1234>  What is your   FAVORITE beer?!") == "what is your favorite beer"
+        assert semantic_text("Peter", "what is your favorite beer") == semantic_text("peter", "<@1> What is your favorite beer?")
+    
+    def test_near_duplicates_hit_within_their_bucket_only(self):
+        """A similar request in the same bucket matches; other buckets and topics miss."""
+        cache = SemanticCache(embed=bag_of_words, threshold=0.9)
+        bucket = ("llm.v0:character:peter.v0:", "peter", "direct", "default", None)
+        cache.add(bucket, cache.embed_query("peter: what is your favorite beer"), "key-1", "peter: what is your favorite beer")
+        
+        match = cache.lookup(bucket, cache.embed_query("peter: what is your favorite beer beer"))
+        assert match and match[0] == "key-1" and match[1] > 0.9
+        assert cache.lookup(("llm.v1:character:peter.v0:",) + bucket[1:], cache.embed_query("peter: what is your favorite beer")) is None
+        assert cache.lookup(bucket, cache.embed_query("peter: quantum physics")) is None
+        assert cache.get_stats()["misses"] == 2
+    
+    def test_stale_entries_are_discarded(self):
+        """An entry whose response left the exact cache is dropped and counted as a miss."""
+        cache = SemanticCache(embed=bag_of_words, threshold=0.9)
+        bucket = ("llm.v0:", "brian", "direct", "default", None)
+        cache.add(bucket, cache.embed_query("brian: indeed"), "key-1", "brian: indeed")
+        
+        cache.discard(bucket, "key-1")
+        assert cache.lookup(bucket, cache.embed_query("brian: indeed")) is None
+        assert cache.get_stats()["stale_entries"] == 1
+    
+    def test_audits_count_false_hits(self):
+        """An audited hit whose fresh response diverges is reported as a false hit."""
+        cache = SemanticCache(embed=bag_of_words, audit_threshold=0.8)
+        cache.audit("peter: what is your favorite beer", "peter: what is your beer", 0.96, "hehehe beer", "hehehe beer")
+        cache.audit("peter: quantum physics", "peter: physics", 0.95, "hehehe beer", "quantum physics indeed")
+        
+        stats = cache.get_stats()
+        assert (stats["audits"], stats["false_hits"], stats["false_hit_rate"]) == (2, 1, 50.0)
+        assert stats["recent_false_hits"][0]["query"] == "peter: quantum physics"
+    
+    def test_embedding_failures_are_misses(self):
+        """A failing embedding model never fails the request."""
+        def broken(text):
+            raise ConnectionError("model not found")
+        cache = SemanticCache(embed=broken)
+        
+        assert cache.embed_query("peter: hi") is None
+        assert cache.get_stats()["embed_errors"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
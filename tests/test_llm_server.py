@@ -0,0 +1,267 @@
+import pytest
+import json
+import threading
+import time
+import uuid
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service import server
+from src.services.llm_service.server import app, llm_service
+
+REPLY = "Holy crap, that is one fine beer!"
+
+
+def _make_fake_ollama(chunk_delay: float = 0.0):
+    """
+    Start a fake Ollama that streams REPLY word by word and records each request body.
+    
+    A user message "echo <text>" is answered with <text> instead; one containing
+    "slow" is answered after a delay and one containing "fail" gets a 500.
+    """
+    requests_seen = []
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            requests_seen.append(body)
+            user_message = body.get("prompt", "").rsplit("Human: ", 1)[-1].strip()
+            if "fail" in user_message:
+                self.send_response(500)
+                self.end_headers()
+                return
+            if "slow" in user_message:
+                time.sleep(0.3)
+            reply = user_message[len("echo "):] if user_message.startswith("echo ") else REPLY
+            
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            try:
+                for word in reply.split(" "):
+                    self.wfile.write((json.dumps({"model": body.get("model"), "response": word + " ", "done": False}) + "\n").encode())
+                    self.wfile.flush()
+                    time.sleep(chunk_delay)
+                self.wfile.write((json.dumps({"model": body.get("model"), "response": "", "done": True, "eval_count": 7}) + "\n").encode())
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        
+        def log_message(self, format, *args):
+            pass
+    
+    fake = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=fake.serve_forever, daemon=True).start()
+    return fake, f"http://127.0.0.1:{fake.server_port}", requests_seen
+
+
+@pytest.fixture
+def ollama(monkeypatch, request):
+    """Point the service's backend pool at a fake Ollama for the test; yields the recorded request bodies."""
+    fake, url, requests_seen = _make_fake_ollama(chunk_delay=getattr(request, "param", 0.0))
+    monkeypatch.setattr(llm_service, "backends", llm_service.backends)
+    monkeypatch.setattr(server, "OLLAMA_BASE_URLS", [url])
+    llm_service._initialize_llm()
+    yield requests_seen
+    fake.shutdown()
+
+
+def _unique_prompt() -> str:
+    """A prompt no earlier test has cached a response for."""
+    return f"You are Peter Griffin. Session {uuid.uuid4().hex}"
+
+
+class TestStreaming:
+    """Test suite for /generate/stream."""
+    
+    def test_stream_yields_chunks_then_done(self, ollama):
+        """Tokens arrive as separate events and the final event carries the assembled response."""
+        response = app.test_client().post("/generate/stream", json={"prompt": _unique_prompt(), "user_message": "Beer?"})
+        events = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        
+        tokens = [event["token"] for event in events if "token" in event]
+        assert len(tokens) == len(REPLY.split(" "))
+        assert events[-1]["done"] is True
+        assert events[-1]["cached"] is False
+        assert events[-1]["response"] == "".join(tokens)
+        assert events[-1]["response"].strip() == REPLY
+    
+    def test_completed_stream_is_cached(self, ollama):
+        """A finished stream is written to the response cache and replayed on the next request."""
+        data = {"prompt": _unique_prompt(), "user_message": "Beer?"}
+        first = list(llm_service.stream_response(**data))
+        second = list(llm_service.stream_response(**data))
+        
+        assert len(ollama) == 1
+        assert second[-1]["cached"] is True
+        assert second[-1]["response"] == first[-1]["response"]
+        assert second[0] == {"token": first[-1]["response"]}
+    
+    @pytest.mark.parametrize("ollama", [0.05], indirect=True)
+    def test_disconnected_stream_is_not_cached(self, ollama, monkeypatch):
+        """A client that goes away mid-stream leaves nothing in the response cache."""
+        writes = []
+        original_set = llm_service.response_cache.set
+        monkeypatch.setattr(llm_service.response_cache, "set", lambda *args, **kwargs: writes.append(args) or original_set(*args, **kwargs))
+        data = {"prompt": _unique_prompt(), "user_message": "Beer?"}
+        
+        response = app.test_client().post("/generate/stream", json=data, buffered=False)
+        stream = response.response
+        first_event = json.loads(next(iter(stream)))
+        response.close()
+        
+        assert "token" in first_event
+        assert writes == []
+        assert list(llm_service.stream_response(**data))[-1]["cached"] is False
+
+
+class TestPerRequestOptions:
+    """Test suite for generation settings bound per call."""
+    
+    def test_concurrent_requests_keep_their_own_options(self, ollama):
+        """Two requests with different settings each reach Ollama with their own options, and the shared client is untouched."""
+        shared = llm_service.backends.backends[0].llm
+        defaults = {name: getattr(shared, name) for name in ("temperature", "num_predict", "top_p", "top_k", "repeat_penalty", "stop")}
+        
+        settings = {"cold": {"temperature": 0.1, "max_tokens": 64}, "hot": {"temperature": 1.3, "max_tokens": 300, "top_p": 0.5}}
+        threads = [
+            threading.Thread(target=llm_service.generate_response, args=(_unique_prompt(),), kwargs={"user_message": name, "settings": value})
+            for name, value in settings.items()
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        options = {body["prompt"].rsplit("Human: ", 1)[-1].strip(): body["options"] for body in ollama}
+        assert options["cold"]["temperature"] == 0.1 and options["cold"]["num_predict"] == 64
+        assert options["hot"]["temperature"] == 1.3 and options["hot"]["num_predict"] == 300
+        assert options["hot"]["top_p"] == 0.5 and options["cold"]["top_p"] == server.DEFAULT_GENERATION_OPTIONS["top_p"]
+        assert {name: getattr(shared, name) for name in defaults} == defaults
+        assert shared.temperature == server.DEFAULT_GENERATION_OPTIONS["temperature"]
+
+
+class TestChatHistory:
+    """Test suite for how request history reaches the model."""
+    
+    def test_current_message_at_end_of_history_is_sent_once(self, ollama):
+        """Discord handlers store the message before reading history; the model still sees the turn once."""
+        message = f"echo turn {uuid.uuid4().hex}"
+        history = [
+            {"role": "user", "content": "Hey Peter"},
+            {"role": "assistant", "content": "Hehehe", "character": "peter"},
+            {"role": "user", "content": message}
+        ]
+        response = app.test_client().post("/generate", json={"prompt": _unique_prompt(), "user_message": message, "chat_history": history, "character": "peter"})
+        
+        assert response.status_code == 200
+        assert ollama[-1]["prompt"].count(f"Human: {message}") == 1
+        assert "Human: Hey Peter" in ollama[-1]["prompt"]
+
+
+class TestBatch:
+    """Test suite for /generate/batch."""
+    
+    def test_results_keep_request_order(self, ollama):
+        """Results come back in request order even when earlier items finish last."""
+        prompt = _unique_prompt()
+        items = [{"prompt": prompt, "user_message": message} for message in ("echo slow first", "echo second", "echo third")]
+        response = app.test_client().post("/generate/batch", json={"requests": items})
+        
+        assert response.status_code == 200
+        results = response.get_json()["results"]
+        assert [r["index"] for r in results] == [0, 1, 2]
+        assert [r["response"].strip() for r in results] == ["slow first", "second", "third"]
+        assert all(r["status"] == "ok" for r in results)
+    
+    def test_failed_item_is_reported_per_item(self, ollama):
+        """One failing item gets its own error status while the others succeed."""
+        prompt = _unique_prompt()
+        items = [{"prompt": prompt, "user_message": message} for message in ("echo ok one", "please fail", "echo ok two")]
+        body = app.test_client().post("/generate/batch", json={"requests": items}).get_json()
+        
+        statuses = [(r["status"], r["status_code"]) for r in body["results"]]
+        assert statuses == [("ok", 200), ("error", 500), ("ok", 200)]
+        assert body["results"][1]["error"]
+        assert body["results"][2]["response"].strip() == "ok two"
+        assert body["summary"]["failed"] == 1
+        assert body["summary"]["generated"] == 2
+    
+    def test_cached_items_have_the_same_shape(self, ollama):
+        """An item served from the cache carries the same fields as a generated one."""
+        prompt = _unique_prompt()
+        client = app.test_client()
+        client.post("/generate/batch", json={"requests": [{"prompt": prompt, "user_message": "echo cached"}]})
+        
+        items = [{"prompt": prompt, "user_message": message} for message in ("echo cached", "echo fresh")]
+        cached, generated = client.post("/generate/batch", json={"requests": items}).get_json()["results"]
+        
+        assert cached["cached"] is True and generated["cached"] is False
+        assert set(cached) == set(generated) - {"coalesced"}
+        assert cached["model_tier"] == generated["model_tier"]
+        assert cached["prompt_budget"].keys() == generated["prompt_budget"].keys()
+    
+    def test_empty_and_oversized_batches_are_rejected(self, ollama):
+        """An empty batch and one above LLM_BATCH_MAX_ITEMS are refused before anything runs."""
+        client = app.test_client()
+        empty = client.post("/generate/batch", json={"requests": []})
+        oversized = client.post("/generate/batch", json={"requests": [{"prompt": "p"}] * (server.LLM_BATCH_MAX_ITEMS + 1)})
+        
+        assert empty.status_code == 400
+        assert oversized.status_code == 400
+        assert "too large" in oversized.get_json()["error"]
+        assert ollama == []
+
+
+class TestGenerationOptions:
+    """Test suite for mapping request settings onto Ollama options."""
+    
+    @pytest.fixture(autouse=True)
+    def role_markers_on(self, monkeypatch):
+        monkeypatch.setattr(server, "LLM_STOP_ON_ROLE_MARKERS", True)
+    
+    def test_message_type_budget_picks_num_predict(self):
+        """The budget for the request's message type overrides max_tokens."""
+        budgets = {"reaction": {"max_tokens": 40}, "story": {"max_tokens": 600}}
+        
+        reaction = llm_service._resolve_generation_options({"max_tokens": 200, "message_type": "reaction", "message_type_budgets": budgets})
+        story = llm_service._resolve_generation_options({"max_tokens": 200, "message_type": "story", "message_type_budgets": budgets})
+        untyped = llm_service._resolve_generation_options({"max_tokens": 200, "message_type": "chat", "message_type_budgets": budgets})
+        
+        assert reaction["num_predict"] == 40
+        assert story["num_predict"] == 600
+        assert untyped["num_predict"] == 200
+    
+    def test_caller_options_override_defaults(self, ollama):
+        """Settings the caller passes reach Ollama; unset ones keep the client defaults."""
+        llm_service.generate_response(_unique_prompt(), user_message="caller", settings={"temperature": 0.2, "top_k": 5, "seed": 7})
+        
+        options = ollama[-1]["options"]
+        assert options["temperature"] == 0.2
+        assert options["top_k"] == 5
+        assert options["seed"] == 7
+        assert options["num_predict"] == server.DEFAULT_GENERATION_OPTIONS["num_predict"]
+    
+    def test_role_marker_stops_merge_without_duplicates(self):
+        """Caller, budget and role-marker stops are combined once each, caller's first."""
+        settings = {
+            "stop": ["\nUser:", "###"],
+            "message_type": "reaction",
+            "message_type_budgets": {"reaction": {"stop": ["###", "\n\n"]}}
+        }
+        
+        stop = llm_service._resolve_generation_options(settings)["stop"]
+        
+        assert stop[:3] == ["\nUser:", "###", "\n\n"]
+        assert len(stop) == len(set(stop))
+        assert set(server.ROLE_MARKER_STOP_SEQUENCES) <= set(stop)
+    
+    def test_json_output_skips_role_marker_stops(self):
+        assert "stop" not in llm_service._resolve_generation_options({"format": "json"})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,129 @@
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.cache import BotCache
+from src.services.llm_service.single_flight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test suite for in-flight request coalescing."""
+    
+    def test_concurrent_callers_share_one_generation(self):
+        """Concurrent calls with the same key run the function once."""
+        single_flight = SingleFlight()
+        calls = []
+        release = threading.Event()
+        
+        def generate():
+            calls.append(1)
+            release.wait(2)
+            return "Hehehehe!"
+        
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(single_flight.do("key", generate)))
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        assert len(calls) == 1
+        assert [result for result, _ in results] == ["Hehehehe!"] * 5
+        assert single_flight.get_stats()["generations_saved"] == 4
+    
+    def test_different_keys_are_not_coalesced(self):
+        """Calls with different keys each run."""
+        single_flight = SingleFlight()
+        
+        assert single_flight.do("a", lambda: "A")[0] == "A"
+        assert single_flight.do("b", lambda: "B")[0] == "B"
+        assert single_flight.get_stats()["generations_run"] == 2
+    
+    def test_leader_error_propagates_to_followers(self):
+        """Followers see the leader's exception instead of hanging."""
+        single_flight = SingleFlight()
+        release = threading.Event()
+        
+        def fail():
+            release.wait(2)
+            raise RuntimeError("Ollama unavailable")
+        
+        errors = []
+        
+        def call():
+            try:
+                single_flight.do("key", fail)
+            except RuntimeError as e:
+                errors.append(str(e))
+        
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in threads:
+            thread.join()
+        
+        assert errors == ["Ollama unavailable"] * 3
+    
+    def test_remote_follower_reads_published_result(self):
+        """A second worker waits on the lock and reads the leader's cached result."""
+        cache = BotCache(prefix="test_single_flight")
+        leader = SingleFlight(cache=cache, poll_interval=0.01)
+        follower = SingleFlight(cache=cache, poll_interval=0.01)
+        started = threading.Event()
+        release = threading.Event()
+        
+        def generate():
+            started.set()
+            release.wait(2)
+            cache.set("response", "Blast!")
+            return "Blast!"
+        
+        leader_thread = threading.Thread(target=lambda: leader.do("key", generate, fetch=lambda: cache.get("response")))
+        leader_thread.start()
+        started.wait(2)
+        
+        follower_results = []
+        follower_thread = threading.Thread(target=lambda: follower_results.append(
+            follower.do("key", lambda: "should not run", fetch=lambda: cache.get("response"))
+        ))
+        follower_thread.start()
+        time.sleep(0.05)
+        release.set()
+        leader_thread.join()
+        follower_thread.join()
+        
+        assert follower_results == [("Blast!", SingleFlight.ROLE_REMOTE_FOLLOWER)]
+        assert follower.get_stats()["remote_followers"] == 1
+        assert follower.get_stats()["generations_run"] == 0
+    
+    def test_remote_follower_runs_when_leader_fails(self):
+        """If the other worker releases its lock without a result, the follower generates."""
+        cache = BotCache(prefix="test_single_flight_fail")
+        follower = SingleFlight(cache=cache, poll_interval=0.01)
+        cache.set_if_absent("singleflight:key", "other-worker", ttl=60)
+        
+        def release_lock():
+            time.sleep(0.05)
+            cache.delete("singleflight:key")
+        
+        threading.Thread(target=release_lock).start()
+        result, role = follower.do("key", lambda: "Freakin' sweet!", fetch=lambda: None)
+        
+        assert result == "Freakin' sweet!"
+        assert role == SingleFlight.ROLE_LEADER
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,69 @@
+import pytest
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service.structured import validate, parse_structured
+
+CONTINUATION_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "continue": {"type": "boolean"},
+        "reason": {"type": "string"},
+        "character": {"type": "string", "enum": ["brian", "stewie", "none"]},
+        "confidence": {"type": "number", "minimum": 0.0, "maximum": 1.0}
+    },
+    "required": ["continue", "reason", "character"]
+}
+
+
+class TestStructuredOutput:
+    """Test suite for structured output validation."""
+    
+    def test_valid_output_is_parsed(self):
+        """Well-formed JSON matching the schema is returned parsed."""
+        parsed, errors = parse_structured(
+            '{"continue": true, "reason": "Peter mentioned beer", "character": "brian"}',
+            CONTINUATION_SCHEMA
+        )
+        
+        assert errors == []
+        assert parsed["character"] == "brian"
+    
+    def test_free_text_is_rejected(self):
+        """The old line-based format is not valid JSON."""
+        parsed, errors = parse_structured("CONTINUE: YES\nREASON: fun\nCHARACTER: brian", CONTINUATION_SCHEMA)
+        
+        assert parsed is None
+        assert errors[0].startswith("invalid JSON")
+    
+    def test_missing_required_and_enum_violations(self):
+        """Missing fields and values outside an enum are reported with their path."""
+        errors = validate({"continue": True, "character": "lois"}, CONTINUATION_SCHEMA)
+        
+        assert "$.reason: required property missing" in errors
+        assert any(error.startswith("$.character") for error in errors)
+    
+    def test_type_and_range_checks(self):
+        """Booleans are not numbers and numbers must respect bounds."""
+        errors = validate(
+            {"continue": "yes", "reason": "x", "character": "none", "confidence": 1.5},
+            CONTINUATION_SCHEMA
+        )
+        
+        assert "$.continue: expected boolean, got str" in errors
+        assert "$.confidence: 1.5 is greater than 1.0" in errors
+        assert validate(True, {"type": "number"}) == ["$: expected number, got bool"]
+    
+    def test_array_items(self):
+        """Array items are validated individually."""
+        schema = {"type": "array", "items": {"type": "string"}}
+        
+        assert validate(["a", "b"], schema) == []
+        assert validate(["a", 2], schema) == ["$[1]: expected string, got int"]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,69 @@
+import pytest
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from langchain_core.outputs import Generation, LLMResult
+
+from src.services.llm_service.usage import Histogram, OllamaUsageCallback, UsageRecorder, ollama_usage
+
+OLLAMA_FINAL_RESPONSE = {
+    "done": True,
+    "prompt_eval_count": 412,
+    "eval_count": 38,
+    "prompt_eval_duration": 250_000_000,
+    "eval_duration": 900_000_000,
+    "load_duration": 3_000_000,
+    "total_duration": 1_160_000_000
+}
+
+
+class TestUsageAccounting:
+    """Test suite for LLM token and timing accounting."""
+    
+    def test_ollama_fields_are_converted_to_ms(self):
+        """Token counts are kept and nanosecond durations become milliseconds."""
+        usage = ollama_usage(OLLAMA_FINAL_RESPONSE)
+        
+        assert usage["prompt_tokens"] == 412
+        assert usage["completion_tokens"] == 38
+        assert usage["prompt_eval_ms"] == pytest.approx(250)
+        assert usage["load_ms"] == pytest.approx(3)
+        assert ollama_usage(None) == {}
+    
+    def test_callback_captures_final_generation_info(self):
+        """The callback picks the usage up from the completed generation."""
+        callback = OllamaUsageCallback()
+        callback.on_llm_end(LLMResult(generations=[[Generation(text="Hehehe", generation_info=OLLAMA_FINAL_RESPONSE)]]))
+        
+        assert callback.usage["completion_tokens"] == 38
+    
+    def test_histogram_buckets_are_cumulative(self):
+        """Bucket counts include every observation at or below the bound."""
+        histogram = Histogram([10, 100])
+        for value in (5, 10, 50, 500):
+            histogram.observe(value)
+        
+        snapshot = histogram.snapshot()
+        assert snapshot["buckets"] == [{"le": 10, "count": 2}, {"le": 100, "count": 3}, {"le": "+Inf", "count": 4}]
+        assert snapshot["count"] == 4
+        assert snapshot["max"] == 500
+    
+    def test_recorder_breaks_down_by_caller_character_and_model(self):
+        """Each value is recorded overall and under every label."""
+        recorder = UsageRecorder()
+        recorder.record({"caller": "message-router", "character": "peter", "model": "llama3"}, {"prompt_tokens": 400, "queue_wait_ms": 12})
+        recorder.record({"caller": "conversation-coordinator", "model": "llama3"}, {"prompt_tokens": 100, "unknown_metric": 1})
+        
+        snapshot = recorder.snapshot()
+        assert snapshot["overall"]["prompt_tokens"]["count"] == 2
+        assert "unknown_metric" not in snapshot["overall"]
+        assert snapshot["by_caller"]["message-router"]["queue_wait_ms"]["sum"] == 12
+        assert snapshot["by_character"]["unknown"]["prompt_tokens"]["sum"] == 100
+        assert snapshot["by_model"]["llama3"]["prompt_tokens"]["sum"] == 500
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,96 @@
+import pytest
+import time
+import sys
+import os
+from datetime import datetime
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.llm_service.warmup import ModelWarmer, in_active_hours, parse_active_hours
+
+
+class FakeOllama:
+    """Records preload calls and fails for backends listed as down."""
+    
+    def __init__(self, down=()):
+        self.down = set(down)
+        self.calls = []
+    
+    def __call__(self, base_url, model, keep_alive):
+        self.calls.append((base_url, model, keep_alive))
+        if base_url in self.down:
+            raise ConnectionError("connection refused")
+
+
+class TestModelWarmer:
+    """Test suite for model preloading and warm-keeping."""
+    
+    def test_ready_once_default_model_loads_on_any_backend(self):
+        """One reachable backend is enough for readiness; the other is retried."""
+        ollama = FakeOllama(down={"http://b:11434"})
+        warmer = ModelWarmer(["http://a:11434", "http://b:11434"], ["llama3", "llama3"], keep_alive="1h", preload=ollama)
+        
+        assert warmer.preload_pending() is False
+        assert warmer.ready.is_set()
+        assert ("http://a:11434", "llama3", "1h") in ollama.calls
+        assert warmer.get_stats()["failures"] == 1
+        
+        ollama.down.clear()
+        assert warmer.preload_pending() is True
+        assert warmer.get_stats()["loaded"] == ["llama3@http://a:11434", "llama3@http://b:11434"]
+    
+    def test_not_ready_while_default_model_fails(self):
+        """Loading only a secondary tier does not make the service ready."""
+        def preload(base_url, model, keep_alive):
+            if model == "llama3":
+                raise ConnectionError("model not found")
+        warmer = ModelWarmer(["http://a:11434"], ["llama3", "llama3:8b"], preload=preload)
+        
+        warmer.preload_pending()
+        assert not warmer.ready.is_set()
+        assert warmer.get_stats()["loaded"] == ["llama3:8b@http://a:11434"]
+    
+    def test_only_idle_models_are_pinged(self):
+        """Recent generations count as activity, so busy models are not pinged."""
+        ollama = FakeOllama()
+        warmer = ModelWarmer(["http://a:11434"], ["llama3", "llama3:8b"], ping_interval=0.05, preload=ollama)
+        warmer.preload_pending()
+        ollama.calls.clear()
+        time.sleep(0.1)
+        warmer.note_activity("http://a:11434", "llama3")
+        
+        warmer.ping_idle()
+        assert [call[1] for call in ollama.calls] == ["llama3:8b"]
+        assert warmer.get_stats()["pings"] == 1
+    
+    def test_loaded_backends_are_pinged_while_another_never_loads(self):
+        """A backend that stays down is retried without disabling keep-warm for the loaded one."""
+        ollama = FakeOllama(down={"http://b:11434"})
+        warmer = ModelWarmer(["http://a:11434", "http://b:11434"], ["llama3"], ping_interval=0.05, retry_interval=0.01, preload=ollama)
+        
+        warmer.start()
+        time.sleep(0.3)
+        warmer.stop()
+        warmer._thread.join(timeout=1)
+        
+        stats = warmer.get_stats()
+        assert stats["ready"] and stats["loaded"] == ["llama3@http://a:11434"]
+        assert stats["pings"] >= 2
+        assert stats["failures"] >= 2
+        assert ollama.calls.count(("http://b:11434", "llama3", "30m")) == stats["failures"]
+    
+    def test_active_hours_wrap_past_midnight(self):
+        """Ranges like 22-6 cover the late evening and early morning."""
+        hours = parse_active_hours("22-6")
+        
+        assert in_active_hours(hours, datetime(2024, 1, 1, 23))
+        assert in_active_hours(hours, datetime(2024, 1, 1, 3))
+        assert not in_active_hours(hours, datetime(2024, 1, 1, 12))
+        assert in_active_hours(parse_active_hours(""), datetime(2024, 1, 1, 12))
+        with pytest.raises(ValueError):
+            parse_active_hours("25-3")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,127 @@
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.cache import BotCache
+from src.services.message_router.idempotency import IdempotentResults
+
+
+@pytest.fixture
+def results():
+    return IdempotentResults(BotCache(redis_url=None, prefix="test_idempotency"), wait_timeout=2.0, poll_interval=0.01)
+
+
+class TestIdempotentResults:
+    """Test suite for idempotent /orchestrate results in the message router."""
+    
+    def test_retry_attaches_to_running_call(self, results):
+        """A retry that arrives while the original runs gets its result without running again."""
+        calls = []
+        started = threading.Event()
+        
+        def orchestrate():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return {"success": True, "data": {"response": "Hehehe"}}
+        
+        original = {}
+        thread = threading.Thread(target=lambda: original.update(zip(("result", "status"), results.run("peter:abc", orchestrate))))
+        thread.start()
+        started.wait()
+        retried, status = results.run("peter:abc", orchestrate)
+        thread.join()
+        
+        assert len(calls) == 1
+        assert original["status"] == IdempotentResults.STATUS_NEW
+        assert status == IdempotentResults.STATUS_ATTACHED
+        assert retried == original["result"]
+        
+        replayed, status = results.run("peter:abc", orchestrate)
+        assert status == IdempotentResults.STATUS_REPLAYED
+        assert replayed["data"]["response"] == "Hehehe"
+        assert len(calls) == 1
+    
+    def test_failures_are_not_remembered(self, results):
+        """A failed run releases the key so the next retry runs again."""
+        outcomes = [{"success": False, "error": "LLM generation failed"}, {"success": True, "data": {}}]
+        
+        first, status = results.run("peter:def", lambda: outcomes.pop(0))
+        assert first["success"] is False and status == IdempotentResults.STATUS_NEW
+        second, status = results.run("peter:def", lambda: outcomes.pop(0))
+        assert second["success"] is True and status == IdempotentResults.STATUS_NEW
+    
+    def test_exceptions_release_the_key(self, results):
+        """A run that raises does not leave the key claimed."""
+        def broken():
+            raise RuntimeError("boom")
+        
+        with pytest.raises(RuntimeError):
+            results.run("peter:ghi", broken)
+        result, status = results.run("peter:ghi", lambda: {"success": True})
+        assert status == IdempotentResults.STATUS_NEW
+    
+    def test_wait_is_bounded(self, results):
+        """A retry gives up waiting after wait_timeout while the original is still running."""
+        results.wait_timeout = 0.05
+        release = threading.Event()
+        thread = threading.Thread(target=results.run, args=("peter:jkl", lambda: release.wait() and {"success": True}))
+        thread.start()
+        time.sleep(0.02)
+        
+        result, status = results.run("peter:jkl", lambda: {"success": True})
+        release.set()
+        thread.join()
+        assert result is None
+        assert status == IdempotentResults.STATUS_IN_PROGRESS
+
+    def test_claim_released_by_a_failed_holder_is_retaken(self, results):
+        """A claim that vanishes after a failed SET NX (its holder failed) is claimed again, not bypassed."""
+        cache = results.cache
+        claim = cache.set_if_absent
+        lost = []
+        
+        def lose_first_race(key, value, ttl=None):
+            if not lost:
+                # Another request held the claim and released it right after
+                lost.append(key)
+                return False
+            return claim(key, value, ttl=ttl)
+        
+        cache.set_if_absent = lose_first_race
+        calls = []
+        result, status = results.run("peter:pqr", lambda: calls.append(1) or {"success": True})
+        
+        assert status == IdempotentResults.STATUS_NEW
+        assert len(calls) == 1
+        assert results.get_stats()["bypassed"] == 0
+        assert cache.get("orchestrate:peter:pqr")["state"] == "done"
+
+    def test_cache_failure_runs_without_deduplication(self):
+        """A cache that cannot be reached is not mistaken for a claim held by another request."""
+        class DownKeyDB:
+            def __getattr__(self, name):
+                def fail(*args, **kwargs):
+                    raise ConnectionError("KeyDB unreachable")
+                return fail
+        
+        cache = BotCache(redis_url=None, prefix="test_idempotency_down")
+        cache.redis_client = DownKeyDB()
+        results = IdempotentResults(cache, wait_timeout=2.0, poll_interval=0.01)
+        started = time.time()
+        
+        result, status = results.run("peter:mno", lambda: {"success": True})
+        
+        assert time.time() - started < 0.5
+        assert result == {"success": True}
+        assert status == IdempotentResults.STATUS_BYPASSED
+        assert results.get_stats()["bypassed"] == 1
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.message_router.server import PostProcessingPipeline, message_router
+
+
+def _fake_service_request(service_url, endpoint, method="GET", data=None, timeout=30):
+    """Answer each orchestration stage the way a healthy dependency would."""
+    responses = {
+        "/select-character": {"selected_character": "Peter", "reasoning": "forced"},
+        "/retrieve": {"context": ""},
+        "/optimize-prompt": {"optimized_prompt": "You are Peter."},
+        "/generate": {"response": "Hehehe, yeah."}
+    }
+    if endpoint.startswith("/llm_prompt/"):
+        return {"success": True, "data": {"llm_prompt": "You are Peter.", "llm_settings": {}}, "status_code": 200}
+    return {"success": True, "data": responses[endpoint], "status_code": 200}
+
+
+class TestPostProcessingPipeline:
+    """Test suite for the router's bounded post-processing queue."""
+    
+    def test_queued_jobs_are_drained(self):
+        """Every accepted job is handed to the handler by the background workers."""
+        handled = []
+        pipeline = PostProcessingPipeline(handled.append, max_size=10, workers=2, name="test-drain")
+        for i in range(5):
+            assert pipeline.submit({"request_id": i})
+        
+        pipeline.jobs.join()
+        assert sorted(job["request_id"] for job in handled) == [0, 1, 2, 3, 4]
+        stats = pipeline.get_stats()
+        assert stats["enqueued"] == stats["processed"] == 5
+        assert stats["queue_depth"] == 0
+    
+    def test_full_queue_drops_without_blocking(self):
+        """When the queue is full new jobs are dropped and counted immediately."""
+        release = threading.Event()
+        pipeline = PostProcessingPipeline(lambda job: release.wait(), max_size=2, workers=1, name="test-full")
+        
+        assert pipeline.submit({"request_id": 0})
+        time.sleep(0.05)  # the worker picks up job 0 and blocks on it
+        assert pipeline.submit({"request_id": 1})
+        assert pipeline.submit({"request_id": 2})
+        
+        started = time.time()
+        assert not pipeline.submit({"request_id": 3})
+        assert time.time() - started < 0.1
+        
+        stats = pipeline.get_stats()
+        assert stats["dropped"] == 1
+        assert stats["enqueued"] == 3
+        assert stats["max_queue_depth"] == 2
+        
+        release.set()
+        pipeline.jobs.join()
+        assert pipeline.get_stats()["processed"] == 3
+    
+    def test_orchestrate_replies_when_post_processing_is_full(self, monkeypatch):
+        """A saturated pipeline never delays the reply; the job is reported as not queued."""
+        release = threading.Event()
+        saturated = PostProcessingPipeline(lambda job: release.wait(), max_size=1, workers=1, name="test-saturated")
+        saturated.submit({"request_id": "busy"})
+        time.sleep(0.05)
+        saturated.submit({"request_id": "waiting"})
+        
+        monkeypatch.setattr(message_router, "post_processing", saturated)
+        monkeypatch.setattr(message_router, "_make_service_request", _fake_service_request)
+        
+        started = time.time()
+        result = message_router.orchestrate_conversation({"character_name": "Peter", "input_text": "Beer?", "channel_id": "c1"})
+        elapsed = time.time() - started
+        release.set()
+        
+        assert result["success"]
+        assert result["data"]["response"] == "Hehehe, yeah."
+        assert result["data"]["post_processing_queued"] is False
+        assert saturated.get_stats()["dropped"] == 1
+        assert elapsed < 1.0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,89 @@
+import pytest
+import json
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.services.message_router.server import message_router
+from src.shared.circuit_breaker import get_adaptive_timeout, get_breaker
+
+
+class _FakeService(BaseHTTPRequestHandler):
+    """Answers /slow and /generate after 0.3s, and /text with a 200 that is not JSON."""
+    
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if self.path in ("/slow", "/generate"):
+            time.sleep(0.3)
+        body = b"not json" if self.path == "/text" else json.dumps({"ok": True}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain" if self.path == "/text" else "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def service():
+    """A fresh fake service per test, so its breaker and timeouts start empty."""
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _FakeService)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+
+
+def _learned_fast(service_url: str, endpoint: str):
+    """Teach the endpoint's adaptive timeout that it normally answers in 10ms."""
+    adaptive_timeout = get_adaptive_timeout(f"{service_url}{endpoint}", floor=0.05, min_samples=1)
+    adaptive_timeout.record(0.01)
+    return adaptive_timeout
+
+
+class TestServiceRequestOutcomes:
+    """Test suite for breaker and adaptive-timeout bookkeeping in _make_service_request."""
+    
+    def test_tightened_timeout_is_not_a_breaker_failure(self, service):
+        """A call cut off by the learned limit times out without counting against the service."""
+        adaptive_timeout = _learned_fast(service, "/slow")
+        
+        result = message_router._make_service_request(service, "/slow", method="POST", data={}, timeout=5)
+        
+        assert result["status_code"] == 408
+        assert get_breaker(service).get_stats()["failures"] == 0
+        assert adaptive_timeout.get_stats()["samples"] == 2
+    
+    def test_timeout_at_callers_ceiling_is_a_breaker_failure(self, service):
+        result = message_router._make_service_request(service, "/slow", method="POST", data={}, timeout=0.05)
+        
+        assert result["status_code"] == 408
+        assert get_breaker(service).get_stats()["failures"] == 1
+    
+    def test_generation_is_not_tightened(self, service):
+        """/generate keeps the caller's timeout even after fast samples."""
+        _learned_fast(service, "/generate")
+        
+        result = message_router._make_service_request(service, "/generate", method="POST", data={}, timeout=5)
+        
+        assert result["success"] is True
+        assert get_breaker(service).get_stats()["successes"] == 1
+    
+    def test_non_json_response_records_one_failure(self, service):
+        """A 200 that cannot be parsed counts once, as a failure, and adds no latency sample."""
+        result = message_router._make_service_request(service, "/text", method="POST", data={}, timeout=5)
+        
+        stats = get_breaker(service).get_stats()
+        assert result["success"] is False
+        assert (stats["successes"], stats["failures"]) == (0, 1)
+        assert get_adaptive_timeout(f"{service}/text").get_stats()["samples"] == 0
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,45 @@
+import pytest
+import threading
+import time
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.cache import BotCache
+
+
+class TestCacheClaims:
+    """Test suite for set_if_absent claims (in-memory fallback)."""
+    
+    def test_concurrent_claims_have_one_winner(self):
+        """Threads racing for the same key never both get it."""
+        cache = BotCache(prefix="test_claims")
+        for attempt in range(50):
+            barrier = threading.Barrier(16)
+            wins = []
+            
+            def claim():
+                barrier.wait()
+                if cache.set_if_absent(f"claim:{attempt}", "held", ttl=60):
+                    wins.append(1)
+            
+            threads = [threading.Thread(target=claim) for _ in range(16)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert len(wins) == 1
+    
+    def test_expired_claim_can_be_taken_again(self):
+        cache = BotCache(prefix="test_claims")
+        assert cache.set_if_absent("claim:expiring", "held", ttl=0.05)
+        assert not cache.set_if_absent("claim:expiring", "held", ttl=0.05)
+        
+        time.sleep(0.06)
+        assert cache.set_if_absent("claim:expiring", "held", ttl=0.05)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,41 @@
+import pytest
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.cache import BotCache
+
+
+class TestCacheNamespaces:
+    """Test suite for namespace-versioned cache keys (in-memory fallback)."""
+    
+    def test_bumping_a_namespace_hides_its_keys(self):
+        """Keys built before a bump are no longer reachable through versioned_key."""
+        cache = BotCache(prefix="test")
+        key = cache.versioned_key("response:abc", "llm", "character:peter")
+        cache.set(key, "Hehehe")
+        
+        assert key == "llm.v0:character:peter.v0:response:abc"
+        assert cache.get(cache.versioned_key("response:abc", "llm", "character:peter")) == "Hehehe"
+        
+        assert cache.bump_namespace("character:peter") == 1
+        assert cache.get(cache.versioned_key("response:abc", "llm", "character:peter")) is None
+    
+    def test_bumps_are_scoped_to_their_namespace(self):
+        """Invalidating one character leaves the others cached; the shared namespace drops all."""
+        cache = BotCache(prefix="test")
+        brian = cache.versioned_key("response:def", "llm", "character:brian")
+        cache.set(brian, "Indeed.")
+        
+        cache.bump_namespace("character:peter")
+        assert cache.get(cache.versioned_key("response:def", "llm", "character:brian")) == "Indeed."
+        
+        cache.bump_namespace("llm")
+        assert cache.get(cache.versioned_key("response:def", "llm", "character:brian")) is None
+        assert cache.namespace_versions("llm", "character:peter", "character:stewie") == [1, 1, 0]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,91 @@
+import pytest
+import time
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.circuit_breaker import AdaptiveTimeout, CircuitBreaker, CLOSED, HALF_OPEN, OPEN
+
+
+class TestCircuitBreaker:
+    """Test suite for the shared circuit breaker and adaptive timeout."""
+    
+    def test_opens_after_consecutive_failures(self):
+        """Calls are rejected once the failure threshold is reached; a success resets the count."""
+        breaker = CircuitBreaker("rag", failure_threshold=3, reset_timeout=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+        
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+        assert breaker.get_stats()["rejected"] == 1
+    
+    def test_half_open_allows_one_trial(self):
+        """After the reset timeout one trial call goes through and its outcome decides the state."""
+        breaker = CircuitBreaker("fine-tuning", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        assert not breaker.allow()
+        
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        
+        breaker.record_failure()
+        assert breaker.state == OPEN
+        
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+    
+    def test_release_frees_the_trial_without_an_outcome(self):
+        """A released trial leaves the circuit half-open for the next trial call."""
+        breaker = CircuitBreaker("rag", failure_threshold=1, reset_timeout=0.05)
+        breaker.record_failure()
+        time.sleep(0.06)
+        assert breaker.allow()
+        
+        breaker.release()
+        assert breaker.state == HALF_OPEN
+        assert breaker.allow()
+        assert breaker.get_stats()["failures"] == 1
+    
+    def test_adaptive_timeout_follows_p99(self):
+        """The timeout tightens to p99 x headroom once enough calls were seen, within floor and ceiling."""
+        timeout = AdaptiveTimeout(floor=0.5, headroom=2, min_samples=10)
+        for _ in range(9):
+            timeout.record(1.0)
+        assert timeout.timeout(30) == 30
+        
+        timeout.record(1.5)
+        assert timeout.timeout(30) == 3.0
+        assert timeout.timeout(2) == 2
+        
+        fast = AdaptiveTimeout(floor=0.5, headroom=2, min_samples=1)
+        fast.record(0.01)
+        assert fast.timeout(30) == 0.5
+    
+    def test_timeouts_push_the_limit_back_up(self):
+        """Calls recorded at their timeout raise the p99, so a slower dependency gets more time."""
+        timeout = AdaptiveTimeout(floor=0.1, headroom=2, min_samples=5, window=10)
+        for _ in range(10):
+            timeout.record(0.2)
+        assert timeout.timeout(30) == 0.4
+        
+        for _ in range(3):
+            timeout.record(timeout.timeout(30))
+        assert timeout.timeout(30) == 3.2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,78 @@
+import pytest
+import json
+import threading
+import time
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.health_probe import HealthProbe, check_http
+
+
+def _make_health_server(status_code: int, body: dict):
+    """Start a server answering GET /health with the given status and body."""
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            payload = json.dumps(body).encode()
+            self.send_response(status_code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+class TestSharedHealthProbe:
+    """Test suite for the shared background health probe."""
+    
+    def test_checks_run_concurrently(self):
+        """A round takes about as long as the slowest check, not the sum of all checks."""
+        def slow():
+            time.sleep(0.3)
+            return {"healthy": True}
+        
+        probe = HealthProbe(checks={f"service_{i}": slow for i in range(6)})
+        started = time.time()
+        snapshot = probe.probe_once()
+        elapsed = time.time() - started
+        
+        assert elapsed < 1.0
+        assert len(snapshot["checks"]) == 6
+        assert all(check["latency_ms"] >= 300 for check in snapshot["checks"].values())
+        assert snapshot["round_ms"] < 1000
+    
+    def test_check_http_reports_status(self):
+        """check_http passes through the status code and the status the service reports."""
+        healthy, healthy_url = _make_health_server(200, {"status": "degraded"})
+        failing, failing_url = _make_health_server(503, {"status": "unhealthy"})
+        try:
+            assert check_http(healthy_url) == {"healthy": True, "status_code": 200, "reported_status": "degraded"}
+            assert check_http(failing_url)["healthy"] is False
+        finally:
+            healthy.shutdown()
+            failing.shutdown()
+    
+    def test_unreachable_service_is_an_error(self):
+        """A service that refuses connections is recorded as unhealthy with an error."""
+        server, url = _make_health_server(200, {})
+        server.shutdown()
+        server.server_close()
+        
+        probe = HealthProbe(checks={"gone": lambda: check_http(url, timeout=0.5)})
+        check = probe.probe_once()["checks"]["gone"]
+        assert check["healthy"] is False
+        assert "error" in check
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
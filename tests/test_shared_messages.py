@@ -0,0 +1,72 @@
+import pytest
+import sys
+import os
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.messages import (
+    MessageFormatError, from_stored_record, normalize_history, speaker, to_wire, encoded_size, without_current_turn
+)
+
+
+class TestMessageSchema:
+    """Test suite for the shared conversation message schema."""
+    
+    def test_handler_history_is_converted(self):
+        """Role-based history from the Discord handlers converts without loss."""
+        history = normalize_history([
+            {"role": "user", "content": "Hey guys", "character": "user", "timestamp": "t1"},
+            {"role": "assistant", "content": "Hehehe", "character": "Peter", "timestamp": "t2"}
+        ])
+        
+        assert history[0] == {"role": "user", "content": "Hey guys", "character": None, "timestamp": "t1"}
+        assert history[1]["character"] == "peter"
+        assert [speaker(m) for m in history] == ["user", "peter"]
+    
+    def test_legacy_and_stored_formats_are_accepted(self):
+        """LangChain-style and stored KeyDB records map onto the same schema."""
+        history = normalize_history([
+            {"type": "human", "content": "hi"},
+            {"type": "ai", "content": "hello"},
+            {"message_type": "stewie", "content": "Blast!", "timestamp": "t3", "author": "Stewie"}
+        ])
+        
+        assert [m["role"] for m in history] == ["user", "assistant", "assistant"]
+        assert from_stored_record({"message_type": "user", "content": "yo"})["role"] == "user"
+    
+    def test_invalid_entries_raise_with_index(self):
+        """Entries that cannot be converted fail loudly instead of being dropped."""
+        with pytest.raises(MessageFormatError, match="message 1"):
+            normalize_history([{"role": "user", "content": "ok"}, {"role": "narrator", "content": "x"}])
+        with pytest.raises(MessageFormatError):
+            normalize_history([{"role": "user", "content": "  "}])
+        with pytest.raises(MessageFormatError):
+            normalize_history(["just a string"])
+    
+    def test_to_wire_keeps_recent_messages_and_used_fields(self):
+        """Only the most recent messages and the fields the LLM service reads are sent."""
+        history = [{"role": "user", "content": f"m{i}", "timestamp": f"t{i}"} for i in range(12)]
+        wire = to_wire(history, limit=3)
+        
+        assert wire == [{"role": "user", "content": "m9"}, {"role": "user", "content": "m10"}, {"role": "user", "content": "m11"}]
+        assert encoded_size(wire) < encoded_size(history)
+        assert to_wire(history, limit=0) == []
+
+
+    def test_current_turn_is_dropped_from_the_end_only(self):
+        """A history ending with the message being answered loses that copy; earlier repeats stay."""
+        history = normalize_history([
+            {"role": "user", "content": "Hey Peter"},
+            {"role": "assistant", "content": "Hehehe", "character": "peter"},
+            {"role": "user", "content": "Hey Peter "}
+        ])
+        
+        assert without_current_turn(history, "Hey Peter") == history[:2]
+        assert without_current_turn(history[:2], "Hey Peter") == history[:2]
+        assert without_current_turn(history, "Something else") == history
+        assert without_current_turn(history, None) == history
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
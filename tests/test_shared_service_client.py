@@ -0,0 +1,162 @@
+import pytest
+import json
+import time
+import socket
+import threading
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.shared.service_client import DeadlineExceeded, ServiceClient, get_client
+
+
+def _make_fake_service():
+    """Start a keep-alive HTTP server that records which client port sent each request."""
+    seen = {"ports": [], "paths": []}
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        
+        def _send(self, status, body):
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            try:
+                self.wfile.write(payload)
+            except (BrokenPipeError, ConnectionResetError):
+                # The client gave up (deadline tests)
+                self.close_connection = True
+        
+        def _handle(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            seen["ports"].append(self.client_address[1])
+            seen["paths"].append(self.path)
+            if self.path == "/unavailable":
+                self._send(503, {"error": "busy"})
+            elif self.path == "/drop":
+                # Read the request, then hang up without answering
+                self.close_connection = True
+            elif self.path == "/slow":
+                time.sleep(0.5)
+                self._send(200, {"ok": True})
+            else:
+                self._send(200, {"ok": True})
+        
+        do_GET = _handle
+        do_POST = _handle
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", seen
+
+
+def _unused_url():
+    """A local URL nothing is listening on."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return f"http://127.0.0.1:{port}"
+
+
+@pytest.fixture
+def fake_service():
+    server, url, seen = _make_fake_service()
+    yield url, seen
+    server.shutdown()
+
+
+class TestServiceClient:
+    """Test suite for the pooled inter-service HTTP client."""
+    
+    def test_sequential_calls_reuse_one_connection(self, fake_service):
+        """Keep-alive pooling sends repeated calls over the same TCP connection."""
+        url, seen = fake_service
+        client = ServiceClient(url, backoff=0)
+        
+        for _ in range(5):
+            assert client.post("/generate", json={"prompt": "hi"}).status_code == 200
+        
+        assert len(seen["ports"]) == 5
+        assert len(set(seen["ports"])) == 1
+    
+    def test_retries_unavailable_only_for_idempotent_calls(self, fake_service):
+        """A 503 is retried for GET but returned at once for POST unless marked idempotent."""
+        url, seen = fake_service
+        client = ServiceClient(url, retries=2, backoff=0)
+        
+        assert client.get("/unavailable").status_code == 503
+        assert seen["paths"].count("/unavailable") == 3
+        
+        seen["paths"].clear()
+        assert client.post("/unavailable", json={}).status_code == 503
+        assert seen["paths"].count("/unavailable") == 1
+        
+        seen["paths"].clear()
+        client.post("/unavailable", json={}, idempotent=True)
+        assert seen["paths"].count("/unavailable") == 3
+        assert client.get_stats()["retries"] == 4
+    
+    def test_connection_errors_are_retried_and_counted(self):
+        """Refused connections are retried for any method, then raised."""
+        client = ServiceClient(_unused_url(), retries=1, backoff=0)
+        
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post("/orchestrate", json={})
+        
+        stats = client.get_stats()
+        assert stats["requests"] == 2
+        assert stats["connection_errors"] == 2
+        assert stats["error_rate"] == 100.0
+    
+    def test_dropped_connection_is_retried_only_for_idempotent_calls(self, fake_service):
+        """A connection closed after the request was sent is not retried for POST, since the target may have acted."""
+        url, seen = fake_service
+        client = ServiceClient(url, retries=2, backoff=0)
+        
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.post("/drop", json={})
+        assert seen["paths"].count("/drop") == 1
+        
+        seen["paths"].clear()
+        with pytest.raises(requests.exceptions.ConnectionError):
+            client.get("/drop")
+        assert seen["paths"].count("/drop") == 3
+    
+    def test_deadline_caps_attempts(self, fake_service):
+        """A deadline shorter than the response time fails as a timeout without retrying past it."""
+        url, _ = fake_service
+        client = ServiceClient(url, retries=3, backoff=0.05)
+        
+        started = time.time()
+        with pytest.raises(requests.exceptions.Timeout):
+            client.get("/slow", deadline=0.2)
+        assert time.time() - started < 0.45
+        
+        stats = client.get_stats()
+        assert stats["timeouts"] >= 1
+        assert stats["endpoints"]["/slow"]["errors"] == stats["endpoints"]["/slow"]["requests"]
+    
+    def test_deadline_exceeded_is_a_timeout(self):
+        """Callers that handle requests timeouts also handle deadline expiry."""
+        assert issubclass(DeadlineExceeded, requests.exceptions.Timeout)
+    
+    def test_get_client_shares_one_client_per_target(self, fake_service):
+        """Callers in one process share the client (and pool) for a base URL."""
+        url, _ = fake_service
+        
+        assert get_client(url) is get_client(url + "/")
+        assert get_client(url).get("/health").json() == {"ok": True}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,155 @@
+import pytest
+import json
+import threading
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from flask import Flask, jsonify
+
+# Add repository root to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+from src.shared import tracing
+from src.shared.tracing import SpanExporter, configure_tracing, init_tracing, span, wrap
+from src.shared.service_client import ServiceClient
+from trace_summary import load_spans_from_file, summarize
+
+
+@pytest.fixture
+def exported(tmp_path):
+    """Export spans to a JSONL file for the test; yields a function returning them."""
+    previous = (tracing._service_name, tracing._exporter)
+    exporter = SpanExporter("jsonl", path=str(tmp_path / "traces.jsonl"))
+    configure_tracing("test-service", exporter=exporter)
+    
+    def spans():
+        assert exporter.flush()
+        path = tmp_path / "traces.jsonl"
+        return load_spans_from_file(str(path)) if path.exists() else []
+    
+    yield spans
+    configure_tracing(*previous)
+
+
+def _make_header_recorder():
+    """Start a server that records the trace headers of each request."""
+    seen = []
+    
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            seen.append({name: self.headers.get(name) for name in (tracing.TRACE_HEADER, tracing.PARENT_SPAN_HEADER)})
+            payload = json.dumps({"ok": True}).encode()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        
+        def log_message(self, format, *args):
+            pass
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}", seen
+
+
+class TestTracing:
+    """Test suite for cross-service request tracing."""
+    
+    def test_nested_spans_share_trace_and_link_parents(self, exported):
+        """Child spans join the enclosing trace and point at their parent."""
+        with span("outer") as outer:
+            with span("inner", stage="rag") as inner:
+                pass
+        
+        spans = {s["name"]: s for s in exported()}
+        assert spans["inner"]["trace_id"] == spans["outer"]["trace_id"] == outer.trace_id
+        assert spans["inner"]["parent_id"] == outer.span_id
+        assert spans["outer"]["parent_id"] is None
+        assert spans["inner"]["attributes"] == {"stage": "rag"}
+        assert spans["inner"]["service"] == "test-service"
+        assert inner.duration_ms <= outer.duration_ms
+    
+    def test_errors_are_recorded_and_reraised(self, exported):
+        """An exception inside a span marks the span and still propagates."""
+        with pytest.raises(ValueError):
+            with span("failing"):
+                raise ValueError("boom")
+        
+        assert exported()[0]["error"] == "ValueError: boom"
+    
+    def test_wrap_carries_trace_into_executor_threads(self, exported):
+        """Work handed to a thread pool through wrap() is recorded under the caller's span."""
+        executor = ThreadPoolExecutor(max_workers=2)
+        
+        def stage(name):
+            with span(name):
+                return name
+        
+        with span("request") as request_span:
+            futures = [executor.submit(wrap(stage), f"stage.{i}") for i in range(3)]
+            assert [f.result() for f in futures] == ["stage.0", "stage.1", "stage.2"]
+        executor.shutdown()
+        
+        stages = [s for s in exported() if s["name"].startswith("stage.")]
+        assert len(stages) == 3
+        assert all(s["parent_id"] == request_span.span_id for s in stages)
+    
+    def test_trace_propagates_through_flask_and_service_client(self, exported):
+        """A traced request continues the caller's trace and passes it on to downstream calls."""
+        server, url, seen = _make_header_recorder()
+        client = ServiceClient(url, backoff=0)
+        app = Flask(__name__)
+        init_tracing(app, "router-under-test")
+        
+        @app.route("/orchestrate", methods=["POST"])
+        def orchestrate():
+            client.post("/generate", json={})
+            return jsonify({"ok": True})
+        
+        try:
+            response = app.test_client().post("/orchestrate", json={}, headers={tracing.TRACE_HEADER: "t" * 32, tracing.PARENT_SPAN_HEADER: "caller"})
+        finally:
+            server.shutdown()
+        
+        assert response.headers[tracing.TRACE_HEADER] == "t" * 32
+        spans = {s["name"]: s for s in exported()}
+        server_span = spans["POST /orchestrate"]
+        client_span = spans[f"POST {url}/generate"]
+        assert server_span["parent_id"] == "caller"
+        assert server_span["attributes"]["status_code"] == 200
+        assert server_span["service"] == "router-under-test"
+        assert client_span["parent_id"] == server_span["span_id"]
+        assert seen == [{tracing.TRACE_HEADER: "t" * 32, tracing.PARENT_SPAN_HEADER: client_span["span_id"]}]
+    
+    def test_untraced_calls_send_no_headers(self, exported):
+        """Calls outside a trace (health probes, timers) create no spans or headers."""
+        server, url, seen = _make_header_recorder()
+        try:
+            ServiceClient(url, backoff=0).post("/probe", json={})
+        finally:
+            server.shutdown()
+        
+        assert seen == [{tracing.TRACE_HEADER: None, tracing.PARENT_SPAN_HEADER: None}]
+        assert exported() == []
+    
+    def test_summary_percentiles_per_stage(self):
+        """The summarizer groups spans by service and name with latency percentiles."""
+        spans = [
+            {"service": "llm-service", "name": "llm.generate", "duration_ms": float(ms), "error": None}
+            for ms in range(1, 101)
+        ] + [{"service": "message-router", "name": "stage.rag", "duration_ms": 5.0, "error": "Timeout"}]
+        
+        rows = {row["name"]: row for row in summarize(spans)}
+        assert rows["llm.generate"]["count"] == 100
+        assert rows["llm.generate"]["p50"] == 51.0
+        assert rows["llm.generate"]["p99"] == 100.0
+        assert rows["stage.rag"]["errors"] == 1
+        assert summarize(spans)[0]["name"] == "llm.generate"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])